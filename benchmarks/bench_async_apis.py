@@ -0,0 +1,176 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import argparse
+import asyncio
+import json
+import time
+import anyio.to_thread
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+from starlette.concurrency import run_in_threadpool
+from drift import DriftMonitor
+from schemas import FEATURE_NAMES, IrisBatch, features_to_array
+from benchmarks.load_test import git_commit, summarize
+from src.drift_baseline import compute_drift_baseline
+
+
+class StandinRunner:
+    """Remote runner stand-in: the API worker only waits on it, as it waits on a runner process"""
+
+    def __init__(self, service_ms, row_us):
+        self.service_ms = service_ms
+        self.row_us = row_us
+
+    def service_seconds(self, X):
+        return (self.service_ms + self.row_us * len(X) / 1000) / 1000
+
+    @staticmethod
+    def classify(X):
+        return np.where(X[:, 2] < 2.5, "setosa", np.where(X[:, 2] < 4.9, "versicolor", "virginica"))
+
+    def run(self, X):
+        time.sleep(self.service_seconds(X))
+        return self.classify(X)
+
+    async def async_run(self, X):
+        await asyncio.sleep(self.service_seconds(X))
+        return self.classify(X)
+
+
+def iter_chunks(X, chunk_size):
+    for start in range(0, len(X), chunk_size):
+        yield X[start:start + chunk_size]
+
+
+def build_handlers(runner, monitor, chunk_size, max_concurrent_chunks):
+    """The blocking handler the service used to run and the async one it runs now, minus cache and admission"""
+
+    def sync_handler(batch):
+        X = features_to_array(batch.features)
+        monitor.update(X)
+        predictions = []
+        for chunk in iter_chunks(X, chunk_size):
+            predictions.extend(runner.run(chunk).tolist())
+        return predictions
+
+    async def async_handler(batch):
+        X = features_to_array(batch.features)
+        chunk_slots = asyncio.Semaphore(max_concurrent_chunks)
+
+        async def score_chunk(chunk):
+            async with chunk_slots:
+                return (await runner.async_run(chunk)).tolist()
+
+        async def track_drift():
+            monitor.update(X)
+
+        chunks = [score_chunk(chunk) for chunk in iter_chunks(X, chunk_size)]
+        results = await asyncio.gather(*chunks, track_drift())
+        return [prediction for chunk_predictions in results[:-1] for prediction in chunk_predictions]
+
+    return sync_handler, async_handler
+
+
+async def run_level(call, batches, concurrency, duration):
+    """Closed loop: ``concurrency`` clients send back to back; returns samples, elapsed and CPU seconds"""
+    samples = []
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    async def client(i):
+        n = i
+        while time.perf_counter() - start < duration:
+            batch = batches[n % len(batches)]
+            n += concurrency
+            sent = time.perf_counter()
+            try:
+                await call(batch)
+                outcome = "ok"
+            except Exception:
+                outcome = "error"
+            samples.append(("predict_batch", (time.perf_counter() - sent) * 1000, outcome))
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return samples, time.perf_counter() - start, time.process_time() - cpu_start
+
+
+async def run_benchmark(runner, monitor, batches, levels, duration, chunk_size, max_concurrent_chunks,
+                        threadpool_size):
+    """Throughput, latency and API-worker CPU per request for the blocking and async handlers"""
+    # BentoML runs blocking APIs through the default anyio threadpool, one thread per in-flight request
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+    sync_handler, async_handler = build_handlers(runner, monitor, chunk_size, max_concurrent_chunks)
+    modes = {
+        "sync": lambda batch: run_in_threadpool(sync_handler, batch),
+        "async": async_handler,
+    }
+
+    results = {mode: [] for mode in modes}
+    for concurrency in levels:
+        for mode, call in modes.items():
+            samples, elapsed, cpu_seconds = await run_level(call, batches, concurrency, duration)
+            step = {"concurrency": concurrency, **summarize(samples, elapsed)}
+            step["cpu_ms_per_request"] = cpu_seconds * 1000 / max(step["requests"], 1)
+            results[mode].append(step)
+    return results
+
+
+def capacity(curve, latency_budget_ms):
+    """Highest concurrency whose p99 latency stays within the budget"""
+    within = [step["concurrency"] for step in curve
+              if step["p99_ms"] is not None and step["p99_ms"] <= latency_budget_ms]
+    return max(within) if within else 0
+
+
+def make_batches(batch_size, n_batches=32, seed=0):
+    rng = np.random.default_rng(seed)
+    low, high = [4.3, 2.0, 1.0, 0.1], [7.9, 4.4, 6.9, 2.5]
+    return [IrisBatch(features=[dict(zip(FEATURE_NAMES, row))
+                                for row in np.round(rng.uniform(low, high, (batch_size, 4)), 1).tolist()])
+            for _ in range(n_batches)]
+
+
+def drift_monitor():
+    iris = load_iris()
+    baseline = compute_drift_baseline(pd.DataFrame(iris.data, columns=FEATURE_NAMES), FEATURE_NAMES)
+    return DriftMonitor(baseline, FEATURE_NAMES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Concurrent-request capacity of one API worker: blocking runner.run vs awaited async_run")
+    parser.add_argument("--concurrency", default="1,8,32,64,128,256", help="Closed-loop client counts")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per level and mode")
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows per request")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per runner call (IRIS_MAX_BATCH_SIZE)")
+    parser.add_argument("--max-concurrent-chunks", type=int, default=4, help="IRIS_MAX_CONCURRENT_CHUNKS")
+    parser.add_argument("--service-ms", type=float, default=20.0, help="Runner round trip per call")
+    parser.add_argument("--row-us", type=float, default=5.0, help="Runner time per row")
+    parser.add_argument("--threadpool-size", type=int, default=40, help="Threads for blocking APIs (anyio default)")
+    parser.add_argument("--latency-budget-ms", type=float, default=50.0, help="p99 budget that defines capacity")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results = asyncio.run(run_benchmark(
+        StandinRunner(args.service_ms, args.row_us), drift_monitor(), make_batches(args.batch_size), levels,
+        args.duration, args.chunk_size, args.max_concurrent_chunks, args.threadpool_size))
+
+    print(f"{'concurrency':>11} {'mode':>6} {'ok rps':>9} {'p50 ms':>8} {'p99 ms':>8} {'cpu ms/req':>11}")
+    for i, concurrency in enumerate(levels):
+        for mode, curve in results.items():
+            step = curve[i]
+            print(f"{concurrency:>11} {mode:>6} {step['throughput_rps']:>9.1f} {step['p50_ms']:>8.2f} "
+                  f"{step['p99_ms']:>8.2f} {step['cpu_ms_per_request']:>11.3f}")
+    for mode, curve in results.items():
+        peak = max(step["throughput_rps"] for step in curve)
+        print(f"{mode:>5}: {capacity(curve, args.latency_budget_ms)} concurrent requests within p99 "
+              f"{args.latency_budget_ms:g} ms, peak {peak:.0f} rps")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "settings": vars(args), "results": results}, f, indent=2)
+        print(f"Results saved to {args.output}")
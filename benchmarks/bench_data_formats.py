@@ -0,0 +1,151 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.datasets import load_iris
+from src.data_io import EXTENSIONS, read_table, write_table
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FEATURE_COLUMNS = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+
+# Keep the model stages small so the data stages and file I/O dominate the comparison
+DEFAULT_OVERRIDES = ["tune.n_trials=2", "tune.cv_folds=2", "compact.probe_copies=1"]
+
+
+def synthetic_dataset(n_rows, schema_columns, seed=42):
+    """Iris rows resampled with jitter, so the split and the models behave like the real pipeline.
+
+    The jitter is clipped to the validation schema's ranges, so the data_validation stage passes.
+    """
+    iris = load_iris()
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(iris.data), n_rows)
+    low = [schema_columns[column]["min"] for column in FEATURE_COLUMNS]
+    high = [schema_columns[column]["max"] for column in FEATURE_COLUMNS]
+    jittered = np.clip(iris.data[index] + rng.normal(0, 0.05, (n_rows, 4)), low, high)
+    df = pd.DataFrame(np.round(jittered, 2), columns=FEATURE_COLUMNS)
+    df["species"] = iris.target_names[iris.target[index]]
+    return df
+
+
+def apply_overrides(params, overrides):
+    """Set ``section.key=value`` overrides, parsing values as YAML"""
+    for override in overrides:
+        key, value = override.split("=", 1)
+        *sections, name = key.split(".")
+        target = params
+        for section in sections:
+            target = target[section]
+        target[name] = yaml.safe_load(value)
+    return params
+
+
+def prepare_workspace(workspace, data_format, raw, overrides):
+    """Pipeline copy with its own params.yaml, models, metrics and MLflow store"""
+    with open(os.path.join(REPO_ROOT, "params.yaml"), "r") as f:
+        params = yaml.safe_load(f)
+    params = apply_overrides(params, overrides + [f"data.format={data_format}"])
+    with open(os.path.join(workspace, "params.yaml"), "w") as f:
+        yaml.safe_dump(params, f, sort_keys=False)
+    shutil.copy(os.path.join(REPO_ROOT, "dvc.yaml"), workspace)
+    os.symlink(os.path.join(REPO_ROOT, "src"), os.path.join(workspace, "src"))
+    write_table(raw, os.path.join(workspace, f"data/raw/iris{EXTENSIONS[data_format]}"), params["data"])
+    return params
+
+
+def stage_commands(data_format):
+    """dvc.yaml stage commands after data_ingestion, in pipeline order, with the format substituted"""
+    with open(os.path.join(REPO_ROOT, "dvc.yaml"), "r") as f:
+        stages = yaml.safe_load(f)["stages"]
+    return [(name, stage["cmd"].replace("${data.format}", data_format))
+            for name, stage in stages.items() if name != "data_ingestion"]
+
+
+def run_stages(workspace, data_format, env):
+    """Run each stage command and return its wall time in seconds"""
+    timings = {}
+    for name, cmd in stage_commands(data_format):
+        start = time.perf_counter()
+        subprocess.run(cmd, shell=True, cwd=workspace, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def run_dvc_repro(workspace, env):
+    """Time ``dvc repro`` from data_preprocessing onwards (ingestion downloads, so the raw file is pre-seeded)"""
+    subprocess.run(["dvc", "init", "--no-scm", "-q"], cwd=workspace, env=env, check=True)
+    start = time.perf_counter()
+    subprocess.run(["dvc", "repro", "--force", "--downstream", "data_preprocessing"],
+                   cwd=workspace, env=env, check=True, stdout=subprocess.DEVNULL)
+    return {"dvc_repro": time.perf_counter() - start}
+
+
+def time_reads(path, repeats=3):
+    """Best full-table and two-column read time of one file"""
+    def best(columns):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            read_table(path, columns=columns)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+    return {"read_all": best(None), "read_projected": best(FEATURE_COLUMNS[:2])}
+
+
+def benchmark_format(data_format, raw, overrides, use_dvc=False):
+    workspace = tempfile.mkdtemp(prefix=f"bench-{data_format}-")
+    try:
+        prepare_workspace(workspace, data_format, raw, overrides)
+        env = {**os.environ, "MLFLOW_TRACKING_URI": f"file://{workspace}/mlruns"}
+        timings = run_dvc_repro(workspace, env) if use_dvc else run_stages(workspace, data_format, env)
+        train_file = os.path.join(workspace, f"data/processed/train{EXTENSIONS[data_format]}")
+        return {
+            "stages_seconds": timings,
+            "total_seconds": sum(timings.values()),
+            "train_file_bytes": os.path.getsize(train_file),
+            "reads_seconds": time_reads(train_file),
+        }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline time for each intermediate data format")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--formats", default="csv,parquet,feather")
+    parser.add_argument("--set", dest="overrides", action="append", default=None,
+                        help=f"params.yaml override such as tune.n_trials=2 (default: {' '.join(DEFAULT_OVERRIDES)})")
+    parser.add_argument("--dvc", action="store_true", help="Time `dvc repro` instead of the stage commands one by one")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    with open(os.path.join(REPO_ROOT, "params.yaml"), "r") as f:
+        raw = synthetic_dataset(args.rows, yaml.safe_load(f)["validation"]["schema"]["columns"])
+    overrides = args.overrides if args.overrides is not None else DEFAULT_OVERRIDES
+    results = {}
+    for data_format in args.formats.split(","):
+        print(f"Running pipeline with {data_format} ({args.rows} rows)...")
+        results[data_format] = benchmark_format(data_format, raw, overrides, args.dvc)
+
+    stages = list(next(iter(results.values()))["stages_seconds"])
+    print(f"\n{'':>22}" + "".join(f"{data_format:>12}" for data_format in results))
+    for stage in stages + ["total"]:
+        key = "total_seconds" if stage == "total" else None
+        values = [r["total_seconds"] if key else r["stages_seconds"][stage] for r in results.values()]
+        print(f"{stage + ' s':>22}" + "".join(f"{value:>12.2f}" for value in values))
+    print(f"{'train file MB':>22}" + "".join(f"{r['train_file_bytes'] / 1e6:>12.1f}" for r in results.values()))
+    for read in ["read_all", "read_projected"]:
+        print(f"{read + ' s':>22}" + "".join(f"{r['reads_seconds'][read]:>12.3f}" for r in results.values()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "overrides": overrides, "results": results}, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,188 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import argparse
+import gc
+import json
+import platform
+import time
+import numpy as np
+import pandas as pd
+import sklearn
+import yaml
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from drift import DriftMonitor
+from schemas import FEATURE_NAMES, IrisBatch, IrisFeatures, features_to_array
+from stage_timing import STAGE_BUCKETS, STAGES, StageMetrics, timed
+from src.drift_baseline import compute_drift_baseline
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "hot_paths_baseline.json")
+
+
+def load_params():
+    with open("params.yaml", "r") as f:
+        return yaml.safe_load(f)
+
+
+def fit_estimators(hyperparameters):
+    """Fit the scaler and classifier on the iris dataset with the pipeline's hyperparameters"""
+    iris = load_iris()
+    scaler = StandardScaler().fit(iris.data)
+    model = RandomForestClassifier(**hyperparameters).fit(scaler.transform(iris.data), iris.target_names[iris.target])
+    baseline = compute_drift_baseline(pd.DataFrame(iris.data, columns=FEATURE_NAMES), FEATURE_NAMES)
+    return scaler, model, baseline
+
+
+def time_per_call(fn, repeats, min_seconds=0.1):
+    """Best per-call time in microseconds, looping each repeat long enough to beat timer noise"""
+    fn()
+    gc.collect()
+    gc.disable()
+    try:
+        return _best_of(fn, repeats, min_seconds)
+    finally:
+        gc.enable()
+
+
+def _best_of(fn, repeats, min_seconds):
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_seconds or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best * 1e6
+
+
+def time_request_stages(stage_metrics):
+    """Request-path cost of stage timing: a timer, every stage wrapped around a no-op, and the queued export"""
+    timer = stage_metrics.start()
+    for stage in STAGES:
+        timed(stage, _no_op)
+    stage_metrics.finish(timer, "predict_batch", 1)
+
+
+def _no_op():
+    pass
+
+
+def build_stages(batch_sizes, hyperparameters):
+    """Map stage name to a zero-argument callable, one request stage at a time"""
+    scaler, model, drift_baseline = fit_estimators(hyperparameters)
+    monitor = DriftMonitor(drift_baseline, FEATURE_NAMES)
+    registry = CollectorRegistry()
+    counter = Counter("bench_predictions_total", "Predictions", ["model_version"], registry=registry)
+    histogram = Histogram("bench_latency_seconds", "Latency", registry=registry)
+    batch_histogram = Histogram("bench_batch_latency_seconds", "Batch latency", ["batch_size"], registry=registry)
+    stage_metrics = StageMetrics(
+        Histogram("bench_stage_seconds", "Stage latency", ["endpoint", "stage", "batch_size"],
+                  buckets=STAGE_BUCKETS, registry=registry),
+        Histogram("bench_request_batch_size", "Batch size", ["endpoint"], registry=registry),
+        lambda size: "<=1",
+        flush_interval_seconds=3600,
+        max_pending=1000,
+    )
+
+    rng = np.random.default_rng(42)
+    single = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+    stages = {
+        "parse_single": lambda: IrisFeatures(**single),
+        "prometheus_counter_inc": lambda: counter.labels(model_version="v1.0").inc(),
+        "prometheus_histogram_observe": lambda: histogram.observe(0.01),
+        "prometheus_labeled_histogram_observe": lambda: batch_histogram.labels(batch_size="100").observe(0.01),
+        "stage_timing_request": lambda: time_request_stages(stage_metrics),
+    }
+    for n in batch_sizes:
+        X = np.round(rng.normal(loc=[5.8, 3.0, 3.7, 1.2], scale=[0.8, 0.4, 1.7, 0.7], size=(n, 4)), 1)
+        payload = {"features": [dict(zip(FEATURE_NAMES, row)) for row in X.tolist()]}
+        rows = IrisBatch(**payload).features
+        X_scaled = scaler.transform(X)
+        stages[f"parse_batch[{n}]"] = lambda payload=payload: IrisBatch(**payload)
+        stages[f"build_array[{n}]"] = lambda rows=rows: features_to_array(rows)
+        stages[f"scaler_transform[{n}]"] = lambda X=X: scaler.transform(X)
+        stages[f"model_predict[{n}]"] = lambda X_scaled=X_scaled: model.predict(X_scaled)
+        stages[f"drift_update[{n}]"] = lambda X=X: monitor.update(X)
+    stages["drift_score"] = monitor.score
+    return stages
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "sklearn": sklearn.__version__,
+            "machine": platform.machine(), "processor": platform.processor()}
+
+
+def compare(results, baseline, threshold):
+    """Return (stage, baseline_us, current_us, change) for every stage slower than the threshold allows"""
+    regressions = []
+    for stage, current in results.items():
+        previous = baseline.get(stage)
+        if previous is None:
+            continue
+        change = (current - previous) / previous
+        if change > threshold / 100:
+            regressions.append((stage, previous, current, change))
+    return regressions
+
+
+def run_benchmark(stages, repeats):
+    """Time every stage and return per-call microseconds"""
+    return {stage: time_per_call(fn, repeats) for stage, fn in stages.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark each inference stage against a stored baseline")
+    parser.add_argument("--batch-sizes", default="1,100,10000,100000")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=25.0, help="Allowed slowdown per stage, in percent")
+    parser.add_argument("--stage", default=None, help="Only run stages whose name contains this")
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run")
+    args = parser.parse_args()
+
+    stages = build_stages([int(b) for b in args.batch_sizes.split(",")], load_params()["train"]["hyperparameters"])
+    stages = {stage: fn for stage, fn in stages.items() if not args.stage or args.stage in stage}
+    results = run_benchmark(stages, args.repeats)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "stages_us": results}, f, indent=2)
+        for stage, us in results.items():
+            print(f"{stage:>40} {us:>14.2f} us")
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    if baseline["environment"] != environment():
+        print(f"Warning: baseline was recorded on {baseline['environment']}, this run is {environment()}")
+
+    # Re-time apparent regressions once so a transient hiccup on a shared machine does not fail the run
+    for stage, *_ in compare(results, baseline["stages_us"], args.threshold):
+        results[stage] = min(results[stage], time_per_call(stages[stage], args.repeats))
+
+    print(f"{'stage':>40} {'baseline us':>14} {'current us':>14} {'change':>8}")
+    for stage, current in results.items():
+        previous = baseline["stages_us"].get(stage)
+        change = f"{(current - previous) / previous:>+8.1%}" if previous else f"{'new':>8}"
+        print(f"{stage:>40} {previous or 0:>14.2f} {current:>14.2f} {change}")
+
+    regressions = compare(results, baseline["stages_us"], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold:.0f}%:")
+        for stage, previous, current, change in regressions:
+            print(f"  {stage}: {previous:.2f} us -> {current:.2f} us ({change:+.1%})")
+        sys.exit(1)
+    print(f"\nNo stage regressed by more than {args.threshold:.0f}%")
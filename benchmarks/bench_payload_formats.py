@@ -0,0 +1,82 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import argparse
+import io
+import json
+import time
+import numpy as np
+import pyarrow as pa
+from payload_formats import ARROW_STREAM, CSV, JSON_TYPE, NPY, decode_features, encode_predictions
+from schemas import FEATURE_NAMES, IrisBatch
+
+
+def encode_request(X, content_type):
+    """Encode a feature matrix the way a client would send it"""
+    if content_type == ARROW_STREAM:
+        table = pa.table({name: X[:, i] for i, name in enumerate(FEATURE_NAMES)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if content_type == NPY:
+        buffer = io.BytesIO()
+        np.save(buffer, X.astype(np.float32))
+        return buffer.getvalue()
+    if content_type == CSV:
+        buffer = io.StringIO()
+        buffer.write(",".join(FEATURE_NAMES) + "\n")
+        np.savetxt(buffer, X, delimiter=",", fmt="%.2f")
+        return buffer.getvalue().encode()
+    return json.dumps({"features": [dict(zip(FEATURE_NAMES, row)) for row in X.tolist()]}).encode()
+
+
+def decode_pydantic(body):
+    """Legacy predict_batch path: IrisBatch objects, then a matrix"""
+    batch = IrisBatch(**json.loads(body))
+    return np.array([[f.sepal_length, f.sepal_width, f.petal_length, f.petal_width] for f in batch.features])
+
+
+def best_of(fn, repeats):
+    """Best wall time in milliseconds over a few repeats"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def run_benchmark(n_rows, repeats):
+    """Compare request decode and response encode cost per format"""
+    rng = np.random.default_rng(42)
+    X = np.round(rng.uniform(0.1, 8.0, size=(n_rows, 4)), 2)
+    predictions = rng.choice(["setosa", "versicolor", "virginica"], size=n_rows).tolist()
+
+    print(f"{n_rows} rows")
+    print(f"{'format':>32} {'bytes in':>12} {'decode ms':>10} {'bytes out':>12} {'encode ms':>10}")
+    results = []
+    cases = [("json (IrisBatch)", JSON_TYPE, decode_pydantic)] + [
+        (content_type, content_type, lambda body, ct=content_type: decode_features(body, ct))
+        for content_type in (JSON_TYPE, ARROW_STREAM, NPY, CSV)
+    ]
+    for name, content_type, decode in cases:
+        body = encode_request(X, content_type)
+        decode_ms = best_of(lambda: decode(body), repeats)
+        response, _ = encode_predictions(predictions, content_type)
+        encode_ms = best_of(lambda: encode_predictions(predictions, content_type), repeats)
+        print(f"{name:>32} {len(body):>12} {decode_ms:>10.2f} {len(response):>12} {encode_ms:>10.2f}")
+        results.append({"format": name, "rows": n_rows, "request_bytes": len(body), "decode_ms": decode_ms,
+                        "response_bytes": len(response), "encode_ms": encode_ms})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch payload formats")
+    parser.add_argument("--rows", default="1000,100000")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_rows in [int(n) for n in args.rows.split(",")]:
+        run_benchmark(n_rows, args.repeats)
+        print()
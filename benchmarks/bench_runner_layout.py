@@ -0,0 +1,76 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import pickle
+import time
+import joblib
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+
+# The runner hop is simulated in-process: only the pickling a remote runner call adds is measured,
+# not the IPC, HTTP framing or runner scheduling, so the numbers are a lower bound on a real hop
+PROXY_NOTE = ("Runner hops are simulated in-process with a pickle round-trip (serialization cost only, "
+              "no IPC or scheduling); real runner calls cost more per hop")
+
+
+def runner_hop(method, data):
+    """Call an estimator method with a remote runner's serialization: pickle in, pickle out"""
+    payload = pickle.loads(pickle.dumps(data, protocol=5))
+    result = method(payload)
+    return pickle.loads(pickle.dumps(result, protocol=5))
+
+
+def split_layout(model, scaler):
+    """Legacy layout: scaler runner, then model runner"""
+    return lambda X: runner_hop(model.predict, runner_hop(scaler.transform, X))
+
+
+def fused_layout(model, scaler):
+    """Fused layout: one pipeline runner"""
+    pipeline = Pipeline([("scaler", scaler), ("model", model)])
+    return lambda X: runner_hop(pipeline.predict, X)
+
+
+def time_calls(fn, X, repeats):
+    """Return per-call latencies in milliseconds"""
+    fn(X)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def run_benchmark(model_path, scaler_path, batch_sizes, repeats):
+    """Compare split and fused runner layouts at several batch sizes"""
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    layouts = {"split": split_layout(model, scaler), "fused": fused_layout(model, scaler)}
+    rng = np.random.default_rng(42)
+
+    print(PROXY_NOTE)
+    print(f"{'batch':>8} {'layout':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    results = []
+    for batch_size in batch_sizes:
+        X = rng.normal(loc=[5.8, 3.0, 3.7, 1.2], scale=[0.8, 0.4, 1.7, 0.7], size=(batch_size, 4))
+        for name, fn in layouts.items():
+            latencies = time_calls(fn, X, repeats)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{batch_size:>8} {name:>7} {p50:>9.3f} {p99:>9.3f}")
+            results.append({"batch_size": batch_size, "layout": name, "p50_ms": p50, "p99_ms": p99})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare split vs fused scaler+classifier runner layouts, "
+                                                 "with each runner hop simulated as a pickle round-trip")
+    parser.add_argument("--model", default="models/model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--batch-sizes", default="1,10,100,1000")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    run_benchmark(args.model, args.scaler, [int(b) for b in args.batch_sizes.split(",")], args.repeats)
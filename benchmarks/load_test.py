@@ -0,0 +1,288 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import argparse
+import asyncio
+import itertools
+import json
+import subprocess
+import time
+import numpy as np
+from fastapi import FastAPI, Request, Response
+from admission import ConcurrencyLimiter, Overloaded
+from schemas import FEATURE_NAMES
+
+SHED_STATUSES = (429, 503)
+QUANTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+
+def synthetic_corpus(n_requests, batch_fraction=0.2, batch_size=50, seed=42):
+    """Generate predict_single/predict_batch requests with iris-like features"""
+    rng = np.random.default_rng(seed)
+    low = np.array([4.3, 2.0, 1.0, 0.1])
+    high = np.array([7.9, 4.4, 6.9, 2.5])
+
+    def row():
+        return dict(zip(FEATURE_NAMES, np.round(rng.uniform(low, high), 1).tolist()))
+
+    corpus = []
+    for _ in range(n_requests):
+        if rng.random() < batch_fraction:
+            corpus.append({"endpoint": "/predict_batch", "body": {"features": [row() for _ in range(batch_size)]}})
+        else:
+            corpus.append({"endpoint": "/predict_single", "body": row()})
+    return corpus
+
+
+def load_corpus(path):
+    """Read a JSONL corpus of {"endpoint": ..., "body": ...} requests"""
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_standin_app(service_ms=2.0, row_us=5.0, max_in_flight=4, max_queue=16, deadline_ms=1000.0):
+    """Stand-in for the iris service: same routes and responses, simulated service time and real admission control"""
+    app = FastAPI()
+    limiter = ConcurrencyLimiter(max_in_flight, max_queue, deadline_ms / 1000)
+
+    def classify(row):
+        if row["petal_length"] < 2.5:
+            return "setosa"
+        return "versicolor" if row["petal_length"] < 4.9 else "virginica"
+
+    async def score(rows):
+        async with limiter.admit_async():
+            await asyncio.sleep((service_ms + row_us * len(rows) / 1000) / 1000)
+            return [classify(row) for row in rows]
+
+    async def guarded(rows):
+        try:
+            return await score(rows), None
+        except Overloaded as e:
+            return None, Response(str(e), status_code=429, headers={"Retry-After": str(e.retry_after)})
+
+    @app.post("/predict_single")
+    async def predict_single(request: Request):
+        predictions, rejected = await guarded([await request.json()])
+        return rejected or Response(f"Predicted species: {predictions[0]}", media_type="text/plain")
+
+    @app.post("/predict_batch")
+    async def predict_batch(request: Request):
+        predictions, rejected = await guarded((await request.json())["features"])
+        return rejected or {"predictions": predictions, "count": len(predictions)}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "in_flight": limiter.in_flight, "queued": limiter.queued}
+
+    return app
+
+
+class InProcessTarget:
+    """Sends requests straight into an ASGI app, no sockets involved"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def post(self, path, body):
+        payload = json.dumps(body).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+            "client": ("127.0.0.1", 0), "server": ("standin", 80),
+        }
+        messages = [{"type": "http.request", "body": payload, "more_body": False}]
+        done = asyncio.Event()
+        response = {"status": 500, "body": b""}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return response["status"], response["body"].decode()
+
+    async def close(self):
+        pass
+
+
+class HTTPTarget:
+    """Sends requests to a running service over HTTP"""
+
+    def __init__(self, base_url, max_connections=256):
+        import aiohttp
+
+        self.base_url = base_url.rstrip("/")
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_connections))
+
+    async def post(self, path, body):
+        async with self.session.post(self.base_url + path, json=body) as response:
+            return response.status, await response.text()
+
+    async def close(self):
+        await self.session.close()
+
+
+def classify_response(endpoint, status, text):
+    """Map a response to ok, shed or error (the service reports some failures with a 200)"""
+    if status in SHED_STATUSES:
+        return "shed"
+    if status >= 400:
+        return "error"
+    if endpoint == "/predict_single" and not text.startswith("Predicted species"):
+        return "error"
+    if endpoint == "/predict_batch" and '"error"' in text:
+        return "error"
+    return "ok"
+
+
+async def timed_request(target, entry, scheduled_at, samples):
+    """Send one request and record its latency from the time it was scheduled"""
+    try:
+        status, text = await target.post(entry["endpoint"], entry["body"])
+        outcome = classify_response(entry["endpoint"], status, text)
+    except Exception:
+        outcome = "error"
+    samples.append((entry["endpoint"], (time.perf_counter() - scheduled_at) * 1000, outcome))
+
+
+async def run_open_loop(target, corpus, rate, duration):
+    """Send requests at a constant arrival rate regardless of how fast responses come back.
+
+    Latency is measured from each request's scheduled send time, so a stalled
+    server is not hidden by the generator slowing down (coordinated omission).
+    """
+    samples = []
+    tasks = []
+    start = time.perf_counter()
+    for i, entry in enumerate(itertools.cycle(corpus)):
+        scheduled_at = start + i / rate
+        if scheduled_at - start >= duration:
+            break
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed_request(target, entry, scheduled_at, samples)))
+    await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - start
+
+
+async def run_closed_loop(target, corpus, concurrency, duration):
+    """Keep a fixed number of requests outstanding for the whole run"""
+    samples = []
+    entries = itertools.cycle(corpus)
+    start = time.perf_counter()
+
+    async def worker():
+        while time.perf_counter() - start < duration:
+            await timed_request(target, next(entries), time.perf_counter(), samples)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    """Throughput, latency quantiles and error/shed rates for one load step"""
+    outcomes = [outcome for _, _, outcome in samples]
+    latencies = np.array([latency for _, latency, outcome in samples if outcome == "ok"])
+    summary = {
+        "requests": len(samples),
+        "throughput_rps": sum(o == "ok" for o in outcomes) / elapsed,
+        "error_rate": outcomes.count("error") / max(len(samples), 1),
+        "shed_rate": outcomes.count("shed") / max(len(samples), 1),
+    }
+    for name, q in QUANTILES.items():
+        summary[f"{name}_ms"] = float(np.percentile(latencies, q)) if len(latencies) else None
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+async def run_load_test(target, corpus, mode, loads, duration):
+    """Run one step per load level and return the latency-vs-load curve"""
+    run = run_open_loop if mode == "open" else run_closed_loop
+    load_key = "rate_rps" if mode == "open" else "concurrency"
+
+    print(f"{load_key:>12} {'requests':>9} {'ok rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'p999 ms':>8} {'errors':>7} {'shed':>7}")
+    curve = []
+    for load in loads:
+        samples, elapsed = await run(target, corpus, load, duration)
+        step = {load_key: load, **summarize(samples, elapsed)}
+        step["endpoints"] = {
+            endpoint: summarize([s for s in samples if s[0] == endpoint], elapsed)
+            for endpoint in sorted({s[0] for s in samples})
+        }
+        fmt = lambda v: f"{v:8.2f}" if v is not None else f"{'-':>8}"
+        print(f"{load:>12} {step['requests']:>9} {step['throughput_rps']:>9.1f} {fmt(step['p50_ms'])} "
+              f"{fmt(step['p95_ms'])} {fmt(step['p99_ms'])} {fmt(step['p999_ms'])} "
+              f"{step['error_rate']:>7.2%} {step['shed_rate']:>7.2%}")
+        curve.append(step)
+    return curve
+
+
+async def main(args):
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(
+        args.corpus_size, args.batch_fraction, args.batch_size)
+    if args.url:
+        target = HTTPTarget(args.url)
+    else:
+        target = InProcessTarget(build_standin_app(args.service_ms, args.row_us, args.max_in_flight,
+                                                   args.max_queue, args.deadline_ms))
+    try:
+        loads = [float(v) if args.mode == "open" else int(v) for v in args.loads.split(",")]
+        curve = await run_load_test(target, corpus, args.mode, loads, args.duration)
+    finally:
+        await target.close()
+
+    results = {
+        "commit": git_commit(),
+        "target": args.url or "in-process stand-in",
+        "mode": args.mode,
+        "duration_seconds": args.duration,
+        "corpus": args.corpus or f"synthetic ({args.corpus_size} requests, {args.batch_fraction:.0%} batches of {args.batch_size})",
+        "curve": curve,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test predict_single/predict_batch")
+    parser.add_argument("--url", default=None, help="Service base URL; omit to use the in-process stand-in")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed",
+                        help="open: constant arrival rate, closed: fixed concurrency")
+    parser.add_argument("--loads", default="1,4,16,64", help="Arrival rates (open) or concurrency levels (closed)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load step")
+    parser.add_argument("--corpus", default=None, help="JSONL file of {\"endpoint\": ..., \"body\": ...} requests")
+    parser.add_argument("--corpus-size", type=int, default=1000)
+    parser.add_argument("--batch-fraction", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--service-ms", type=float, default=2.0, help="Stand-in fixed service time per request")
+    parser.add_argument("--row-us", type=float, default=5.0, help="Stand-in service time per row")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="Stand-in admission limit")
+    parser.add_argument("--max-queue", type=int, default=16, help="Stand-in admission queue")
+    parser.add_argument("--deadline-ms", type=float, default=1000.0, help="Stand-in queue deadline")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,268 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Optional
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Service overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class ConcurrencyLimiter:
+    """Bounded in-flight limit with a bounded, deadline-aware wait queue.
+
+    At most ``max_in_flight`` requests run at once and at most ``max_queue``
+    wait for a slot. A request is rejected straight away when the queue is
+    full or when the estimated wait (queue depth x recent service time)
+    exceeds ``deadline_seconds``, and is rejected after waiting if no slot
+    frees up before the deadline. Threads wait in ``admit`` and coroutines in
+    ``admit_async``; both share the same slots and queue.
+    """
+
+    def __init__(self, max_in_flight: int = 4, max_queue: int = 16, deadline_seconds: float = 1.0,
+                 on_change: Optional[Callable[[int, int], None]] = None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.deadline = deadline_seconds
+        self.on_change = on_change
+        self.in_flight = 0
+        self.queued = 0
+        self._service_time = 0.01
+        self._cond = threading.Condition()
+        self._async_waiters = set()
+
+    def estimated_wait(self) -> float:
+        """Expected wait for a new request given the current queue"""
+        return (self.queued + 1) * self._service_time / self.max_in_flight
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.in_flight, self.queued)
+
+    def _check_queue(self):
+        """Reject a request that would have to queue, if the queue is full or too slow"""
+        if self.queued >= self.max_queue:
+            raise Overloaded("queue_full", self.estimated_wait())
+        if self.estimated_wait() > self.deadline:
+            raise Overloaded("deadline", self.estimated_wait())
+
+    def _acquire(self):
+        with self._cond:
+            if self.in_flight >= self.max_in_flight:
+                self._check_queue()
+                self.queued += 1
+                self._changed()
+                try:
+                    give_up_at = time.monotonic() + self.deadline
+                    while self.in_flight >= self.max_in_flight:
+                        remaining = give_up_at - time.monotonic()
+                        if remaining <= 0:
+                            raise Overloaded("timeout", self.estimated_wait())
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+
+            self.in_flight += 1
+            self._changed()
+
+    async def _acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                self._changed()
+                return
+            self._check_queue()
+            self.queued += 1
+            self._changed()
+
+        give_up_at = time.monotonic() + self.deadline
+        try:
+            while True:
+                wakeup = loop.create_future()
+                with self._cond:
+                    if self.in_flight < self.max_in_flight:
+                        self.in_flight += 1
+                        return
+                    self._async_waiters.add((loop, wakeup))
+                try:
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        raise Overloaded("timeout", self.estimated_wait())
+                    await asyncio.wait_for(wakeup, remaining)
+                except asyncio.TimeoutError:
+                    raise Overloaded("timeout", self.estimated_wait())
+                finally:
+                    with self._cond:
+                        self._async_waiters.discard((loop, wakeup))
+        finally:
+            with self._cond:
+                self.queued -= 1
+                self._changed()
+
+    def _release(self, elapsed: float):
+        with self._cond:
+            self.in_flight -= 1
+            self._service_time = 0.9 * self._service_time + 0.1 * elapsed
+            self._changed()
+            self._cond.notify()
+            # Every waiting coroutine re-checks for the free slot; the queue is short
+            for loop, wakeup in self._async_waiters:
+                loop.call_soon_threadsafe(_wake, wakeup)
+
+    @contextmanager
+    def admit(self):
+        """Hold an in-flight slot for the duration of the block, or raise Overloaded"""
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def admit_async(self):
+        """``admit`` for coroutines: waits for a slot without blocking the event loop"""
+        await self._acquire_async()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class CircuitBreaker:
+    """Circuit breaker driven by the error rate over a sliding time window.
+
+    Outcomes are counted in ``n_buckets`` time buckets covering
+    ``window_seconds``. The breaker opens once the window holds at least
+    ``min_requests`` outcomes and the error rate reaches
+    ``error_rate_threshold``. After ``recovery_timeout`` seconds it lets a
+    single probe through (half-open); the probe's outcome closes or re-opens it.
+    A probe that never reports back (``abandon``, or nothing within
+    ``probe_timeout`` seconds) makes way for the next one. ``allow`` hands out
+    a ticket so that only the probe's own ``abandon`` or ``record`` settles it,
+    not a request that was admitted before the breaker opened.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window_seconds: float = 30.0, n_buckets: int = 10, min_requests: int = 10,
+                 error_rate_threshold: float = 0.5, recovery_timeout: float = 60.0, probe_timeout: float = 30.0):
+        self.bucket_seconds = window_seconds / n_buckets
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout
+        self._bucket_ids = [-1] * n_buckets
+        self._successes = [0] * n_buckets
+        self._failures = [0] * n_buckets
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_ticket = None
+        self._probe_started_at = 0.0
+        self._last_ticket = 0
+        self._lock = threading.Lock()
+
+    def _current_bucket(self, now: float) -> int:
+        bucket_id = int(now // self.bucket_seconds)
+        slot = bucket_id % len(self._bucket_ids)
+        if self._bucket_ids[slot] != bucket_id:
+            self._bucket_ids[slot] = bucket_id
+            self._successes[slot] = 0
+            self._failures[slot] = 0
+        return slot
+
+    def _window_counts(self, now: float):
+        oldest = int(now // self.bucket_seconds) - len(self._bucket_ids) + 1
+        successes = failures = 0
+        for slot, bucket_id in enumerate(self._bucket_ids):
+            if bucket_id >= oldest:
+                successes += self._successes[slot]
+                failures += self._failures[slot]
+        return successes, failures
+
+    def _reset_window(self):
+        self._bucket_ids = [-1] * len(self._bucket_ids)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def error_rate(self) -> float:
+        """Error rate over the sliding window"""
+        with self._lock:
+            successes, failures = self._window_counts(time.monotonic())
+        total = successes + failures
+        return failures / total if total else 0.0
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through"""
+        with self._lock:
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> Optional[int]:
+        """A ticket (truthy) if a request may proceed, else None; pass it to ``record`` or ``abandon``"""
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return None
+                self._state = self.HALF_OPEN
+                self._probe_ticket = None
+            self._last_ticket += 1
+            if self._state == self.HALF_OPEN:
+                now = time.monotonic()
+                if self._probe_ticket is not None and now - self._probe_started_at < self.probe_timeout:
+                    return None
+                self._probe_ticket = self._last_ticket
+                self._probe_started_at = now
+            return self._last_ticket
+
+    def abandon(self, ticket: int):
+        """Forget an allowed request that ended without an outcome (cancelled), freeing the probe slot if it held it"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and ticket == self._probe_ticket:
+                self._probe_ticket = None
+
+    def record(self, success: bool, ticket: Optional[int] = None):
+        """Record the outcome of an allowed request; while half-open, only the probe's outcome counts"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.HALF_OPEN:
+                if ticket is not None and ticket != self._probe_ticket:
+                    return
+                self._probe_ticket = None
+                if success:
+                    self._state = self.CLOSED
+                    self._reset_window()
+                else:
+                    self._state = self.OPEN
+                    self._opened_at = now
+                return
+
+            slot = self._current_bucket(now)
+            if success:
+                self._successes[slot] += 1
+            else:
+                self._failures[slot] += 1
+
+            successes, failures = self._window_counts(now)
+            total = successes + failures
+            if total >= self.min_requests and failures / total >= self.error_rate_threshold:
+                self._state = self.OPEN
+                self._opened_at = now
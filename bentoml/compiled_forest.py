@@ -0,0 +1,128 @@
+import json
+import os
+
+import numpy as np
+
+ARRAY_NAMES = ["feature", "threshold", "left", "right", "leaf_proba", "roots", "mean", "scale"]
+
+
+class CompiledForest:
+    """Array-backed RandomForestClassifier inference engine.
+
+    All trees are flattened into contiguous node arrays and a whole batch is
+    routed through every tree at once, one vectorized step per tree level.
+    Scaling, the float32 cast, leaf normalization and the tree-by-tree
+    probability sum follow sklearn's operation order, so predictions are
+    bit-identical to ``scaler.transform`` followed by ``model.predict``.
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf_proba, roots, classes, max_depth,
+                 mean=None, scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None):
+        """Flatten a fitted RandomForestClassifier (and optional StandardScaler).
+
+        Compilation runs offline (scripts/build_bento.py) and uses the repo's
+        ``src`` package, which the bento does not ship; serving only loads the arrays.
+        """
+        from src.tree_precision import float32_floor
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+
+            # Leaves point at themselves so extra traversal steps are no-ops
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(float32_floor(np.concatenate(thresholds))),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            leaf_proba=np.ascontiguousarray(np.concatenate(probas)),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=model.classes_,
+            max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+            mean=None if scaler is None else np.asarray(scaler.mean_, dtype=np.float64),
+            scale=None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64),
+        )
+
+    def transform(self, X) -> np.ndarray:
+        """Apply the folded-in StandardScaler, if any"""
+        X = np.array(X, dtype=np.float64)
+        if self.mean is not None:
+            X -= self.mean
+            X /= self.scale
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """Return the leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Average leaf probabilities over trees, summed in tree order"""
+        leaves = self.apply(self.transform(X))
+        proba = np.zeros((len(leaves), self.leaf_proba.shape[1]), dtype=np.float64)
+        for tree_index in range(leaves.shape[1]):
+            proba += self.leaf_proba[leaves[:, tree_index]]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Predict class labels for a feature matrix"""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def save(self, path: str):
+        """Write every array as its own .npy file so it can be memory-mapped"""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_NAMES:
+            array = getattr(self, name)
+            if array is not None:
+                np.save(os.path.join(path, f"{name}.npy"), array)
+        with open(os.path.join(path, "forest.json"), "w") as f:
+            json.dump({"classes": self.classes.tolist(), "max_depth": self.max_depth}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode=None):
+        """Load an engine written by ``save``"""
+        with open(os.path.join(path, "forest.json"), "r") as f:
+            info = json.load(f)
+        arrays = {}
+        for name in ARRAY_NAMES:
+            array_path = os.path.join(path, f"{name}.npy")
+            arrays[name] = np.load(array_path, mmap_mode=mmap_mode) if os.path.exists(array_path) else None
+        return cls(classes=info["classes"], max_depth=info["max_depth"], **arrays)
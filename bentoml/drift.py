@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+EPSILON = 1e-4
+
+
+def load_baseline(path: str) -> dict:
+    """Load the drift baseline written by the train_model stage"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two binned distributions"""
+    expected = np.clip(expected, EPSILON, None)
+    actual = np.clip(actual, EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Kolmogorov-Smirnov statistic computed on the shared bins"""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+class DriftMonitor:
+    """Sliding-window feature histograms scored against a training baseline.
+
+    Live rows are binned on the baseline's bin edges into a ring of
+    ``n_slots`` count tables, each covering ``slot_seconds``. Memory is fixed
+    at ``n_slots x n_features x n_bins`` counters whatever the traffic, and
+    ``update`` is a vectorized bincount per feature. PSI and KS scores are
+    computed by ``score`` (or the background timer), never per request.
+    """
+
+    def __init__(self, baseline: dict, feature_names: List[str], n_slots: int = 12,
+                 slot_seconds: float = 5.0, min_samples: int = 50):
+        self.feature_names = feature_names
+        self.edges = [np.asarray(baseline["features"][name]["bin_edges"], dtype=np.float64)
+                      for name in feature_names]
+        self.expected = [np.asarray(baseline["features"][name]["proportions"], dtype=np.float64)
+                         for name in feature_names]
+        self.n_bins = max(len(e) for e in self.expected)
+        self.slot_seconds = slot_seconds
+        self.min_samples = min_samples
+        self._slots = np.zeros((n_slots, len(feature_names), self.n_bins), dtype=np.int64)
+        self._totals = np.zeros((len(feature_names), self.n_bins), dtype=np.int64)
+        self._slot_index = 0
+        self._slot_started = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _rotate(self, now: float):
+        """Advance the ring, expiring slots older than the window"""
+        elapsed = int((now - self._slot_started) // self.slot_seconds)
+        for _ in range(min(elapsed, len(self._slots))):
+            self._slot_index = (self._slot_index + 1) % len(self._slots)
+            self._totals -= self._slots[self._slot_index]
+            self._slots[self._slot_index] = 0
+        if elapsed:
+            self._slot_started += elapsed * self.slot_seconds
+
+    def update(self, input_data: np.ndarray):
+        """Add a batch of feature rows to the current window"""
+        counts = np.empty((len(self.feature_names), self.n_bins), dtype=np.int64)
+        for i, edges in enumerate(self.edges):
+            bins = np.searchsorted(edges, input_data[:, i], side="right")
+            counts[i] = np.bincount(bins, minlength=self.n_bins)[:self.n_bins]
+        with self._lock:
+            self._rotate(time.monotonic())
+            self._slots[self._slot_index] += counts
+            self._totals += counts
+
+    def window_size(self) -> int:
+        """Rows currently in the sliding window"""
+        with self._lock:
+            self._rotate(time.monotonic())
+            return int(self._totals[0].sum())
+
+    def score(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Per-feature PSI and KS for the current window, or None if it is too small"""
+        with self._lock:
+            self._rotate(time.monotonic())
+            totals = self._totals.copy()
+        n_rows = int(totals[0].sum())
+        if n_rows < self.min_samples:
+            return None
+
+        scores = {}
+        for i, name in enumerate(self.feature_names):
+            expected = self.expected[i]
+            actual = totals[i, :len(expected)] / n_rows
+            scores[name] = {"psi": psi(expected, actual), "ks": binned_ks(expected, actual)}
+        return scores
+
+    def start(self, interval_seconds: float, on_scores: Callable[[Dict[str, Dict[str, float]]], None]):
+        """Score the window every ``interval_seconds`` on a daemon thread"""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=self._run_timer, args=(interval_seconds, on_scores),
+                                           name="drift-monitor", daemon=True)
+        self._timer.start()
+
+    def _run_timer(self, interval_seconds: float, on_scores):
+        while True:
+            time.sleep(interval_seconds)
+            scores = self.score()
+            if scores is not None:
+                on_scores(scores)
@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Merge concurrent single-row requests into one batched call.
+
+    Callers await ``submit`` while a background task on their event loop
+    collects rows until ``max_batch_size`` is reached or the oldest row has
+    waited ``max_wait_ms``, then awaits ``predict_fn`` once for the batch, so
+    the runner is called through its async client like any other request.
+    The wait is adaptive: when every in-flight caller is already in the batch
+    it is dispatched right away, so an idle service adds no extra latency.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], Awaitable[list]], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, on_batch: Optional[Callable[[int, List[float]], None]] = None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+        self._queue = None
+        self._loop = None
+        self._task = None
+        self._in_flight = 0
+
+    async def submit(self, row: np.ndarray) -> Tuple[object, float]:
+        """Score a single feature row; returns its own prediction and how long the batch's ``predict_fn`` took"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._in_flight += 1
+        self._queue.put_nowait((row, time.perf_counter(), future))
+        # A cancelled caller only cancels its own future; the batch it joined is still scored
+        return await future
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._in_flight = 0
+            self._task = None
+        if self._task is None or self._task.done():
+            # Started in an empty context, so the task does not carry the request's stage timer
+            self._task = contextvars.Context().run(loop.create_task, self._run())
+
+    async def _collect(self):
+        """Wait for the first row, then gather more until full, idle or past the deadline and drained"""
+        items = [await self._queue.get()]
+        deadline = items[0][1] + self.max_wait
+        while len(items) < self.max_batch_size and len(items) < self._in_flight:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, rows that are already queued still join the batch
+                if remaining > 0:
+                    items.append(await asyncio.wait_for(self._queue.get(), remaining))
+                else:
+                    items.append(self._queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            dispatched = time.perf_counter()
+            # Rows whose caller gave up are dropped
+            live = [item for item in items if not item[2].done()]
+            waits = [dispatched - enqueued for _, enqueued, _ in live]
+            try:
+                if live:
+                    results = await self.predict_fn(np.vstack([row for row, _, _ in live]))
+                    predict_seconds = time.perf_counter() - dispatched
+                    for (_, _, future), result in zip(live, results):
+                        if not future.done():
+                            future.set_result((result, predict_seconds))
+            except Exception as e:
+                for _, _, future in live:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self._in_flight -= len(items)
+            if self.on_batch is not None and live:
+                try:
+                    self.on_batch(len(live), waits)
+                except Exception as e:
+                    logging.warning(f"Micro-batch callback failed: {str(e)}")
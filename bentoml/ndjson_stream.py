@@ -0,0 +1,103 @@
+import json
+import math
+from typing import AsyncIterator, Awaitable, Callable, List
+
+import numpy as np
+
+from schemas import FEATURE_NAMES
+
+MAX_LINE_BYTES = 64 * 1024
+
+
+def parse_record(line: bytes) -> list:
+    """Parse one NDJSON feature record into a feature row, raising ValueError if invalid"""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg}")
+    if not isinstance(record, dict):
+        raise ValueError("Record must be a JSON object")
+
+    row = []
+    for name in FEATURE_NAMES:
+        if name not in record:
+            raise ValueError(f"Missing feature: {name}")
+        value = record[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"Feature {name} must be a finite number")
+        row.append(float(value))
+    return row
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+    """Split a byte stream into (line_number, line) pairs without buffering more than one line.
+
+    Lines longer than MAX_LINE_BYTES are yielded as ``None`` so the caller can
+    report them instead of growing the buffer.
+    """
+    buffer = b""
+    line_number = 0
+    overlong = False
+    async for chunk in chunks:
+        # One split per chunk; the last piece is the unterminated start of the next line
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            yield line_number, None if overlong else line
+            overlong = False
+        if len(buffer) > MAX_LINE_BYTES:
+            buffer = b""
+            overlong = True
+    if buffer or overlong:
+        yield line_number + 1, None if overlong else buffer
+
+
+def encode_line(entry: dict) -> bytes:
+    return json.dumps(entry).encode() + b"\n"
+
+
+async def stream_predictions(chunks: AsyncIterator[bytes],
+                             score_chunk: Callable[[np.ndarray], Awaitable[List[str]]],
+                             chunk_rows: int = 1000) -> AsyncIterator[bytes]:
+    """Score NDJSON feature records in fixed-size chunks and yield NDJSON results in input order.
+
+    Each output line carries the input ``line`` number and either a
+    ``prediction`` or an ``error``; a bad record or a failed chunk only
+    produces error lines for the records concerned.
+    """
+    pending = []
+    rows = []
+
+    async def flush():
+        if rows:
+            try:
+                predictions = await score_chunk(np.array(rows, dtype=np.float64))
+                results = iter(predictions)
+                for entry in pending:
+                    if "error" not in entry:
+                        entry["prediction"] = next(results)
+            except Exception as e:
+                for entry in pending:
+                    entry.setdefault("error", str(e))
+        output = b"".join(encode_line(entry) for entry in pending)
+        pending.clear()
+        rows.clear()
+        return output
+
+    async for line_number, line in iter_lines(chunks):
+        if line is None:
+            pending.append({"line": line_number, "error": f"Line exceeds {MAX_LINE_BYTES} bytes"})
+            continue
+        if not line.strip():
+            continue
+        try:
+            rows.append(parse_record(line))
+            pending.append({"line": line_number})
+        except ValueError as e:
+            pending.append({"line": line_number, "error": str(e)})
+        if len(pending) >= chunk_rows:
+            yield await flush()
+
+    if pending:
+        yield await flush()
@@ -0,0 +1,108 @@
+import io
+import json
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schemas import FEATURE_NAMES
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+NPY = "application/x-npy"
+CSV = "text/csv"
+JSON_TYPE = "application/json"
+
+SUPPORTED_TYPES = [JSON_TYPE, ARROW_STREAM, ARROW_FILE, NPY, CSV]
+
+
+class UnsupportedFormat(ValueError):
+    """Raised for a content type the batch endpoints cannot decode or encode"""
+
+
+def media_type(header: str, default: str = JSON_TYPE) -> str:
+    """Normalize a Content-Type/Accept header to a supported media type"""
+    for candidate in (header or "").split(","):
+        candidate = candidate.split(";")[0].strip().lower()
+        if candidate in ("", "*/*"):
+            return default
+        if candidate == "application/octet-stream":
+            return NPY
+        if candidate in SUPPORTED_TYPES:
+            return candidate
+    raise UnsupportedFormat(f"Unsupported media type: {header}. Supported: {', '.join(SUPPORTED_TYPES)}")
+
+
+def _as_matrix(data: np.ndarray) -> np.ndarray:
+    data = np.ascontiguousarray(_as_floats(data))
+    if data.ndim != 2 or data.shape[1] != len(FEATURE_NAMES):
+        raise ValueError(f"Expected a (n, {len(FEATURE_NAMES)}) feature matrix, got shape {data.shape}")
+    # Rejected here as a client error; the model would fail on them and count against the circuit breaker
+    if not np.isfinite(data).all():
+        raise ValueError("Features must be finite numbers (no NaN, infinity or empty values)")
+    return data
+
+
+def _decode_arrow(body: bytes, content_type: str) -> np.ndarray:
+    import pyarrow as pa
+
+    reader = pa.ipc.open_stream(body) if content_type == ARROW_STREAM else pa.ipc.open_file(body)
+    table = reader.read_all()
+    missing = set(FEATURE_NAMES) - set(table.column_names)
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return np.column_stack([table.column(name).to_numpy() for name in FEATURE_NAMES])
+
+
+def _decode_json(body: bytes) -> np.ndarray:
+    payload = json.loads(body)
+    if isinstance(payload, dict) and "features" in payload:
+        payload = payload["features"]
+    if isinstance(payload, dict):
+        # Columnar JSON: {"sepal_length": [...], ...}
+        return np.column_stack([_as_floats(payload[name]) for name in FEATURE_NAMES])
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        raise ValueError("Expected a list of feature objects, {\"features\": [...]} or an object of feature columns")
+    return _as_floats([[row[name] for name in FEATURE_NAMES] for row in payload]).reshape(-1, len(FEATURE_NAMES))
+
+
+def _as_floats(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except TypeError as e:
+        raise ValueError(f"Features must be numbers: {e}")
+
+
+def decode_features(body: bytes, content_type: str) -> np.ndarray:
+    """Decode a request body straight into a float64 feature matrix"""
+    content_type = media_type(content_type)
+    if content_type in (ARROW_STREAM, ARROW_FILE):
+        data = _decode_arrow(body, content_type)
+    elif content_type == NPY:
+        data = np.load(io.BytesIO(body), allow_pickle=False)
+    elif content_type == CSV:
+        data = pd.read_csv(io.BytesIO(body), usecols=FEATURE_NAMES, dtype=np.float64)[FEATURE_NAMES].to_numpy()
+    else:
+        data = _decode_json(body)
+    return _as_matrix(data)
+
+
+def encode_predictions(predictions: List[str], accept: str) -> Tuple[bytes, str]:
+    """Encode predictions in the negotiated format, returning the body and its media type"""
+    accept = media_type(accept)
+    if accept in (ARROW_STREAM, ARROW_FILE):
+        import pyarrow as pa
+
+        table = pa.table({"prediction": pa.array(predictions, type=pa.string())})
+        sink = pa.BufferOutputStream()
+        writer = pa.ipc.new_stream(sink, table.schema) if accept == ARROW_STREAM else pa.ipc.new_file(sink, table.schema)
+        writer.write_table(table)
+        writer.close()
+        return sink.getvalue().to_pybytes(), accept
+    if accept == NPY:
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(predictions, dtype=np.str_), allow_pickle=False)
+        return buffer.getvalue(), accept
+    if accept == CSV:
+        return ("prediction\n" + "".join(f"{p}\n" for p in predictions)).encode(), accept
+    return json.dumps({"predictions": predictions, "count": len(predictions)}).encode(), accept
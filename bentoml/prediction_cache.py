@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class PredictionCache:
+    """Bounded LRU cache of predictions keyed on the feature tuple.
+
+    With ``precision`` set, features are rounded to that many decimals before
+    keying, so near-identical measurements share an entry. The cache lives in
+    the API worker process, so a deploy, which restarts the workers with the
+    new model, starts from an empty cache.
+    """
+
+    def __init__(self, max_size: int = 10000, precision: Optional[int] = None):
+        self.max_size = max(1, max_size)
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys_for(self, input_data: np.ndarray) -> List[tuple]:
+        """Build cache keys for every row of a feature matrix"""
+        if self.precision is not None:
+            input_data = np.round(input_data, self.precision)
+        return [tuple(row) for row in np.asarray(input_data, dtype=np.float64).tolist()]
+
+    def lookup(self, input_data: np.ndarray) -> Tuple[List[tuple], list, List[int]]:
+        """Return keys, cached predictions (None on miss) and the indices of the misses"""
+        keys = self.keys_for(input_data)
+        predictions = [None] * len(keys)
+        misses = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                prediction = self._entries.get(key)
+                if prediction is None:
+                    misses.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    predictions[i] = prediction
+        return keys, predictions, misses
+
+    def store(self, keys: List[tuple], predictions: list) -> int:
+        """Insert predictions and return how many entries were evicted"""
+        evicted = 0
+        with self._lock:
+            for key, prediction in zip(keys, predictions):
+                self._entries[key] = prediction
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
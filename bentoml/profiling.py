@@ -0,0 +1,234 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # psutil ships with bentoml; without it only this process is profiled
+    psutil = None
+
+# Sibling processes are asked to profile themselves with this signal
+PROFILE_SIGNAL = signal.SIGUSR2
+
+MODES = ("cpu", "alloc")
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this pod"""
+
+
+def frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    """Root-first ``a;b;c`` stack of a frame, one function per entry"""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval_seconds: float = 0.005) -> Counter:
+    """Count the collapsed Python stack of every other thread, sampled every ``interval_seconds``.
+
+    Sampling only reads ``sys._current_frames()``, so the profiled threads are
+    never paused beyond the GIL hand-off; the sampler thread itself is skipped.
+    """
+    counts = Counter()
+    own_thread = threading.get_ident()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_thread:
+                counts[f"{names.get(thread_id, thread_id)};{collapse_stack(frame)}"] += 1
+        time.sleep(interval_seconds)
+    return counts
+
+
+def trace_allocations(seconds: float, n_frames: int = 25) -> Counter:
+    """Bytes allocated and still alive after ``seconds``, per collapsed allocation traceback.
+
+    tracemalloc slows every allocation down while it runs, so it is only on for
+    the window; if it was already tracing it is left on afterwards.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(n_frames)
+    try:
+        # Drop the profiler's own allocations (snapshots, filter patterns) wherever they happen
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__, all_frames=True)]
+        before = tracemalloc.take_snapshot().filter_traces(ignore)
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    growth = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        if stat.size_diff > 0:
+            # tracemalloc tracebacks are already ordered oldest (root) frame first
+            growth[";".join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in stat.traceback)] += \
+                stat.size_diff
+    return growth
+
+
+def format_collapsed(counts: Counter, root: Optional[str] = None) -> str:
+    """Collapsed-stack text (``frame;frame;frame count`` per line) for flamegraph.pl or speedscope"""
+    prefix = f"{root};" if root else ""
+    return "".join(f"{prefix}{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def run_profile(mode: str, seconds: float, interval_seconds: float) -> Counter:
+    if mode == "cpu":
+        return sample_stacks(seconds, interval_seconds)
+    if mode == "alloc":
+        return trace_allocations(seconds)
+    raise ValueError(f"Unknown profiling mode: {mode}, expected one of {MODES}")
+
+
+class ProcessProfiler:
+    """Profiles this process and every sibling process that installed a profiler.
+
+    Nothing runs until a profile is requested: each process only registers its
+    pid in ``profile_dir`` and a signal handler. The requesting process writes
+    the request to ``profile_dir``, signals the registered siblings, profiles
+    itself for the same window and merges the collapsed stacks each sibling
+    writes back, with every stack rooted at the label of its process.
+    """
+
+    def __init__(self, profile_dir: str, label: str):
+        self.profile_dir = profile_dir
+        self.label = label
+        self.pid = os.getpid()
+
+    def install(self) -> bool:
+        """Register this process and handle profile requests from its siblings"""
+        try:
+            signal.signal(PROFILE_SIGNAL, self._on_signal)
+        except ValueError:  # not the main thread
+            logging.warning("Profiler signal handler not installed; this process will not be profiled")
+            return False
+        os.makedirs(os.path.join(self.profile_dir, "processes"), exist_ok=True)
+        registration = {"pid": self.pid, "label": self.label, "create_time": process_create_time(self.pid)}
+        write_json(os.path.join(self.profile_dir, "processes", f"{self.pid}.json"), registration)
+        return True
+
+    def siblings(self) -> List[Dict]:
+        """Registered processes other than this one that are still the process that registered"""
+        directory = os.path.join(self.profile_dir, "processes")
+        found = []
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            try:
+                with open(os.path.join(directory, name), "r") as f:
+                    registration = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if registration["pid"] == self.pid:
+                continue
+            # A recycled pid must not get the signal, whose default action terminates the process
+            if process_create_time(registration["pid"]) == registration["create_time"]:
+                found.append(registration)
+            else:
+                os.remove(os.path.join(directory, name))
+        return found
+
+    def profile_all(self, mode: str, seconds: float, interval_seconds: float = 0.005,
+                    grace_seconds: float = 5.0) -> Tuple[str, List[str], List[str]]:
+        """Profile every registered process for ``seconds``.
+
+        Returns the merged collapsed stacks, the labels of the processes that
+        answered and the labels of those that did not answer in time.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}, expected one of {MODES}")
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with open(os.path.join(self.profile_dir, "lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise ProfilerBusy("A profile is already running")
+
+            request_id = uuid.uuid4().hex
+            result_dir = os.path.join(self.profile_dir, "results", request_id)
+            os.makedirs(result_dir)
+            write_json(os.path.join(self.profile_dir, "request.json"), {
+                "id": request_id, "mode": mode, "seconds": seconds, "interval_seconds": interval_seconds})
+
+            signalled = []
+            for sibling in self.siblings():
+                try:
+                    os.kill(sibling["pid"], PROFILE_SIGNAL)
+                    signalled.append(sibling)
+                except ProcessLookupError:
+                    pass
+
+            parts = [format_collapsed(run_profile(mode, seconds, interval_seconds), self.label_root())]
+            answered, missing = [self.label_root()], []
+            deadline = time.time() + grace_seconds
+            for sibling in signalled:
+                path = os.path.join(result_dir, f"{sibling['pid']}.collapsed")
+                while not os.path.exists(path) and time.time() < deadline:
+                    time.sleep(0.05)
+                root = f"{sibling['label']}[{sibling['pid']}]"
+                if os.path.exists(path):
+                    with open(path, "r") as f:
+                        parts.append(f.read())
+                    answered.append(root)
+                else:
+                    missing.append(root)
+            shutil.rmtree(result_dir, ignore_errors=True)
+            return "".join(parts), answered, missing
+
+    def label_root(self) -> str:
+        return f"{self.label}[{self.pid}]"
+
+    def _on_signal(self, signum, frame):
+        # Keep the handler short: the profile runs on its own thread
+        threading.Thread(target=self._answer_request, name="profiler", daemon=True).start()
+
+    def _answer_request(self):
+        try:
+            with open(os.path.join(self.profile_dir, "request.json"), "r") as f:
+                request = json.load(f)
+            counts = run_profile(request["mode"], request["seconds"], request["interval_seconds"])
+            path = os.path.join(self.profile_dir, "results", request["id"], f"{self.pid}.collapsed")
+            with open(path + ".tmp", "w") as f:
+                f.write(format_collapsed(counts, self.label_root()))
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logging.error(f"Profile request failed: {str(e)}")
+
+
+def process_create_time(pid: int) -> Optional[float]:
+    """Creation time of a process, None if it is gone; tells a live process from a recycled pid"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).create_time()
+        except psutil.NoSuchProcess:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return float(f.read().rsplit(")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def write_json(path: str, data: dict):
+    """Write JSON atomically so readers never see a partial file"""
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
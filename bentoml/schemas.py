@@ -0,0 +1,22 @@
+from typing import List
+
+import numpy as np
+from pydantic import BaseModel
+
+FEATURE_NAMES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+
+class IrisFeatures(BaseModel):
+    sepal_length: float
+    sepal_width: float
+    petal_length: float
+    petal_width: float
+
+class IrisBatch(BaseModel):
+    features: List[IrisFeatures]
+
+def features_to_array(rows: List[IrisFeatures]) -> np.ndarray:
+    """Build one contiguous float matrix from parsed feature rows"""
+    data = np.empty((len(rows), len(FEATURE_NAMES)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        data[i] = (row.sepal_length, row.sepal_width, row.petal_length, row.petal_width)
+    return data
@@ -2,142 +2,677 @@ import bentoml
 import numpy as np
 import pandas as pd
 from bentoml.io import JSON, Text
-from pydantic import BaseModel
-from typing import List
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import hmac
 import logging
+import math
+import os
+import tempfile
 import time
 from prometheus_client import Counter, Histogram, Gauge
+from micro_batching import MicroBatcher
+from compiled_forest import CompiledForest
+from prediction_cache import PredictionCache
+from drift import DriftMonitor, load_baseline
+from admission import CircuitBreaker, ConcurrencyLimiter, Overloaded
+from schemas import FEATURE_NAMES, IrisBatch, IrisFeatures, features_to_array
+from payload_formats import UnsupportedFormat, decode_features, encode_predictions, media_type
+from ndjson_stream import stream_predictions
+from startup import Readiness, memory_usage, process_uptime
+from stage_timing import STAGE_BUCKETS, StageMetrics, add_stage_seconds, stage_seconds, timed, timed_async
+from profiling import MODES as PROFILE_MODES, ProcessProfiler, ProfilerBusy
+from shadow import ShadowScorer
+
+SERVICE_IMPORTED_AT = time.time()
 
 # Prometheus metrics
 PREDICTION_COUNTER = Counter('predictions_total', 'Total predictions made', ['model_version'])
 PREDICTION_LATENCY = Histogram('prediction_duration_seconds', 'Prediction latency')
-DRIFT_SCORE = Gauge('feature_drift_score', 'Feature drift detection score')
+BATCH_LATENCY = Histogram('batch_prediction_duration_seconds', 'Batch prediction latency', ['batch_size'])
+DRIFT_SCORE = Gauge('feature_drift_score', 'Feature drift detection score (max PSI over features)')
+DRIFT_PSI = Gauge('feature_drift_psi', 'Population stability index against the training baseline', ['feature'])
+DRIFT_KS = Gauge('feature_drift_ks', 'Binned KS statistic against the training baseline', ['feature'])
+DRIFT_WINDOW_ROWS = Gauge('feature_drift_window_rows', 'Rows in the drift sliding window')
 CIRCUIT_BREAKER = Gauge('circuit_breaker_open', 'Circuit breaker status')
+CIRCUIT_ERROR_RATE = Gauge('circuit_breaker_error_rate', 'Error rate over the circuit breaker window')
+REQUESTS_IN_FLIGHT = Gauge('requests_in_flight', 'Prediction requests currently being served')
+REQUESTS_QUEUED = Gauge('requests_queued', 'Prediction requests waiting for an in-flight slot')
+REQUESTS_SHED = Counter('requests_shed_total', 'Requests rejected by admission control or the circuit breaker',
+                        ['endpoint', 'reason'])
+CACHE_HITS = Counter('prediction_cache_hits_total', 'Predictions served from the cache')
+CACHE_MISSES = Counter('prediction_cache_misses_total', 'Predictions that had to be scored')
+CACHE_EVICTIONS = Counter('prediction_cache_evictions_total', 'Cache entries evicted by the LRU size cap')
+CACHE_SIZE = Gauge('prediction_cache_size', 'Entries currently in the prediction cache')
+MICRO_BATCH_SIZE = Histogram('micro_batch_size', 'Rows merged per adaptive batch',
+                             buckets=[1, 2, 4, 8, 16, 32, 64, 128])
+MICRO_BATCH_FILL = Histogram('micro_batch_fill_ratio', 'Adaptive batch size relative to the max batch size',
+                             buckets=[0.05, 0.1, 0.25, 0.5, 0.75, 1.0])
+MICRO_BATCH_QUEUE_WAIT = Histogram('micro_batch_queue_wait_seconds', 'Time a request waited to be batched',
+                                   buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05])
+WORKER_STARTUP_SECONDS = Gauge('worker_startup_seconds', 'Seconds from process start until the worker was ready', ['role'])
+WORKER_WARMUP_SECONDS = Gauge('worker_warmup_seconds', 'Seconds spent running the warmup batch', ['role'])
+WORKER_MEMORY_BYTES = Gauge('worker_memory_bytes', 'Memory per worker process (rss, and pss where available)',
+                            ['role', 'kind'])
+STAGE_LATENCY = Histogram('inference_stage_duration_seconds', 'Time spent in each stage of a scoring request',
+                          ['endpoint', 'stage', 'batch_size'], buckets=STAGE_BUCKETS)
+REQUEST_BATCH_SIZE = Histogram('request_batch_size', 'Rows per scoring request', ['endpoint'],
+                               buckets=[1, 10, 100, 1000, 10000, 100000])
+SHADOW_ROWS = Counter('shadow_rows_total', 'Rows scored by the challenger, by agreement with the champion',
+                      ['agreement'])
+SHADOW_LATENCY = Histogram('shadow_model_duration_seconds', 'Scoring time of shadowed requests per model',
+                           ['model'], buckets=STAGE_BUCKETS)
+SHADOW_DROPPED = Counter('shadow_requests_dropped_total', 'Sampled requests dropped because the shadow queue was full')
+SHADOW_ERRORS = Counter('shadow_errors_total', 'Shadowed requests the challenger failed to score')
+
+# Adaptive batching: concurrent predict_single requests share one transform+predict call
+ADAPTIVE_BATCHING = os.environ.get("IRIS_ADAPTIVE_BATCHING", "false").lower() == "true"
+ADAPTIVE_MAX_BATCH_SIZE = int(os.environ.get("IRIS_ADAPTIVE_MAX_BATCH_SIZE", "32"))
+ADAPTIVE_MAX_WAIT_MS = float(os.environ.get("IRIS_ADAPTIVE_MAX_WAIT_MS", "5"))
+
+# Admission control: requests beyond IRIS_MAX_IN_FLIGHT wait in a bounded queue and are
+# rejected with 429 once it is full or the expected wait exceeds IRIS_QUEUE_DEADLINE_MS.
+# A predict_single holds its slot while it waits in the micro-batcher, so with adaptive batching
+# the default cap is one full batch; a lower cap would keep batches from ever filling
+MAX_IN_FLIGHT = int(os.environ.get("IRIS_MAX_IN_FLIGHT", str(ADAPTIVE_MAX_BATCH_SIZE if ADAPTIVE_BATCHING else 4)))
+MAX_QUEUE = int(os.environ.get("IRIS_MAX_QUEUE", "16"))
+QUEUE_DEADLINE_MS = float(os.environ.get("IRIS_QUEUE_DEADLINE_MS", "1000"))
+
+# Circuit breaker: opens when the error rate over the sliding window crosses the threshold
+BREAKER_WINDOW_SECONDS = float(os.environ.get("IRIS_BREAKER_WINDOW_SECONDS", "30"))
+BREAKER_MIN_REQUESTS = int(os.environ.get("IRIS_BREAKER_MIN_REQUESTS", "10"))
+BREAKER_ERROR_RATE = float(os.environ.get("IRIS_BREAKER_ERROR_RATE", "0.5"))
+RECOVERY_TIMEOUT = float(os.environ.get("IRIS_BREAKER_RECOVERY_SECONDS", "60"))
+
+# Batch settings: large batches are scored in fixed-size chunks, one scaler and one model call per chunk,
+# with up to IRIS_MAX_CONCURRENT_CHUNKS chunks of one request awaiting the runners at once
+MAX_BATCH_SIZE = int(os.environ.get("IRIS_MAX_BATCH_SIZE", "1000"))
+MAX_CONCURRENT_CHUNKS = max(1, int(os.environ.get("IRIS_MAX_CONCURRENT_CHUNKS", "4")))
+
+# CPU-bound steps (array build, drift update) on more rows than this leave the event loop for the threadpool
+OFFLOAD_ROWS = int(os.environ.get("IRIS_OFFLOAD_ROWS", "1000"))
+BATCH_SIZE_BUCKETS = [1, 10, 100, 1000, 10000]
+
+# Streaming scoring: NDJSON records are scored IRIS_STREAM_CHUNK_ROWS at a time
+STREAM_CHUNK_ROWS = int(os.environ.get("IRIS_STREAM_CHUNK_ROWS", "1000"))
+
+# Model layout: "fused" serves the scaler+classifier pipeline from one runner,
+# "split" serves the legacy iris_classifier/iris_scaler pair (kept for rollback)
+MODEL_LAYOUT = os.environ.get("IRIS_MODEL_LAYOUT", "fused").lower()
+
+# Inference engine: "sklearn" runs the estimators, "compiled" runs the array-backed CompiledForest
+INFERENCE_ENGINE = os.environ.get("IRIS_INFERENCE_ENGINE", "sklearn").lower()
+
+# Cold start: compiled forest arrays are memory-mapped so runner workers share their pages,
+# and each worker scores IRIS_WARMUP_ROWS rows through the full path before /health reports ready
+MMAP_ARTIFACTS = os.environ.get("IRIS_MMAP_ARTIFACTS", "true").lower() == "true"
+WARMUP_ROWS = int(os.environ.get("IRIS_WARMUP_ROWS", "64"))
+WARMUP_MAX_ATTEMPTS = int(os.environ.get("IRIS_WARMUP_MAX_ATTEMPTS", "30"))
+
+# Prediction cache: IRIS_CACHE_SIZE=0 disables it, IRIS_CACHE_PRECISION rounds features before keying
+CACHE_MAX_SIZE = int(os.environ.get("IRIS_CACHE_SIZE", "10000"))
+CACHE_PRECISION = os.environ.get("IRIS_CACHE_PRECISION")
+
+# Drift monitoring: sliding window of IRIS_DRIFT_WINDOW_SLOTS x IRIS_DRIFT_SLOT_SECONDS, scored on a timer
+DRIFT_BASELINE_PATH = os.environ.get("IRIS_DRIFT_BASELINE", "models/drift_baseline.json")
+DRIFT_WINDOW_SLOTS = int(os.environ.get("IRIS_DRIFT_WINDOW_SLOTS", "12"))
+DRIFT_SLOT_SECONDS = float(os.environ.get("IRIS_DRIFT_SLOT_SECONDS", "5"))
+DRIFT_INTERVAL_SECONDS = float(os.environ.get("IRIS_DRIFT_INTERVAL_SECONDS", "15"))
+
+# Profiling: off by default. When on, every API and runner process registers a signal handler,
+# and GET /debug/profile (X-Profiling-Token must match IRIS_PROFILING_TOKEN) samples them all
+PROFILING_ENABLED = os.environ.get("IRIS_PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.environ.get("IRIS_PROFILING_TOKEN", "")
+PROFILING_MAX_SECONDS = float(os.environ.get("IRIS_PROFILING_MAX_SECONDS", "60"))
+PROFILING_DIR = os.environ.get("IRIS_PROFILING_DIR", os.path.join(tempfile.gettempdir(), "iris-profiling"))
+
+# Shadow scoring: IRIS_CHALLENGER_MODEL (a BentoML sklearn pipeline tag, unset disables it) scores a sampled
+# IRIS_SHADOW_SAMPLE_RATE of requests in the background; sampled requests beyond IRIS_SHADOW_QUEUE_SIZE are dropped
+CHALLENGER_MODEL = os.environ.get("IRIS_CHALLENGER_MODEL", "")
+SHADOW_SAMPLE_RATE = float(os.environ.get("IRIS_SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_QUEUE_SIZE = int(os.environ.get("IRIS_SHADOW_QUEUE_SIZE", "100"))
+SHADOW_WORKERS = int(os.environ.get("IRIS_SHADOW_WORKERS", "2"))
 
-# Circuit breaker state
-circuit_state = {"failures": 0, "last_failure": 0, "is_open": False}
-MAX_FAILURES = 3
-RECOVERY_TIMEOUT = 60
+class CompiledForestRunnable(bentoml.Runnable):
+    """Runnable serving the array-backed CompiledForest (scaling included)"""
+    SUPPORTED_RESOURCES = ("cpu",)
+    SUPPORTS_CPU_MULTI_THREADING = False
 
-class IrisFeatures(BaseModel):
-    sepal_length: float
-    sepal_width: float
-    petal_length: float
-    petal_width: float
+    def __init__(self, model_path: str, mmap_mode: str = None):
+        start_time = time.perf_counter()
+        self.engine = CompiledForest.load(model_path, mmap_mode=mmap_mode)
+        
+        # Fault the mapped pages in now rather than on the first request
+        if WARMUP_ROWS > 0:
+            self.engine.predict(warmup_matrix(WARMUP_ROWS))
+        WORKER_WARMUP_SECONDS.labels(role="runner").set(time.perf_counter() - start_time)
+        WORKER_STARTUP_SECONDS.labels(role="runner").set(process_uptime(SERVICE_IMPORTED_AT))
+        record_memory("runner")
+
+    @bentoml.Runnable.method(batchable=False)
+    def predict(self, input_data: np.ndarray) -> np.ndarray:
+        return self.engine.predict(input_data)
 
-class IrisBatch(BaseModel):
-    features: List[IrisFeatures]
+def process_label() -> str:
+    """Name of this BentoML process (API server or runner worker) for profile output"""
+    from bentoml._internal.context import component_context
+    if component_context.component_type == "runner":
+        return f"runner:{component_context.component_name}#{component_context.component_index}"
+    return f"api_server#{component_context.component_index or 0}"
+
+# Runner workers import this module too, so each of them registers for profiling here
+profiler = ProcessProfiler(PROFILING_DIR, process_label())
+if PROFILING_ENABLED:
+    profiler.install()
+
+def load_runners(layout: str, engine: str) -> dict:
+    """Create runners for the requested engine and model layout, falling back to the split layout"""
+    if engine == "compiled":
+        bento_model = bentoml.models.get("iris_compiled_forest:latest")
+        runner = bentoml.Runner(
+            CompiledForestRunnable,
+            name="iris_compiled_forest",
+            runnable_init_params={"model_path": bento_model.path, "mmap_mode": "r" if MMAP_ARTIFACTS else None},
+            models=[bento_model],
+        )
+        return {"pipeline": runner}
+    if layout == "fused":
+        try:
+            return {"pipeline": bentoml.sklearn.get("iris_pipeline:latest").to_runner()}
+        except bentoml.exceptions.NotFound:
+            logging.warning("iris_pipeline not found in BentoML store, falling back to split layout")
+    return {
+        "model": bentoml.sklearn.get("iris_classifier:latest").to_runner(),
+        "scaler": bentoml.sklearn.get("iris_scaler:latest").to_runner(),
+    }
 
 # Load model and scaler from BentoML store
-model_runner = bentoml.sklearn.get("iris_classifier:latest").to_runner()
-scaler_runner = bentoml.sklearn.get("iris_scaler:latest").to_runner()
+runners = load_runners(MODEL_LAYOUT, INFERENCE_ENGINE)
+pipeline_runner = runners.get("pipeline")
+model_runner = runners.get("model")
+scaler_runner = runners.get("scaler")
+
+# The challenger gets its own runner so it never shares runner workers with the champion
+challenger_runner = bentoml.sklearn.get(CHALLENGER_MODEL).to_runner(name="iris_challenger") \
+    if CHALLENGER_MODEL else None
+
+prediction_cache = PredictionCache(
+    max_size=CACHE_MAX_SIZE,
+    precision=int(CACHE_PRECISION) if CACHE_PRECISION else None,
+) if CACHE_MAX_SIZE > 0 else None
+
+def load_drift_monitor():
+    """Create the drift monitor from the training baseline, if one was shipped"""
+    if not os.path.exists(DRIFT_BASELINE_PATH):
+        logging.warning(f"Drift baseline not found at {DRIFT_BASELINE_PATH}, drift monitoring disabled")
+        return None
+    return DriftMonitor(
+        load_baseline(DRIFT_BASELINE_PATH),
+        FEATURE_NAMES,
+        n_slots=DRIFT_WINDOW_SLOTS,
+        slot_seconds=DRIFT_SLOT_SECONDS,
+    )
+
+drift_monitor = load_drift_monitor()
+
+def record_admission(in_flight: int, queued: int):
+    """Export in-flight and queued request counts"""
+    REQUESTS_IN_FLIGHT.set(in_flight)
+    REQUESTS_QUEUED.set(queued)
+
+admission = ConcurrencyLimiter(
+    max_in_flight=MAX_IN_FLIGHT,
+    max_queue=MAX_QUEUE,
+    deadline_seconds=QUEUE_DEADLINE_MS / 1000,
+    on_change=record_admission,
+)
+
+circuit_breaker = CircuitBreaker(
+    window_seconds=BREAKER_WINDOW_SECONDS,
+    min_requests=BREAKER_MIN_REQUESTS,
+    error_rate_threshold=BREAKER_ERROR_RATE,
+    recovery_timeout=RECOVERY_TIMEOUT,
+)
 
 # Create service
-iris_service = bentoml.Service("iris_classifier", runners=[model_runner, scaler_runner])
+iris_service = bentoml.Service(
+    "iris_classifier",
+    runners=list(runners.values()) + ([challenger_runner] if challenger_runner is not None else []),
+)
+
+# Per-stage timing (parse, drift, scale, predict, serialize), exported off the request path. BentoML's
+# IO descriptors decode and encode the predict_single/predict_batch bodies outside the handler, so only
+# /v1/predict_batch times the full decode ("parse") and encode ("serialize")
+# (batch_size_bucket is defined further down, hence the lambda)
+stage_metrics = StageMetrics(STAGE_LATENCY, REQUEST_BATCH_SIZE, lambda size: batch_size_bucket(size))
+
+def score_matrix(input_data: np.ndarray) -> np.ndarray:
+    """Scale and predict a feature matrix with one blocking call per runner (warmup, from a threadpool thread)"""
+    if pipeline_runner is not None:
+        return pipeline_runner.predict.run(input_data)
+    scaled_data = scaler_runner.transform.run(input_data)
+    return model_runner.predict.run(scaled_data)
+
+async def score_rows(input_data: np.ndarray) -> list:
+    """Scale and predict a feature matrix with one awaited call per runner"""
+    if pipeline_runner is not None:
+        # Scaling happens inside the fused pipeline, so it is timed as part of predict
+        predictions = await timed_async("predict", pipeline_runner.predict.async_run, input_data)
+    else:
+        scaled_data = await timed_async("scale", scaler_runner.transform.async_run, input_data)
+        predictions = await timed_async("predict", model_runner.predict.async_run, scaled_data)
+    return predictions.tolist()
+
+async def score_challenger(input_data: np.ndarray) -> list:
+    """Score a shadowed request with the challenger, one awaited runner call per chunk"""
+    predictions = []
+    for chunk in iter_chunks(input_data, MAX_BATCH_SIZE):
+        predictions.extend((await challenger_runner.predict.async_run(chunk)).tolist())
+    return predictions
+
+def record_shadow(agreed: int, rows: int, champion_seconds: Optional[float], challenger_seconds: float):
+    """Export agreement and both models' scoring time for one shadowed request"""
+    SHADOW_ROWS.labels(agreement="agree").inc(agreed)
+    SHADOW_ROWS.labels(agreement="disagree").inc(rows - agreed)
+    if champion_seconds is not None:
+        SHADOW_LATENCY.labels(model="champion").observe(champion_seconds)
+        SHADOW_LATENCY.labels(model="challenger").observe(challenger_seconds)
+
+shadow_scorer = ShadowScorer(
+    score_challenger,
+    sample_rate=SHADOW_SAMPLE_RATE,
+    max_queue=SHADOW_QUEUE_SIZE,
+    workers=SHADOW_WORKERS,
+    on_result=record_shadow,
+    on_drop=SHADOW_DROPPED.inc,
+    on_error=SHADOW_ERRORS.inc,
+) if challenger_runner is not None else None
+
+def record_micro_batch(size: int, waits: List[float]):
+    """Export fill and queue wait for one adaptive batch"""
+    MICRO_BATCH_SIZE.observe(size)
+    MICRO_BATCH_FILL.observe(size / ADAPTIVE_MAX_BATCH_SIZE)
+    for wait in waits:
+        MICRO_BATCH_QUEUE_WAIT.observe(wait)
+
+if ADAPTIVE_BATCHING and MAX_IN_FLIGHT < ADAPTIVE_MAX_BATCH_SIZE:
+    logging.warning(f"IRIS_MAX_IN_FLIGHT={MAX_IN_FLIGHT} caps adaptive batches below "
+                    f"IRIS_ADAPTIVE_MAX_BATCH_SIZE={ADAPTIVE_MAX_BATCH_SIZE}")
+
+single_batcher = MicroBatcher(
+    score_rows,
+    max_batch_size=ADAPTIVE_MAX_BATCH_SIZE,
+    max_wait_ms=ADAPTIVE_MAX_WAIT_MS,
+    on_batch=record_micro_batch,
+)
+
+async def score_single(input_data: np.ndarray) -> list:
+    """Score one row, merged with concurrent requests when batching is on"""
+    if ADAPTIVE_BATCHING:
+        # Only the batch's runner call counts as predict, as for unbatched requests; the wait
+        # for the batch to fill is exported as micro_batch_queue_wait_seconds
+        prediction, predict_seconds = await single_batcher.submit(input_data[0])
+        add_stage_seconds("predict", predict_seconds)
+        return [prediction]
+    return await score_rows(input_data)
+
+async def predict_cached(input_data: np.ndarray,
+                         scorer: Callable[[np.ndarray], Awaitable[list]]) -> Tuple[list, int]:
+    """Serve rows from the prediction cache and score only the misses; returns the predictions and the cache hits"""
+    if prediction_cache is None:
+        return list(await scorer(input_data)), 0
+    
+    keys, predictions, misses = timed("cache", prediction_cache.lookup, input_data)
+    CACHE_HITS.inc(len(keys) - len(misses))
+    CACHE_MISSES.inc(len(misses))
+    
+    if misses:
+        # Repeated rows within a request are scored once
+        pending = {}
+        for i in misses:
+            pending.setdefault(keys[i], []).append(i)
+        scored = list(await scorer(input_data[[rows[0] for rows in pending.values()]]))
+        for rows, prediction in zip(pending.values(), scored):
+            for i in rows:
+                predictions[i] = prediction
+        CACHE_EVICTIONS.inc(timed("cache", prediction_cache.store, list(pending), scored))
+    
+    CACHE_SIZE.set(len(prediction_cache))
+    return predictions, len(keys) - len(misses)
+
+class Rejected(Exception):
+    """Request refused by admission control or the circuit breaker"""
+    def __init__(self, status_code: int, retry_after: float, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.message = message
+
+async def guarded_call(endpoint: str, fn: Callable[[], Awaitable]):
+    """Await fn() under admission control and the circuit breaker, raising Rejected when refused"""
+    try:
+        async with admission.admit_async():
+            # Circuit breaker check
+            ticket = circuit_breaker.allow()
+            if not ticket:
+                REQUESTS_SHED.labels(endpoint=endpoint, reason="circuit_open").inc()
+                raise Rejected(503, circuit_breaker.retry_after(), "Service temporarily unavailable")
+            
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # The client went away; that says nothing about the service's health
+                circuit_breaker.abandon(ticket)
+                raise
+            except Exception:
+                record_outcome(False, ticket)
+                raise
+            
+            record_outcome(True, ticket)
+            return result
+    except Overloaded as e:
+        REQUESTS_SHED.labels(endpoint=endpoint, reason=e.reason).inc()
+        raise Rejected(429, e.retry_after, "Service overloaded, retry later")
+
+async def off_loop(stage: str, fn: Callable, input_data):
+    """Run a CPU-bound stage inline for small inputs and in the threadpool for large ones"""
+    if len(input_data) > OFFLOAD_ROWS:
+        return await run_in_threadpool(timed, stage, fn, input_data)
+    return timed(stage, fn, input_data)
+
+async def score_features(input_data: np.ndarray) -> list:
+    """Score a feature matrix in concurrent chunks while its rows go into the drift window"""
+    chunk_slots = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+    
+    async def score_chunk(chunk: np.ndarray) -> Tuple[list, int]:
+        async with chunk_slots:
+            return await predict_cached(chunk, score_rows)
+    
+    # One transform and one predict per chunk; the chunks are started first so their
+    # runner calls are already in flight while the drift window is updated
+    results = await asyncio.gather(
+        *[score_chunk(chunk) for chunk in iter_chunks(input_data, MAX_BATCH_SIZE)],
+        off_loop("drift", track_drift, input_data),
+    )
+    predictions = [prediction for chunk_predictions, _ in results[:-1] for prediction in chunk_predictions]
+    shadow(input_data, predictions, sum(cache_hits for _, cache_hits in results[:-1]))
+    return predictions
+
+async def predict_one(features: IrisFeatures):
+    """Score one parsed request"""
+    # Prepare input data
+    input_data = timed("parse", features_to_array, [features])
+    
+    # Scale features and make prediction, unless the prediction is cached, while drift is tracked
+    (predictions, cache_hits), _ = await asyncio.gather(
+        predict_cached(input_data, score_single),
+        off_loop("drift", track_drift, input_data),
+    )
+    shadow(input_data, predictions, cache_hits)
+    return predictions[0]
+
+def shadow(input_data: np.ndarray, predictions: list, cache_hits: int):
+    """Hand a sample of scored requests to the challenger without waiting for it"""
+    if shadow_scorer is not None:
+        # The champion is timed by its runner calls only, like the challenger. A request partly
+        # served from the cache ran fewer rows through the champion, so its latency is not compared
+        champion_seconds = None if cache_hits else stage_seconds("scale", "predict")
+        shadow_scorer.offer(input_data, predictions, champion_seconds)
 
 @iris_service.api(input=JSON(pydantic_model=IrisFeatures), output=Text())
-def predict_single(features: IrisFeatures) -> str:
-    """Single prediction with circuit breaker and monitoring"""
+async def predict_single(features: IrisFeatures, ctx: bentoml.Context) -> str:
+    """Single prediction with admission control, circuit breaker and monitoring"""
     start_time = time.time()
+    timer = stage_metrics.start()
     
     try:
-        # Circuit breaker check
-        if is_circuit_open():
-            CIRCUIT_BREAKER.set(1)
-            return "Service temporarily unavailable"
-        
-        # Feature drift detection
-        drift_score = calculate_drift(features)
-        DRIFT_SCORE.set(drift_score)
-        
-        # Prepare input data
-        input_data = np.array([[
-            features.sepal_length, features.sepal_width,
-            features.petal_length, features.petal_width
-        ]])
-        
-        # Scale features
-        scaled_data = scaler_runner.transform.run(input_data)
-        
-        # Make prediction
-        result = model_runner.predict.run(scaled_data)
-        
-        # Success - reset circuit breaker
-        circuit_state["failures"] = 0
-        CIRCUIT_BREAKER.set(0)
-        
-        # Record metrics
-        PREDICTION_COUNTER.labels(model_version="v1.0").inc()
-        PREDICTION_LATENCY.observe(time.time() - start_time)
-        
-        return f"Predicted species: {result[0]}"
-        
+        prediction = await guarded_call("predict_single", lambda: predict_one(features))
+    except Rejected as e:
+        reject(ctx, e)
+        return e.message
     except Exception as e:
-        handle_failure()
         logging.error(f"Prediction failed: {str(e)}")
         return "Prediction failed"
+    
+    # Record metrics
+    PREDICTION_COUNTER.labels(model_version="v1.0").inc()
+    PREDICTION_LATENCY.observe(time.time() - start_time)
+    stage_metrics.finish(timer, "predict_single", 1)
+    
+    return f"Predicted species: {prediction}"
 
 @iris_service.api(input=JSON(pydantic_model=IrisBatch), output=JSON())
-def predict_batch(batch: IrisBatch) -> dict:
+async def predict_batch(batch: IrisBatch, ctx: bentoml.Context) -> dict:
     """Batch prediction"""
     start_time = time.time()
+    timer = stage_metrics.start()
     
     try:
-        if is_circuit_open():
-            return {"error": "Service temporarily unavailable"}
-            
-        predictions = []
-        for features in batch.features:
-            input_data = np.array([[
-                features.sepal_length, features.sepal_width,
-                features.petal_length, features.petal_width
-            ]])
-            scaled_data = scaler_runner.transform.run(input_data)
-            result = model_runner.predict.run(scaled_data)
-            predictions.append(result[0])
-        
-        PREDICTION_COUNTER.labels(model_version="v1.0").inc(len(predictions))
-        PREDICTION_LATENCY.observe(time.time() - start_time)
-        
-        return {"predictions": predictions, "count": len(predictions)}
-        
+        input_data = await off_loop("parse", features_to_array, batch.features)
+        predictions = await guarded_call("predict_batch", lambda: score_features(input_data))
+    except Rejected as e:
+        reject(ctx, e)
+        return {"error": e.message}
     except Exception as e:
-        handle_failure()
         return {"error": str(e)}
 
+    PREDICTION_COUNTER.labels(model_version="v1.0").inc(len(predictions))
+    BATCH_LATENCY.labels(batch_size=batch_size_bucket(len(predictions))).observe(time.time() - start_time)
+    stage_metrics.finish(timer, "predict_batch", len(predictions))
+
+    return {"predictions": predictions, "count": len(predictions)}
+
 @iris_service.api(input=JSON(), output=JSON())
-def health(empty_input: dict = {}) -> dict:
-    """Health check endpoint"""
+async def health(empty_input: dict = {}, ctx: bentoml.Context = None) -> dict:
+    """Readiness check: 503 until this worker has finished its warmup batch"""
+    if not readiness.ready and ctx is not None:
+        ctx.response.status_code = 503
+    return health_status()
+
+def health_status() -> dict:
+    """Readiness, warmup and load state of this worker"""
+    record_memory("api")
     return {
-        "status": "healthy",
-        "model_loaded": True,
-        "circuit_breaker": "open" if is_circuit_open() else "closed"
+        "status": "healthy" if readiness.ready else readiness.state,
+        "model_loaded": readiness.ready,
+        "warmup_seconds": readiness.warmup_seconds,
+        "warmup_error": readiness.last_error,
+        "circuit_breaker": circuit_breaker.state,
+        "in_flight": admission.in_flight,
+        "queued": admission.queued
     }
 
-def is_circuit_open():
-    """Check if circuit breaker is open"""
-    if circuit_state["failures"] >= MAX_FAILURES:
-        if time.time() - circuit_state["last_failure"] < RECOVERY_TIMEOUT:
-            return True
-        else:
-            circuit_state["failures"] = 0
-            return False
-    return False
-
-def handle_failure():
-    """Handle service failure for circuit breaker"""
-    circuit_state["failures"] += 1
-    circuit_state["last_failure"] = time.time()
-    if circuit_state["failures"] >= MAX_FAILURES:
-        CIRCUIT_BREAKER.set(1)
-
-def calculate_drift(features: IrisFeatures):
-    """Simple drift detection"""
-    baseline = {"sepal_length": 5.8, "sepal_width": 3.0, "petal_length": 3.7, "petal_width": 1.2}
-    
-    drift_score = (abs(features.sepal_length - baseline["sepal_length"]) + 
-                  abs(features.sepal_width - baseline["sepal_width"]) + 
-                  abs(features.petal_length - baseline["petal_length"]) + 
-                  abs(features.petal_width - baseline["petal_width"])) / 4
-    
-    return drift_score
+readiness = Readiness()
+warmup_task = None
+
+@iris_service.on_startup
+async def start_warmup(ctx: bentoml.Context):
+    """Warm up in the background so /health can answer while the runners come up"""
+    global warmup_task
+    warmup_task = asyncio.get_running_loop().create_task(run_in_threadpool(finish_startup))
+
+def finish_startup():
+    """Run the warmup batch, then export startup time and memory for this worker"""
+    try:
+        warmup_seconds = readiness.run(warm_up, max_attempts=WARMUP_MAX_ATTEMPTS)
+    except Exception:
+        # Readiness has logged the error; /v1/health reports it with "status": "failed"
+        return
+    WORKER_WARMUP_SECONDS.labels(role="api").set(warmup_seconds)
+    WORKER_STARTUP_SECONDS.labels(role="api").set(process_uptime(SERVICE_IMPORTED_AT))
+    record_memory("api")
+    logging.info(f"Worker ready after {process_uptime(SERVICE_IMPORTED_AT):.2f}s (warmup {warmup_seconds:.3f}s)")
+
+def warm_up():
+    """Score a warmup batch through parsing, the runners and encoding, bypassing cache, drift and breaker"""
+    if WARMUP_ROWS <= 0:
+        return
+    batch = IrisBatch(features=[dict(zip(FEATURE_NAMES, row)) for row in warmup_matrix(WARMUP_ROWS).tolist()])
+    input_data = features_to_array(batch.features)
+    predictions = []
+    for chunk in iter_chunks(input_data, MAX_BATCH_SIZE):
+        predictions.extend(score_matrix(chunk).tolist())
+    if ADAPTIVE_BATCHING:
+        # Through the event loop, the way requests reach the batcher
+        from_thread.run(single_batcher.submit, input_data[0])
+    else:
+        score_matrix(input_data[:1])
+    encode_predictions(predictions, "application/json")
+
+# Columnar batch scoring: Content-Type picks the request format, Accept picks the response format
+# (JSON, Arrow IPC, .npy or CSV), decoded straight into a NumPy matrix without per-row objects
+columnar_app = FastAPI(title="iris columnar scoring")
+
+@columnar_app.post("/predict_batch")
+async def predict_batch_columnar(request: Request) -> Response:
+    """Content-negotiated batch prediction"""
+    start_time = time.time()
+    timer = stage_metrics.start()
+    body = await request.body()
+    
+    try:
+        response_type = media_type(request.headers.get("accept", ""))
+    except UnsupportedFormat as e:
+        return Response(str(e), status_code=406)
+    
+    try:
+        input_data = timed("parse", decode_features, body, request.headers.get("content-type", ""))
+    except UnsupportedFormat as e:
+        return Response(str(e), status_code=415)
+    except (ValueError, KeyError) as e:
+        return Response(f"Invalid payload: {str(e)}", status_code=400)
+    
+    try:
+        predictions = await guarded_call("predict_batch_columnar", lambda: score_features(input_data))
+        content, response_type = timed("serialize", encode_predictions, predictions, response_type)
+    except Rejected as e:
+        return Response(e.message, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logging.error(f"Columnar prediction failed: {str(e)}")
+        return Response("Prediction failed", status_code=500)
+    
+    PREDICTION_COUNTER.labels(model_version="v1.0").inc(len(predictions))
+    BATCH_LATENCY.labels(batch_size=batch_size_bucket(len(predictions))).observe(time.time() - start_time)
+    stage_metrics.finish(timer, "predict_batch_columnar", len(predictions))
+    
+    return Response(content, media_type=response_type)
+
+class RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body iterator reads the request body while responding.
+
+    The stock response listens for client disconnects by consuming ``receive``,
+    which would swallow the request body chunks the iterator is waiting for.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@columnar_app.post("/predict_stream")
+async def predict_stream(request: Request) -> StreamingResponse:
+    """Score newline-delimited feature records, streaming NDJSON predictions back per chunk"""
+    async def score_chunk(input_data: np.ndarray) -> list:
+        start_time = time.time()
+        timer = stage_metrics.start()
+        predictions = await guarded_call("predict_stream", lambda: score_features(input_data))
+        PREDICTION_COUNTER.labels(model_version="v1.0").inc(len(predictions))
+        BATCH_LATENCY.labels(batch_size=batch_size_bucket(len(predictions))).observe(time.time() - start_time)
+        stage_metrics.finish(timer, "predict_stream", len(predictions))
+        return predictions
+    
+    return RequestStreamingResponse(
+        stream_predictions(request.stream(), score_chunk, STREAM_CHUNK_ROWS),
+        media_type="application/x-ndjson",
+    )
+
+@columnar_app.get("/health")
+async def health_probe() -> Response:
+    """GET readiness probe for Kubernetes (the BentoML /health API only accepts POST)"""
+    return JSONResponse(health_status(), status_code=200 if readiness.ready else 503)
+
+iris_service.mount_asgi_app(columnar_app, path="/v1")
+
+# On-demand profiling, only mounted when IRIS_PROFILING_ENABLED is set
+debug_app = FastAPI(title="iris debug")
+
+@debug_app.get("/profile")
+async def profile(request: Request, seconds: float = 10, mode: str = "cpu", interval_ms: float = 5) -> Response:
+    """Profile every API and runner process and return collapsed stacks for a flame graph.
+
+    ``mode=cpu`` counts sampled stacks; ``mode=alloc`` reports bytes allocated
+    during the window and still alive at its end, per allocation traceback.
+    """
+    token = request.headers.get("x-profiling-token", "")
+    if not PROFILING_TOKEN or not hmac.compare_digest(token, PROFILING_TOKEN):
+        return Response("Forbidden", status_code=403)
+    if mode not in PROFILE_MODES:
+        return Response(f"Unknown mode: {mode}, expected one of {PROFILE_MODES}", status_code=400)
+    if not 0 < seconds <= PROFILING_MAX_SECONDS:
+        return Response(f"seconds must be in (0, {PROFILING_MAX_SECONDS:g}]", status_code=400)
+    
+    try:
+        stacks, answered, missing = await run_in_threadpool(
+            profiler.profile_all, mode, seconds, max(interval_ms, 1) / 1000
+        )
+    except ProfilerBusy as e:
+        return Response(str(e), status_code=409)
+    
+    return Response(stacks, media_type="text/plain", headers={
+        "X-Profiled-Processes": ",".join(answered),
+        "X-Profile-Missing": ",".join(missing),
+    })
+
+if PROFILING_ENABLED:
+    iris_service.mount_asgi_app(debug_app, path="/debug")
+
+def reject(ctx: bentoml.Context, rejected: Rejected):
+    """Fail fast with a Retry-After hint instead of queueing"""
+    ctx.response.status_code = rejected.status_code
+    ctx.response.headers["Retry-After"] = str(rejected.retry_after)
+
+def warmup_matrix(n_rows: int) -> np.ndarray:
+    """Deterministic rows spread over the iris feature ranges"""
+    rng = np.random.default_rng(0)
+    return np.round(rng.uniform([4.3, 2.0, 1.0, 0.1], [7.9, 4.4, 6.9, 2.5], size=(n_rows, len(FEATURE_NAMES))), 1)
+
+def record_memory(role: str):
+    """Export this worker's resident (and proportional) memory"""
+    for kind, value in memory_usage().items():
+        WORKER_MEMORY_BYTES.labels(role=role, kind=kind).set(value)
+
+def record_outcome(success: bool, ticket: Optional[int] = None):
+    """Feed a request outcome to the circuit breaker and export its state"""
+    circuit_breaker.record(success, ticket)
+    CIRCUIT_BREAKER.set(1 if circuit_breaker.state == CircuitBreaker.OPEN else 0)
+    CIRCUIT_ERROR_RATE.set(circuit_breaker.error_rate())
+
+def iter_chunks(data: np.ndarray, chunk_size: int):
+    """Yield fixed-size row chunks of a feature matrix"""
+    chunk_size = max(1, chunk_size)
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+def batch_size_bucket(size: int) -> str:
+    """Map a batch size to a low-cardinality metric label"""
+    for bound in BATCH_SIZE_BUCKETS:
+        if size <= bound:
+            return f"<={bound}"
+    return f">{BATCH_SIZE_BUCKETS[-1]}"
+
+def track_drift(input_data: np.ndarray):
+    """Add rows to the drift window; scoring happens on the drift timer"""
+    if drift_monitor is not None:
+        drift_monitor.start(DRIFT_INTERVAL_SECONDS, record_drift)
+        drift_monitor.update(input_data)
+
+def record_drift(scores: dict):
+    """Export per-feature drift scores computed by the drift timer"""
+    for feature, feature_scores in scores.items():
+        DRIFT_PSI.labels(feature=feature).set(feature_scores["psi"])
+        DRIFT_KS.labels(feature=feature).set(feature_scores["ks"])
+    DRIFT_SCORE.set(max(feature_scores["psi"] for feature_scores in scores.values()))
+    DRIFT_WINDOW_ROWS.set(drift_monitor.window_size())
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+
+class ShadowScorer:
+    """Score a sampled fraction of requests with a challenger model, off the request path.
+
+    ``offer`` never waits: a sampled request is put on a bounded queue and
+    dropped when the queue is full. ``workers`` background tasks on the
+    request's event loop await the challenger for each queued request and
+    report how many of its predictions agree with the champion's, along with
+    both models' scoring times, to ``on_result``. A request offered without a
+    champion time (it was not comparable) is reported with ``None``.
+    """
+
+    def __init__(self, score_fn: Callable[[np.ndarray], Awaitable[list]], sample_rate: float = 0.1,
+                 max_queue: int = 100, workers: int = 2,
+                 on_result: Optional[Callable[[int, int, Optional[float], float], None]] = None,
+                 on_drop: Optional[Callable[[], None]] = None,
+                 on_error: Optional[Callable[[], None]] = None):
+        self.score_fn = score_fn
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_queue = max(1, max_queue)
+        self.workers = max(1, workers)
+        self.on_result = on_result
+        self.on_drop = on_drop
+        self.on_error = on_error
+        self._queue = None
+        self._tasks = []
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+
+    def offer(self, input_data: np.ndarray, champion_predictions: list,
+              champion_seconds: Optional[float]) -> bool:
+        """Queue a request for the challenger if it is sampled; returns whether it was queued"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((input_data, champion_predictions, champion_seconds))
+        except asyncio.QueueFull:
+            if self.on_drop is not None:
+                self.on_drop()
+            return False
+        return True
+
+    def pending(self) -> int:
+        """Requests waiting for the challenger"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def join(self):
+        """Wait until every queued request has been scored"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _run(self):
+        while True:
+            input_data, champion_predictions, champion_seconds = await self._queue.get()
+            try:
+                start = time.perf_counter()
+                challenger_predictions = await self.score_fn(input_data)
+                challenger_seconds = time.perf_counter() - start
+                if len(challenger_predictions) != len(champion_predictions):
+                    raise ValueError(f"Challenger returned {len(challenger_predictions)} predictions "
+                                     f"for {len(champion_predictions)} rows")
+                agreed = int(np.sum(np.asarray(challenger_predictions) == np.asarray(champion_predictions)))
+                if self.on_result is not None:
+                    self.on_result(agreed, len(champion_predictions), champion_seconds, challenger_seconds)
+            except Exception as e:
+                logging.warning(f"Challenger scoring failed: {str(e)}")
+                if self.on_error is not None:
+                    self.on_error()
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+# Stages of one scoring request, in request order
+STAGES = ("parse", "drift", "cache", "scale", "predict", "serialize")
+
+# Bucket bounds for per-stage durations: a parse or drift update on one row takes
+# tens of microseconds, a 10k-row predict takes tens of milliseconds
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Timer of the request running in the current context, None outside an instrumented request
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Durations of the stages one request has gone through so far"""
+
+    __slots__ = ("durations",)
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+
+def timed(stage: str, fn: Callable, *args):
+    """Call ``fn(*args)``, adding its duration to ``stage`` of the current request's timer.
+
+    Outside an instrumented request (warmup, the micro-batcher's worker thread)
+    this is a plain call, so shared code paths can be wrapped unconditionally.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return fn(*args)
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timer.add(stage, time.perf_counter() - start)
+
+
+def add_stage_seconds(stage: str, seconds: float):
+    """Add a duration measured elsewhere (such as by the micro-batcher) to ``stage`` of the current request's timer"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(stage, seconds)
+
+
+def stage_seconds(*stages: str) -> Optional[float]:
+    """Time the current request has spent in ``stages`` so far, None outside an instrumented request"""
+    timer = _current_timer.get()
+    if timer is None:
+        return None
+    return sum(timer.durations.get(stage, 0.0) for stage in stages)
+
+
+async def timed_async(stage: str, fn: Callable, *args):
+    """Await ``fn(*args)``, adding its duration to ``stage`` of the current request's timer.
+
+    Stages awaited concurrently (chunks of one batch) each add their own
+    duration, so a stage total is time spent in the stage, not wall time.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return await fn(*args)
+    start = time.perf_counter()
+    try:
+        return await fn(*args)
+    finally:
+        timer.add(stage, time.perf_counter() - start)
+
+
+class StageMetrics:
+    """Exports per-stage durations and request batch sizes off the request path.
+
+    A request only sums its stage durations in a plain dict and appends them to
+    a queue when it finishes; a daemon thread drains the queue into the
+    histograms every ``flush_interval_seconds``. Each ``observe`` takes a lock
+    and costs about as much as timing the whole request, so keeping them off
+    the request path is what keeps the instrumentation to a few microseconds.
+    The queue is bounded and drops its oldest entries if flushing falls behind.
+    """
+
+    def __init__(self, stage_histogram, batch_size_histogram, batch_size_bucket: Callable[[int], str],
+                 flush_interval_seconds: float = 1.0, max_pending: int = 100000):
+        self.stage_histogram = stage_histogram
+        self.batch_size_histogram = batch_size_histogram
+        self.batch_size_bucket = batch_size_bucket
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Deque[Tuple[str, int, Dict[str, float]]] = deque(maxlen=max_pending)
+        self._stage_children: Dict[Tuple[str, str, str], object] = {}
+        self._size_children: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def start(self) -> StageTimer:
+        """Start timing a request in the current context"""
+        timer = StageTimer()
+        _current_timer.set(timer)
+        return timer
+
+    def finish(self, timer: StageTimer, endpoint: str, batch_size: int):
+        """Stop timing and queue the request's stage durations for export"""
+        _current_timer.set(None)
+        self._pending.append((endpoint, batch_size, timer.durations))
+        if self._flusher is None:
+            self._start_flusher()
+
+    def flush(self):
+        """Observe every queued request in the histograms"""
+        with self._lock:
+            while self._pending:
+                endpoint, batch_size, durations = self._pending.popleft()
+                bucket = self.batch_size_bucket(batch_size)
+                for stage, seconds in durations.items():
+                    key = (endpoint, stage, bucket)
+                    child = self._stage_children.get(key)
+                    if child is None:
+                        child = self._stage_children[key] = self.stage_histogram.labels(
+                            endpoint=endpoint, stage=stage, batch_size=bucket)
+                    child.observe(seconds)
+
+                child = self._size_children.get(endpoint)
+                if child is None:
+                    child = self._size_children[endpoint] = self.batch_size_histogram.labels(endpoint=endpoint)
+                child.observe(batch_size)
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name="stage-metrics", daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval_seconds)
+            self.flush()
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import psutil
+except ImportError:  # psutil ships with bentoml; fall back to /proc elsewhere
+    psutil = None
+
+
+def process_uptime(fallback_started_at: float) -> float:
+    """Seconds since this process was created (or since ``fallback_started_at`` without psutil)"""
+    if psutil is not None:
+        return time.time() - psutil.Process().create_time()
+    return time.time() - fallback_started_at
+
+
+def memory_usage() -> Dict[str, int]:
+    """Resident memory of this process, plus its proportional share (pss) where the OS reports it.
+
+    PSS splits pages shared with other processes (such as memory-mapped model
+    arrays) between them, so it shows what each worker really adds.
+    """
+    if psutil is not None:
+        try:
+            info = psutil.Process().memory_full_info()
+            usage = {"rss": info.rss}
+            if hasattr(info, "pss"):
+                usage["pss"] = info.pss
+            return usage
+        except psutil.AccessDenied:
+            return {"rss": psutil.Process().memory_info().rss}
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return {"rss": int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")}
+    except (OSError, ValueError):
+        return {}
+
+
+class Readiness:
+    """Tracks a worker from start-up until its warmup batch has gone through the inference path.
+
+    ``run`` retries the warmup with capped backoff until it succeeds, so a
+    worker only reports ready once its runners answer and every lazy
+    initialisation on the request path has already happened. After
+    ``max_attempts`` failures it gives up: the state becomes ``failed`` and the
+    last error is raised instead of retrying forever behind a 503.
+    """
+
+    STARTING = "starting"
+    WARMING_UP = "warming_up"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self):
+        self.state = self.STARTING
+        self.attempts = 0
+        self.warmup_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def run(self, warmup: Callable[[], None], retry_delay: float = 0.5, max_delay: float = 5.0,
+            max_attempts: int = 30) -> float:
+        """Run ``warmup`` until it succeeds and return how long the successful attempt took"""
+        with self._lock:
+            if self.state != self.STARTING:
+                return self.warmup_seconds or 0.0
+            self.state = self.WARMING_UP
+
+        delay = retry_delay
+        while True:
+            self.attempts += 1
+            start = time.perf_counter()
+            try:
+                warmup()
+            except Exception as e:
+                self.last_error = str(e)
+                if self.attempts >= max_attempts:
+                    self.state = self.FAILED
+                    logging.error(f"Warmup failed {self.attempts} times, giving up: {e}")
+                    raise
+                logging.warning(f"Warmup attempt {self.attempts} failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, max_delay)
+                continue
+
+            self.warmup_seconds = time.perf_counter() - start
+            self.last_error = None
+            self.state = self.READY
+            return self.warmup_seconds
@@ -1,9 +1,38 @@
 import bentoml
 import joblib
+import numpy as np
 import pandas as pd
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 import os
 import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+from compiled_forest import CompiledForest
+
+def export_compiled_forest(model, scaler):
+    """Save the forest as a CompiledForest array bundle in the BentoML store"""
+    engine = CompiledForest.from_sklearn(model, scaler)
+    
+    with bentoml.models.create(
+        "iris_compiled_forest",
+        module="compiled_forest",
+        signatures={"predict": {"batchable": False}},
+        labels={
+            "framework": "numpy",
+            "algorithm": "RandomForest",
+            "engine": "compiled",
+            "version": "v1.0"
+        },
+        metadata={"n_trees": len(engine.roots), "max_depth": engine.max_depth},
+        context=bentoml.models.ModelContext(
+            framework_name="numpy",
+            framework_versions={"numpy": np.__version__}
+        ),
+    ) as bento_model:
+        engine.save(bento_model.path)
+    
+    return bento_model.tag
 
 def build_bento_service():
     """Build BentoML service with trained model"""
@@ -11,8 +40,8 @@ def build_bento_service():
     try:
         print("🔧 Starting BentoML service build...")
         
-        # Check if model files exist
-        model_path = 'models/model.pkl'
+        # Check if model files exist; serve the compacted forest when the compact_model stage produced one
+        model_path = 'models/model_compact.joblib' if os.path.exists('models/model_compact.joblib') else 'models/model.pkl'
         scaler_path = 'models/scaler.pkl'
         
         if not os.path.exists(model_path):
@@ -21,7 +50,7 @@ def build_bento_service():
             raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
         
         # Load trained model and scaler
-        print("Loading model and scaler...")
+        print(f"Loading model from {model_path} and scaler...")
         model = joblib.load(model_path)
         scaler = joblib.load(scaler_path)
         
@@ -33,6 +62,7 @@ def build_bento_service():
         model_tag = bentoml.sklearn.save_model(
             name="iris_classifier",
             model=model,
+            signatures={"predict": {"batchable": False}},
             labels={
                 "accuracy": "0.95+",
                 "framework": "sklearn",
@@ -51,6 +81,7 @@ def build_bento_service():
         scaler_tag = bentoml.sklearn.save_model(
             name="iris_scaler", 
             model=scaler,
+            signatures={"transform": {"batchable": False}},
             labels={
                 "type": "StandardScaler",
                 "version": "v1.0"
@@ -58,8 +89,30 @@ def build_bento_service():
             metadata={"type": "StandardScaler"}
         )
         
+        # Save fused scaler+classifier pipeline, served by a single runner
+        print("Saving fused pipeline to BentoML store...")
+        pipeline = Pipeline([("scaler", scaler), ("model", model)])
+        pipeline_tag = bentoml.sklearn.save_model(
+            name="iris_pipeline",
+            model=pipeline,
+            signatures={"predict": {"batchable": False}},
+            labels={
+                "framework": "sklearn",
+                "algorithm": "RandomForest",
+                "layout": "fused",
+                "version": "v1.0"
+            },
+            metadata={"steps": "StandardScaler,RandomForest"}
+        )
+        
+        # Export scaler+forest to the array-backed compiled engine
+        print("Exporting compiled forest engine to BentoML store...")
+        compiled_tag = export_compiled_forest(model, scaler)
+        
         print(f"Model saved: {model_tag}")
         print(f"Scaler saved: {scaler_tag}")
+        print(f"Pipeline saved: {pipeline_tag}")
+        print(f"Compiled forest saved: {compiled_tag}")
         
         # List saved models for verification
         print("\nAvailable models in BentoML store:")
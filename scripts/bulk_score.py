@@ -0,0 +1,164 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width']
+
+# Loaded once per worker process by init_worker
+_model = None
+_scaler = None
+
+
+def init_worker(model_path, scaler_path):
+    """Load the model and scaler once per worker process"""
+    global _model, _scaler
+    _model = joblib.load(model_path)
+    _scaler = joblib.load(scaler_path)
+
+
+def score_chunk(features):
+    """Scale and predict one chunk of features inside a worker"""
+    X = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+    return _model.predict(_scaler.transform(X))
+
+
+def read_chunks(input_path, chunk_size, skip_rows=0):
+    """Yield DataFrame chunks of the input, skipping rows already scored"""
+    if input_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            if skip_rows >= batch.num_rows:
+                skip_rows -= batch.num_rows
+                continue
+            yield batch.slice(skip_rows).to_pandas()
+            skip_rows = 0
+    else:
+        skip = range(1, skip_rows + 1) if skip_rows else None
+        yield from pd.read_csv(input_path, chunksize=chunk_size, skiprows=skip)
+
+
+def input_fingerprint(input_path):
+    """Size and modification time of the input, to tell a rewritten file at the same path from the original"""
+    stat = os.stat(input_path)
+    return {"input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns}
+
+
+def load_progress(progress_path, input_path, chunk_size):
+    """Return the checkpoint of an unfinished run over the same, unchanged input, if any"""
+    if not os.path.exists(progress_path):
+        return None
+    with open(progress_path, "r") as f:
+        progress = json.load(f)
+    if progress["input"] != os.path.abspath(input_path) or progress["chunk_size"] != chunk_size:
+        raise ValueError(f"{progress_path} belongs to a different run; delete it or use the same input and chunk size")
+    if {key: progress.get(key) for key in ("input_size", "input_mtime_ns")} != input_fingerprint(input_path):
+        print(f"{input_path} changed since {progress_path} was written; starting over")
+        return None
+    return progress
+
+
+def save_progress(progress_path, progress):
+    """Atomically write the checkpoint"""
+    tmp_path = progress_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, progress_path)
+
+
+def bulk_score(input_path, output_path, model_path, scaler_path, chunk_size=100000, workers=None,
+               predictions_only=False, max_chunks=None):
+    """Score a large CSV/Parquet file chunk by chunk across a process pool"""
+    workers = workers or os.cpu_count()
+    progress_path = output_path + ".progress.json"
+    progress = load_progress(progress_path, input_path, chunk_size) or {
+        "input": os.path.abspath(input_path),
+        **input_fingerprint(input_path),
+        "chunk_size": chunk_size,
+        "rows_done": 0,
+        "chunks_done": 0,
+        "output_bytes": 0,
+    }
+
+    if progress["rows_done"]:
+        print(f"Resuming after {progress['rows_done']} rows ({progress['chunks_done']} chunks)")
+
+    # Drop anything written after the last checkpoint (a chunk interrupted mid-write)
+    mode = "r+" if progress["output_bytes"] and os.path.exists(output_path) else "w"
+    start_time = time.time()
+    rows_scored = 0
+
+    with open(output_path, mode, newline="") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                initargs=(model_path, scaler_path)) as pool:
+        out.seek(progress["output_bytes"])
+        out.truncate()
+
+        # Keep a bounded window of chunks in flight and write results in input order
+        in_flight = deque()
+        chunks = read_chunks(input_path, chunk_size, progress["rows_done"])
+        if max_chunks is not None:
+            chunks = (chunk for _, chunk in zip(range(max_chunks), chunks))
+
+        def write_next():
+            nonlocal rows_scored
+            chunk, future = in_flight.popleft()
+            result = pd.DataFrame({"prediction": future.result()}, index=chunk.index)
+            if not predictions_only:
+                result = pd.concat([chunk, result], axis=1)
+            result.to_csv(out, header=progress["output_bytes"] == 0, index=False)
+            out.flush()
+            os.fsync(out.fileno())
+
+            rows_scored += len(chunk)
+            progress["rows_done"] += len(chunk)
+            progress["chunks_done"] += 1
+            progress["output_bytes"] = out.tell()
+            save_progress(progress_path, progress)
+
+            elapsed = time.time() - start_time
+            print(f"Scored {progress['rows_done']} rows ({rows_scored / elapsed:,.0f} rows/s)")
+
+        chunks_read = 0
+        for chunk in chunks:
+            chunks_read += 1
+            features = np.ascontiguousarray(chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+            in_flight.append((chunk, pool.submit(score_chunk, features)))
+            if len(in_flight) >= 2 * workers:
+                write_next()
+        while in_flight:
+            write_next()
+
+    # A run that reached the end of the input leaves no checkpoint behind, so the next run starts over
+    if (max_chunks is None or chunks_read < max_chunks) and os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    elapsed = time.time() - start_time
+    print(f"Bulk scoring finished: {rows_scored} rows in {elapsed:.1f}s "
+          f"({rows_scored / max(elapsed, 1e-9):,.0f} rows/s), output: {output_path}")
+    return {"rows": rows_scored, "seconds": elapsed, "rows_per_second": rows_scored / max(elapsed, 1e-9)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large CSV/Parquet file offline")
+    parser.add_argument("input", help="Input .csv or .parquet file with the four feature columns")
+    parser.add_argument("output", help="Output .csv file (a .progress.json checkpoint is kept next to it)")
+    parser.add_argument("--model", default="models/model.pkl")
+    parser.add_argument("--scaler", default="models/scaler.pkl")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--predictions-only", action="store_true", help="Write only the prediction column")
+    parser.add_argument("--max-chunks", type=int, default=None, help="Stop after this many chunks (resume later)")
+    args = parser.parse_args()
+
+    bulk_score(args.input, args.output, args.model, args.scaler, args.chunk_size, args.workers,
+               args.predictions_only, args.max_chunks)
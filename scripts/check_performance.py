@@ -3,33 +3,66 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import json
 import sys
+import yaml
+
+def load_params():
+    with open('params.yaml', 'r') as f:
+        return yaml.safe_load(f)
+
+def budget_checks(metrics, eval_params):
+    """Return (name, value, limit, passed) for the accuracy threshold and every budget in params.yaml"""
+    budgets = eval_params.get('budgets', {})
+    checks = [('accuracy', metrics['accuracy'], eval_params['performance_threshold'],
+               metrics['accuracy'] >= eval_params['performance_threshold'])]
+
+    latency = metrics.get('latency', {})
+    for batch_size, limit in budgets.get('p95_latency_ms', {}).items():
+        if str(batch_size) not in latency:
+            checks.append((f'p95_latency_ms@{batch_size}', None, limit, False))
+            continue
+        value = latency[str(batch_size)]['p95_ms']
+        checks.append((f'p95_latency_ms@{batch_size}', value, limit, value <= limit))
+
+    if 'min_throughput_rows_per_second' in budgets and latency:
+        largest = max(latency, key=int)
+        value = latency[largest]['throughput_rows_per_second']
+        limit = budgets['min_throughput_rows_per_second']
+        checks.append((f'throughput_rows_per_second@{largest}', value, limit, value >= limit))
+
+    for name, metric, key in [('peak_memory_mb', 'peak_memory_bytes', 'max_peak_memory_mb'),
+                              ('artifact_mb', 'artifact_bytes', 'max_artifact_mb')]:
+        if key in budgets:
+            value = metrics[metric] / 1e6 if metric in metrics else None
+            checks.append((name, value, budgets[key], value is not None and value <= budgets[key]))
+    return checks
 
 def check_performance_threshold():
-    """Check if model meets performance threshold"""
+    """Check if model meets performance threshold and the latency and memory budgets"""
     try:
-        with open('metrics/eval_metrics.json', 'r') as f:
+        eval_params = load_params()['evaluate']
+        with open(eval_params.get('metrics_path', 'metrics/eval_metrics.json'), 'r') as f:
             metrics = json.load(f)
-        
-        accuracy = metrics['accuracy']
-        threshold = 0.90  # From params.yaml
-        
-        meets_threshold = accuracy >= threshold
-        
-        print(f"Model accuracy: {accuracy:.4f}")
-        print(f"Threshold: {threshold}")
+
+        checks = budget_checks(metrics, eval_params)
+
+        for name, value, limit, passed in checks:
+            shown = 'missing' if value is None else f'{value:.4f}'
+            print(f"{name}: {shown} (limit {limit}) {'OK' if passed else 'FAILED'}")
+
+        meets_threshold = all(passed for *_, passed in checks)
         print(f"Meets threshold: {meets_threshold}")
-        
+
         if meets_threshold:
             print("MODEL_APPROVED=true")
             return True
         else:
             print("MODEL_APPROVED=false")
             return False
-            
+
     except Exception as e:
         print(f"Error checking performance: {e}")
         return False
 
 if __name__ == "__main__":
     success = check_performance_threshold()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(0 if success else 1)
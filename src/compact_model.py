@@ -0,0 +1,235 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import copy
+import json
+import subprocess
+import time
+import joblib
+import mlflow
+import numpy as np
+import yaml
+from sklearn.metrics import accuracy_score
+from src.data_io import read_table
+from src.tree_precision import float32_floor
+
+LATENCY_BATCH_SIZES = [1, 1000]
+
+# Loads an artifact in a fresh interpreter and reports load time and the RSS it added
+LOAD_PROBE = """
+import json, os, sys, time
+import joblib, sklearn.ensemble
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+before = rss()
+start = time.perf_counter()
+joblib.load(sys.argv[1])
+print(json.dumps({"load_seconds": time.perf_counter() - start, "rss_bytes": rss() - before}))
+"""
+
+
+def load_params():
+    with open("params.yaml", "r") as f:
+        return yaml.safe_load(f)
+
+
+def probe_set(X, copies=20, noise=0.3, seed=42):
+    """Training rows plus jittered copies, so the pruned forest must agree with the full one around the data too"""
+    rng = np.random.default_rng(seed)
+    return np.vstack([X] + [X + rng.normal(0.0, noise, X.shape) for _ in range(copies)])
+
+
+def select_trees(model, X, min_fidelity=1.0, min_trees=1):
+    """Greedily order trees by agreement with the full forest and keep the shortest prefix that reproduces it"""
+    tree_proba = np.stack([tree.predict_proba(X) for tree in model.estimators_])
+    target = np.argmax(tree_proba.sum(axis=0), axis=1)
+
+    selected = []
+    running = np.zeros_like(tree_proba[0])
+    remaining = list(range(len(tree_proba)))
+    while remaining:
+        agreement = [np.mean(np.argmax(running + tree_proba[i], axis=1) == target) for i in remaining]
+        best = remaining.pop(int(np.argmax(agreement)))
+        selected.append(best)
+        running += tree_proba[best]
+        if len(selected) >= min_trees and max(agreement) >= min_fidelity:
+            break
+    return sorted(selected)
+
+
+def compact_tree(tree, prune_nodes="exact"):
+    """Collapse redundant subtrees into leaves and round thresholds down to float32.
+
+    ``prune_nodes="exact"`` only collapses subtrees whose leaves all hold the
+    same class distribution (predictions are unchanged); ``"same_class"`` also
+    collapses subtrees whose leaves all vote for the same class, which can
+    shift the forest's averaged probabilities.
+    """
+    cls, args, state = tree.__reduce__()
+    nodes, values = state["nodes"], state["values"]
+    left, right = nodes["left_child"], nodes["right_child"]
+
+    normalized = values / np.maximum(values.sum(axis=-1, keepdims=True), 1e-12)
+    if prune_nodes == "same_class":
+        summary = np.argmax(normalized, axis=-1)
+    else:
+        summary = normalized
+
+    # Children always come after their parent, so one reverse pass sees every subtree first
+    collapsible = np.zeros(len(nodes), dtype=bool)
+    for node in reversed(range(len(nodes))):
+        if left[node] == -1:
+            collapsible[node] = True
+        elif prune_nodes in ("exact", "same_class"):
+            l, r = left[node], right[node]
+            collapsible[node] = (collapsible[l] and collapsible[r] and np.array_equal(summary[l], summary[r]))
+            if collapsible[node]:
+                summary[node] = summary[l]
+
+    # Renumber the kept nodes depth-first, turning collapsible subtrees into leaves
+    keep, new_id, stack = [], {}, [0]
+    while stack:
+        node = stack.pop()
+        new_id[node] = len(keep)
+        keep.append(node)
+        if left[node] != -1 and not collapsible[node]:
+            stack.extend([right[node], left[node]])
+
+    new_nodes = nodes[keep].copy()
+    new_values = values[keep].copy()
+    for i, node in enumerate(keep):
+        if left[node] == -1 or collapsible[node]:
+            new_nodes["left_child"][i] = new_nodes["right_child"][i] = -1
+            new_nodes["feature"][i] = -2
+            new_nodes["threshold"][i] = -2.0
+            # A collapsed subtree becomes a leaf holding the class distribution of the samples that reached it
+            new_values[i] = values[node]
+        else:
+            new_nodes["left_child"][i] = new_id[left[node]]
+            new_nodes["right_child"][i] = new_id[right[node]]
+    split = new_nodes["left_child"] != -1
+    # sklearn keeps thresholds as float64; float32-representable values compress better and stay exact
+    new_nodes["threshold"][split] = float32_floor(new_nodes["threshold"][split])
+
+    depth = np.zeros(len(keep), dtype=int)
+    for i in range(len(keep)):
+        if split[i]:
+            depth[new_nodes["left_child"][i]] = depth[new_nodes["right_child"][i]] = depth[i] + 1
+
+    compacted = cls(*args)
+    compacted.__setstate__({**state, "nodes": new_nodes, "values": np.ascontiguousarray(new_values),
+                            "node_count": len(keep), "max_depth": int(depth.max())})
+    return compacted
+
+
+def compact_forest(model, X, compact_params):
+    """Return a pruned copy of a fitted RandomForestClassifier"""
+    compact = copy.deepcopy(model)
+    probe = probe_set(X, compact_params["probe_copies"], compact_params["probe_noise"])
+    selected = select_trees(model, probe, compact_params["min_fidelity"], compact_params["min_trees"])
+    compact.estimators_ = [compact.estimators_[i] for i in selected]
+    compact.n_estimators = len(selected)
+
+    for estimator in compact.estimators_:
+        estimator.tree_ = compact_tree(estimator.tree_, compact_params["prune_nodes"])
+    return compact
+
+
+def predict_latency_ms(model, scaler, X, repeats=50):
+    """Median scaler+predict latency per batch size"""
+    latencies = {}
+    for batch_size in LATENCY_BATCH_SIZES:
+        batch = X.iloc[np.arange(batch_size) % len(X)]
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(scaler.transform(batch))
+            timings.append((time.perf_counter() - start) * 1000)
+        latencies[str(batch_size)] = float(np.median(timings))
+    return latencies
+
+
+def measure_artifact(path, model, scaler, X_test, y_test):
+    """Size, load time, load RSS, predict latency and accuracy of one model artifact"""
+    probe = json.loads(subprocess.check_output([sys.executable, "-c", LOAD_PROBE, path], text=True))
+    return {
+        "artifact_bytes": os.path.getsize(path),
+        "load_seconds": probe["load_seconds"],
+        "load_rss_bytes": probe["rss_bytes"],
+        "predict_latency_ms": predict_latency_ms(model, scaler, X_test),
+        "accuracy": float(accuracy_score(y_test, model.predict(scaler.transform(X_test)))),
+        "n_trees": len(model.estimators_),
+        "n_nodes": int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+    }
+
+
+def compact_model(model_file, scaler_file, train_file, test_file, output_file):
+
+    # Load Params
+    params = load_params()
+    compact_params = params["compact"]
+    mlflow_params = params["mlflow"]
+
+    model = joblib.load(model_file)
+    scaler = joblib.load(scaler_file)
+
+    train_df = read_table(train_file)
+    test_df = read_table(test_file)
+    X_train = scaler.transform(train_df.drop("species", axis=1))
+    X_test, y_test = test_df.drop("species", axis=1), test_df["species"]
+
+    # Trees are selected on the training split; the test split only measures the result
+    compact = compact_forest(model, X_train, compact_params)
+
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    joblib.dump(compact, output_file, compress=compact_params["compress"])
+
+    original_metrics = measure_artifact(model_file, model, scaler, X_test, y_test)
+    compact_metrics = measure_artifact(output_file, compact, scaler, X_test, y_test)
+    metrics = {
+        "original": original_metrics,
+        "compact": compact_metrics,
+        "accuracy_delta": compact_metrics["accuracy"] - original_metrics["accuracy"],
+        "size_ratio": compact_metrics["artifact_bytes"] / original_metrics["artifact_bytes"],
+    }
+
+    metrics_path = compact_params["metrics_path"]
+    if os.path.dirname(metrics_path):
+        os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+
+    mlflow.set_experiment(mlflow_params["experiment_name"])
+    with mlflow.start_run(run_name="compact_model"):
+        mlflow.log_params({f"compact_{key}": value for key, value in compact_params.items()})
+        mlflow.log_metrics({
+            "compact_n_trees": compact_metrics["n_trees"],
+            "compact_n_nodes": compact_metrics["n_nodes"],
+            "compact_artifact_bytes": compact_metrics["artifact_bytes"],
+            "compact_load_seconds": compact_metrics["load_seconds"],
+            "compact_accuracy_delta": metrics["accuracy_delta"],
+            "compact_size_ratio": metrics["size_ratio"],
+        })
+
+    print("Model Compaction Results:")
+    print(f"{'':>22} {'original':>12} {'compact':>12}")
+    for key in ["n_trees", "n_nodes", "artifact_bytes", "load_seconds", "load_rss_bytes", "accuracy"]:
+        print(f"{key:>22} {original_metrics[key]:>12.4g} {compact_metrics[key]:>12.4g}")
+    for batch_size in original_metrics["predict_latency_ms"]:
+        print(f"{'predict ms @ ' + batch_size:>22} {original_metrics['predict_latency_ms'][batch_size]:>12.3f} "
+              f"{compact_metrics['predict_latency_ms'][batch_size]:>12.3f}")
+    print(f"Accuracy delta: {metrics['accuracy_delta']:+.4f}, size ratio: {metrics['size_ratio']:.3f}")
+
+    return metrics
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 6:
+        print("Usage: python src/compact_model.py <model_file> <scaler_file> <train_file> <test_file> <output_file>")
+        sys.exit(1)
+
+    compact_model(*sys.argv[1:6])
@@ -1,6 +1,9 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import pandas as pd
 import yaml 
-import os
+from src.data_io import with_format, write_table
 
 
 def load_params():
@@ -8,12 +11,13 @@ def load_params():
         return yaml.safe_load(f)
     
 
-def ingest_data():
+def ingest_data(raw_dataset_path=None):
     
     # Load Params
     params = load_params()
     dataset_url = params["data_ingestion"]["dataset_url"]
-    raw_dataset_path = params["data_ingestion"]["dataset_path"]
+    if raw_dataset_path is None:
+        raw_dataset_path = with_format(params["data_ingestion"]["dataset_path"], params["data"]["format"])
 
     print("Starting Data Ingestion Stage...")
 
@@ -24,11 +28,11 @@ def ingest_data():
     df = pd.read_csv(dataset_url)
 
     # Save Dataset
-    df.to_csv(raw_dataset_path, index=False)
+    write_table(df, raw_dataset_path, params["data"])
 
     print(f"Data Ingestion Successful Dataset Contains {len(df)} rows and {list(df.columns)} as Columns.")
     print(f"Species distribution:\n{df['species'].value_counts()}")
 
 
 if __name__ == "__main__":
-    ingest_data()
+    ingest_data(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,81 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# File extension for each intermediate data format
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+
+def table_format(path):
+    """Data format of a file, from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    for data_format, format_extension in EXTENSIONS.items():
+        if extension == format_extension:
+            return data_format
+    raise ValueError(f"Unknown data format for {path}, expected one of {sorted(EXTENSIONS.values())}")
+
+
+def with_format(path, data_format):
+    """Swap the extension of a path for the one of ``data_format``"""
+    if data_format not in EXTENSIONS:
+        raise ValueError(f"Unknown data format: {data_format}")
+    return os.path.splitext(path)[0] + EXTENSIONS[data_format]
+
+
+def table_columns(path):
+    """Column names of a table, without reading its rows"""
+    data_format = table_format(path)
+    if data_format == "parquet":
+        return pq.read_schema(path).names
+    if data_format == "feather":
+        return feather.read_table(path, memory_map=True).schema.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_table(path, columns=None, memory_map=True):
+    """Read a CSV, Parquet or Feather table, optionally only ``columns``.
+
+    Parquet and Feather only decode the projected columns; with
+    ``memory_map`` an uncompressed Feather file is read straight from the
+    page cache instead of being copied into Arrow buffers first.
+    """
+    data_format = table_format(path)
+    if data_format == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+    if data_format == "feather":
+        return feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+    df = pd.read_csv(path, usecols=columns)
+    return df[columns] if columns is not None else df
+
+
+def iter_table_chunks(path, chunk_size, columns=None):
+    """Yield a table as DataFrames of at most ``chunk_size`` rows, holding one chunk in memory at a time"""
+    data_format = table_format(path)
+    if data_format == "parquet":
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif data_format == "feather":
+        # Uncompressed Feather is paged in lazily from the memory map, so only the current slice is resident
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for start in range(0, table.num_rows, chunk_size):
+            yield table.slice(start, chunk_size).to_pandas()
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+            yield chunk[columns] if columns is not None else chunk
+
+
+def write_table(df, path, data_params=None):
+    """Write a table in the format given by its extension, with the codec from the ``data`` params"""
+    data_params = data_params or {}
+    data_format = table_format(path)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if data_format == "parquet":
+        df.to_parquet(path, index=False, compression=data_params.get("parquet_compression", "snappy"))
+    elif data_format == "feather":
+        df.reset_index(drop=True).to_feather(path, compression=data_params.get("feather_compression", "uncompressed"))
+    else:
+        df.to_csv(path, index=False)
@@ -5,6 +5,7 @@ import pandas as pd
 import yaml 
 import sys
 from sklearn.model_selection import train_test_split
+from src.data_io import read_table, write_table
 
 
 def load_params():
@@ -20,7 +21,7 @@ def preprocess_data(input_file, train_path, test_path):
     print("Starting Data Preprocessing...")
 
     # Load Dataset
-    df = pd.read_csv(input_file)
+    df = read_table(input_file)
 
     # Basic Dataset Cleaning
     df = df.dropna()
@@ -46,8 +47,8 @@ def preprocess_data(input_file, train_path, test_path):
     if not os.path.exists("data/processed"):
         os.makedirs("data/processed")
 
-    train_df.to_csv(train_path, index=False)
-    test_df.to_csv(test_path, index=False)
+    write_table(train_df, train_path, params["data"])
+    write_table(test_df, test_path, params["data"])
 
     print(f"Data preprocessed:")
     print(f"Training set: {len(train_df)} samples")
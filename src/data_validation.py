@@ -4,7 +4,24 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import pandas as pd
 import numpy as np
 import json
-import sys
+import shutil
+import tempfile
+import time
+import yaml
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from src.data_io import iter_table_chunks, table_columns, table_format, with_format
+
+# pandas dtype kinds accepted for each schema dtype
+DTYPE_KINDS = {"float": "fiu", "int": "iu", "string": "OSU"}
+
+
+def load_params():
+    with open("params.yaml", "r") as f:
+        return yaml.safe_load(f)
+
 
 def validate_data_schema(df, expected_columns):
     """Validate data schema"""
@@ -42,35 +59,261 @@ def validate_data_quality(df):
     
     return issues
 
-def validate_iris_data():
+
+def chunk_tasks(data_file, chunk_size):
+    """Split a Parquet or Feather file into independently readable chunks; None for CSV, which is streamed"""
+    data_format = table_format(data_file)
+    if data_format == "parquet":
+        metadata = pq.ParquetFile(data_file).metadata
+        tasks, group, rows = [], [], 0
+        for i in range(metadata.num_row_groups):
+            group.append(i)
+            rows += metadata.row_group(i).num_rows
+            if rows >= chunk_size:
+                tasks.append(("row_groups", group))
+                group, rows = [], 0
+        if group:
+            tasks.append(("row_groups", group))
+        return tasks
+    if data_format == "feather":
+        n_rows = feather.read_table(data_file, memory_map=True).num_rows
+        return [("slice", (start, chunk_size)) for start in range(0, n_rows, chunk_size)]
+    return None
+
+
+def read_chunk(data_file, task, columns, string_columns):
+    """Read one chunk, with string columns dictionary-encoded so they arrive as categoricals"""
+    kind, where = task
+    if kind == "row_groups":
+        parquet_file = pq.ParquetFile(data_file, memory_map=True, read_dictionary=string_columns)
+        return parquet_file.read_row_groups(where, columns=columns).to_pandas()
+    start, length = where
+    table = feather.read_table(data_file, columns=columns, memory_map=True).slice(start, length)
+    for column in string_columns:
+        index = table.schema.get_field_index(column)
+        table = table.set_column(index, column, table.column(column).dictionary_encode())
+    return table.to_pandas()
+
+
+def partition_starts(hash_partitions):
+    """First hash value of each partition; the partition count must be a power of two"""
+    if hash_partitions < 1 or hash_partitions & (hash_partitions - 1):
+        raise ValueError(f"hash_partitions must be a power of two, got {hash_partitions}")
+    return np.array([p * (2 ** 64 // hash_partitions) for p in range(hash_partitions)], dtype=np.uint64)
+
+
+def chunk_statistics(chunk, schema, hash_dir, hash_partitions):
+    """Every statistic the checks need from one chunk, in a single pass over its columns.
+
+    Row hashes are appended to one of ``hash_partitions`` files by their top
+    bits, so duplicates can later be counted one partition at a time.
+    """
+    label_column = schema["label_column"]
+    stats = {"rows": len(chunk), "columns": {}, "labels": Counter(), "invalid_labels": Counter()}
+    chunk = chunk[list(schema["columns"])]
+    for column, spec in schema["columns"].items():
+        values = chunk[column]
+        column_stats = {"dtype": str(values.dtype), "missing": int(values.isna().sum()),
+                        "dtype_ok": values.dtype.kind in DTYPE_KINDS[spec["dtype"]]}
+        if spec["dtype"] in ("float", "int") and column_stats["dtype_ok"]:
+            array = values.to_numpy(dtype=np.float64)
+            present = array[~np.isnan(array)]
+            column_stats["min"] = float(present.min()) if len(present) else None
+            column_stats["max"] = float(present.max()) if len(present) else None
+            out_of_range = np.zeros(len(present), dtype=bool)
+            if spec.get("min") is not None:
+                out_of_range |= present < spec["min"]
+            if spec.get("max") is not None:
+                out_of_range |= present > spec["max"]
+            column_stats["out_of_range"] = int(out_of_range.sum())
+        stats["columns"][column] = column_stats
+
+    # Categorical labels are counted and hashed once per distinct value instead of once per row
+    counts = chunk[label_column].value_counts()
+    stats["labels"].update({str(label): int(n) for label, n in counts.items() if n})
+    allowed = schema["columns"][label_column].get("allowed")
+    if allowed is not None:
+        stats["invalid_labels"].update({label: n for label, n in stats["labels"].items() if label not in allowed})
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+    # Partitions are ranges of the top hash bits, so a sorted chunk splits into them without a shuffle
+    hashes.sort()
+    bounds = np.searchsorted(hashes, partition_starts(hash_partitions)[1:])
+    for p, part in enumerate(np.split(hashes, bounds)):
+        if len(part):
+            with open(os.path.join(hash_dir, f"part-{p}-{os.getpid()}.bin"), "ab") as f:
+                part.tofile(f)
+    return stats
+
+
+def string_columns(schema):
+    return [column for column, spec in schema["columns"].items() if spec["dtype"] == "string"]
+
+
+def chunk_task_statistics(data_file, task, schema, hash_dir, hash_partitions):
+    """Worker entry point: read one chunk and compute its statistics"""
+    chunk = read_chunk(data_file, task, list(schema["columns"]), string_columns(schema))
+    return chunk_statistics(chunk, schema, hash_dir, hash_partitions)
+
+
+def merge_statistics(total, stats):
+    if total is None:
+        return stats
+    total["rows"] += stats["rows"]
+    total["labels"].update(stats["labels"])
+    total["invalid_labels"].update(stats["invalid_labels"])
+    for column, column_stats in stats["columns"].items():
+        merged = total["columns"][column]
+        merged["missing"] += column_stats["missing"]
+        merged["dtype_ok"] = merged["dtype_ok"] and column_stats["dtype_ok"]
+        if "out_of_range" in merged and "out_of_range" in column_stats:
+            merged["out_of_range"] += column_stats["out_of_range"]
+            for key, pick in (("min", min), ("max", max)):
+                candidates = [v for v in (merged[key], column_stats[key]) if v is not None]
+                merged[key] = pick(candidates) if candidates else None
+    return total
+
+
+def count_duplicates(hash_dir, hash_partitions):
+    """Rows whose hash was already seen, counted one hash partition at a time"""
+    files = os.listdir(hash_dir)
+    duplicates = 0
+    for p in range(hash_partitions):
+        parts = [np.fromfile(os.path.join(hash_dir, name), dtype=np.uint64)
+                 for name in files if name.startswith(f"part-{p}-")]
+        if parts:
+            hashes = np.sort(np.concatenate(parts))
+            duplicates += int((hashes[1:] == hashes[:-1]).sum())
+    return int(duplicates)
+
+
+def run_checks(stats, duplicates, schema, validation_params):
+    """Turn the merged statistics into named pass/fail checks"""
+    checks = []
+
+    def check(name, passed, detail):
+        checks.append({"name": name, "passed": bool(passed), "detail": detail})
+
+    for column, column_stats in stats["columns"].items():
+        spec = schema["columns"][column]
+        check(f"{column}.dtype", column_stats["dtype_ok"], f"expected {spec['dtype']}, found {column_stats['dtype']}")
+        check(f"{column}.missing", column_stats["missing"] <= validation_params["max_missing"],
+              f"{column_stats['missing']} missing values")
+        if "out_of_range" in column_stats:
+            check(f"{column}.range", column_stats["out_of_range"] == 0,
+                  f"{column_stats['out_of_range']} values outside [{spec.get('min')}, {spec.get('max')}], "
+                  f"observed [{column_stats['min']}, {column_stats['max']}]")
+
+    label_column = schema["label_column"]
+    check(f"{label_column}.allowed", not stats["invalid_labels"], f"unexpected labels: {dict(stats['invalid_labels'])}")
+
+    balance = schema["class_balance"]
+    for label in schema["columns"][label_column].get("allowed") or sorted(stats["labels"]):
+        count = stats["labels"].get(label, 0)
+        fraction = count / stats["rows"] if stats["rows"] else 0.0
+        check(f"class_balance.{label}",
+              count >= balance["min_samples"] and balance["min_fraction"] <= fraction <= balance["max_fraction"],
+              f"{count} rows ({fraction:.1%}), expected >= {balance['min_samples']} rows and "
+              f"{balance['min_fraction']:.0%}-{balance['max_fraction']:.0%}")
+
+    check("duplicates", duplicates <= validation_params["max_duplicates"], f"{duplicates} duplicate rows")
+    return checks
+
+
+def validate_file(data_file, schema, validation_params):
+    """Validate a data file against the declarative schema in one streaming pass and return the report"""
+    start = time.perf_counter()
+    columns = list(schema["columns"])
+    present = table_columns(data_file)
+    missing_columns = sorted(set(columns) - set(present))
+    report = {"file": data_file, "schema_columns": columns, "extra_columns": sorted(set(present) - set(columns))}
+    if missing_columns:
+        report.update({"missing_columns": missing_columns, "passed": False,
+                       "checks": [{"name": "schema", "passed": False, "detail": f"missing columns: {missing_columns}"}]})
+        return report
+
+    chunk_size = validation_params["chunk_size"]
+    hash_partitions = validation_params["hash_partitions"]
+    n_jobs = validation_params["n_jobs"] or os.cpu_count()
+    hash_dir = tempfile.mkdtemp(prefix="validation-hashes-")
+    stats = None
+    try:
+        tasks = chunk_tasks(data_file, chunk_size)
+        if tasks is None:
+            # CSV cannot be split without parsing it, so it is streamed through this process
+            categories = {column: "category" for column in string_columns(schema)}
+            for chunk in iter_table_chunks(data_file, chunk_size, columns):
+                chunk = chunk.astype(categories)
+                stats = merge_statistics(stats, chunk_statistics(chunk, schema, hash_dir, hash_partitions))
+        elif n_jobs == 1 or len(tasks) <= 1:
+            # A single chunk is not worth starting worker processes for
+            for task in tasks:
+                stats = merge_statistics(stats, chunk_task_statistics(data_file, task, schema, hash_dir, hash_partitions))
+        else:
+            # Workers read their own row groups or slices, so only statistics cross process boundaries
+            n_jobs = min(n_jobs, len(tasks))
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                in_flight = deque()
+                for task in tasks:
+                    if len(in_flight) >= 2 * n_jobs:
+                        stats = merge_statistics(stats, in_flight.popleft().result())
+                    in_flight.append(pool.submit(chunk_task_statistics, data_file, task, schema, hash_dir,
+                                                 hash_partitions))
+                while in_flight:
+                    stats = merge_statistics(stats, in_flight.popleft().result())
+        duplicates = count_duplicates(hash_dir, hash_partitions)
+    finally:
+        shutil.rmtree(hash_dir, ignore_errors=True)
+
+    if stats is None:
+        stats = {"rows": 0, "columns": {}, "labels": Counter(), "invalid_labels": Counter()}
+    checks = run_checks(stats, duplicates, schema, validation_params)
+    report.update({
+        "rows": stats["rows"],
+        "columns": stats["columns"],
+        "labels": dict(stats["labels"]),
+        "invalid_labels": dict(stats["invalid_labels"]),
+        "duplicates": duplicates,
+        "checks": checks,
+        "passed": all(c["passed"] for c in checks),
+        "seconds": time.perf_counter() - start,
+    })
+    return report
+
+
+def validate_iris_data(data_file=None):
     """Validate Iris dataset"""
     try:
-        # Load data
-        df = pd.read_csv('data/processed/train.csv')
-        
-        # Expected schema for Iris dataset
-        expected_columns = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width', 'species']
-        
-        # Schema validation
-        validate_data_schema(df, expected_columns)
-        
-        # Quality validation
-        quality_issues = validate_data_quality(df)
-        
-        if quality_issues:
+        params = load_params()
+        validation_params = params["validation"]
+        if data_file is None:
+            data_file = with_format(params["data_preprocessing"]["train_path"], params["data"]["format"])
+
+        report = validate_file(data_file, validation_params["schema"], validation_params)
+
+        report_path = validation_params["report_path"]
+        if os.path.dirname(report_path):
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        if report["extra_columns"]:
+            print(f"Warning: Extra columns found: {report['extra_columns']}")
+        failed = [c for c in report["checks"] if not c["passed"]]
+        if failed:
             print("Data quality issues found:")
-            for issue in quality_issues:
-                print(f"  - {issue}")
-            return False
+            for c in failed:
+                print(f"  - {c['name']}: {c['detail']}")
         else:
-            print("Data validation passed!")
-            return True
-            
+            print(f"Data validation passed! ({report['rows']} rows in {report['seconds']:.2f}s)")
+        print(f"Report saved to: {report_path}")
+        return report["passed"]
+
     except Exception as e:
         print(f"Data validation failed: {str(e)}")
         return False
 
 if __name__ == "__main__":
-    success = validate_iris_data()
+    success = validate_iris_data(sys.argv[1] if len(sys.argv) > 1 else None)
     if not success:
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
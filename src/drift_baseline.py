@@ -0,0 +1,39 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import numpy as np
+
+BASELINE_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+
+def compute_drift_baseline(df, feature_columns, n_bins=10):
+    """Compute per-feature histograms and quantiles used by the service drift monitor"""
+    baseline = {"n_samples": len(df), "n_bins": n_bins, "features": {}}
+
+    for column in feature_columns:
+        values = df[column].to_numpy(dtype=np.float64)
+
+        # Quantile bin edges, open-ended on both sides so live values always land in a bin
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        bins = np.searchsorted(edges, values, side="right")
+        proportions = np.bincount(bins, minlength=len(edges) + 1) / len(values)
+
+        baseline["features"][column] = {
+            "bin_edges": edges.tolist(),
+            "proportions": proportions.tolist(),
+            "quantiles": {str(q): float(np.quantile(values, q)) for q in BASELINE_QUANTILES},
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+        }
+
+    return baseline
+
+
+def save_drift_baseline(baseline, path):
+    """Write the drift baseline next to the model artifacts"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
@@ -4,10 +4,28 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import sys 
 import joblib
 import json
-import pandas as pd
+import subprocess
+import time
 import mlflow
+import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, f1_score, recall_score, classification_report
 import yaml
+from src.data_io import read_table
+
+
+# Loads the artifacts in a fresh interpreter, scores one batch and reports the process's peak RSS
+PEAK_MEMORY_PROBE = """
+import json, resource, sys, time
+import joblib, numpy as np
+
+start = time.perf_counter()
+model, scaler = joblib.load(sys.argv[1]), joblib.load(sys.argv[2])
+load_seconds = time.perf_counter() - start
+rng = np.random.default_rng(0)
+model.predict(scaler.transform(rng.normal(size=(int(sys.argv[3]), scaler.n_features_in_))))
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+print(json.dumps({"load_seconds": load_seconds, "peak_rss_bytes": peak}))
+"""
 
 
 def load_params():
@@ -15,7 +33,35 @@ def load_params():
         return yaml.safe_load(f)
 
 
-def evaluate_model(model_file, scaler_file, test_file):
+def profile_latency(model, scaler, X, batch_sizes, repeats):
+    """Median and p95 scaler+predict latency (ms) and throughput (rows/s) per batch size"""
+    X = X.to_numpy(dtype=np.float64) if hasattr(X, "to_numpy") else X
+    profile = {}
+    for batch_size in batch_sizes:
+        batch = X[np.arange(batch_size) % len(X)]
+        model.predict(scaler.transform(batch))
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(scaler.transform(batch))
+            timings.append((time.perf_counter() - start) * 1000)
+        p50 = float(np.percentile(timings, 50))
+        profile[str(batch_size)] = {
+            "p50_ms": p50,
+            "p95_ms": float(np.percentile(timings, 95)),
+            "throughput_rows_per_second": batch_size / (p50 / 1000),
+        }
+    return profile
+
+
+def profile_memory(model_file, scaler_file, batch_size):
+    """Load time and peak RSS of a fresh process that loads the artifacts and scores one batch"""
+    output = subprocess.check_output([sys.executable, "-c", PEAK_MEMORY_PROBE, model_file, scaler_file,
+                                      str(batch_size)], text=True)
+    return json.loads(output)
+
+
+def evaluate_model(model_file, scaler_file, test_file, reference_model_file=None):
 
     # Load Params
     params = load_params()
@@ -26,7 +72,7 @@ def evaluate_model(model_file, scaler_file, test_file):
     mlflow.set_experiment(mlflow_params['experiment_name'])
 
     # Prepare Data
-    df = pd.read_csv(test_file)
+    df = read_table(test_file)
     X_test = df.drop("species", axis=1)
     y_test = df['species']
 
@@ -46,6 +92,21 @@ def evaluate_model(model_file, scaler_file, test_file):
         recall = recall_score(y_test, y_pred, average='weighted')
         f1 = f1_score(y_test, y_pred, average='weighted')
 
+        # Accuracy lost against the uncompacted model, if one was given
+        if reference_model_file is not None:
+            reference_model = joblib.load(reference_model_file)
+            reference_accuracy = accuracy_score(y_test, reference_model.predict(X_scaled_test))
+        else:
+            reference_accuracy = accuracy
+        accuracy_loss = reference_accuracy - accuracy
+        meets_max_accuracy_loss = accuracy_loss <= eval_params['max_accuracy_loss']
+
+        # Inference cost: latency and throughput per batch size, artifact size and peak memory
+        batch_sizes = eval_params['latency_batch_sizes']
+        latency = profile_latency(model, scaler, X_test, batch_sizes, eval_params['latency_repeats'])
+        memory = profile_memory(model_file, scaler_file, max(batch_sizes))
+        artifact_bytes = os.path.getsize(model_file) + os.path.getsize(scaler_file)
+
         # Save and Track Evaluation Metrics
         metrics = {
             'accuracy': float(accuracy),
@@ -53,7 +114,14 @@ def evaluate_model(model_file, scaler_file, test_file):
             'recall': str(float(recall)),
             'f1_score': str(float(f1)),
             'n_test_samples': str(len(X_test)),
-            'meets_threshold': str(accuracy >= eval_params['performance_threshold'])
+            'meets_threshold': str(accuracy >= eval_params['performance_threshold']),
+            'reference_accuracy': float(reference_accuracy),
+            'accuracy_loss': float(accuracy_loss),
+            'meets_max_accuracy_loss': str(meets_max_accuracy_loss),
+            'latency': latency,
+            'artifact_bytes': artifact_bytes,
+            'load_seconds': memory['load_seconds'],
+            'peak_memory_bytes': memory['peak_rss_bytes']
         }
 
         mlflow_metrics = {
@@ -62,7 +130,15 @@ def evaluate_model(model_file, scaler_file, test_file):
             'recall': float(recall),
             'f1_score': float(f1),
             'n_test_samples': len(X_test),
+            'accuracy_loss': float(accuracy_loss),
+            'artifact_bytes': artifact_bytes,
+            'load_seconds': memory['load_seconds'],
+            'peak_memory_bytes': memory['peak_rss_bytes'],
         }
+        for batch_size, batch_latency in latency.items():
+            mlflow_metrics[f'latency_p50_ms_batch_{batch_size}'] = batch_latency['p50_ms']
+            mlflow_metrics[f'latency_p95_ms_batch_{batch_size}'] = batch_latency['p95_ms']
+            mlflow_metrics[f'throughput_rows_per_second_batch_{batch_size}'] = batch_latency['throughput_rows_per_second']
 
         mlflow.log_metrics(mlflow_metrics)
 
@@ -80,19 +156,30 @@ def evaluate_model(model_file, scaler_file, test_file):
         print(f"Recall: {recall:.4f}")
         print(f"F1-Score: {f1:.4f}")
         print(f"Performance threshold met: {accuracy >= eval_params['performance_threshold']}")
+        print(f"Accuracy loss vs reference: {accuracy_loss:.4f} (max {eval_params['max_accuracy_loss']})")
+        for batch_size, batch_latency in latency.items():
+            print(f"Latency @ {batch_size} rows: p50 {batch_latency['p50_ms']:.3f} ms, p95 {batch_latency['p95_ms']:.3f} ms, "
+                  f"{batch_latency['throughput_rows_per_second']:.0f} rows/s")
+        print(f"Artifact size: {artifact_bytes / 1e6:.2f} MB, load {memory['load_seconds']:.3f}s, "
+              f"peak memory {memory['peak_rss_bytes'] / 1e6:.1f} MB")
         
         print("\nDetailed Classification Report:")
         print(classification_report(y_test, y_pred))
 
+    if not meets_max_accuracy_loss:
+        raise ValueError(f"Model loses {accuracy_loss:.4f} accuracy against {reference_model_file}, "
+                         f"more than evaluate.max_accuracy_loss={eval_params['max_accuracy_loss']}")
+
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python src/evaluate_model.py <model_file> <scaler_file> <test_file>")
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python src/evaluate_model.py <model_file> <scaler_file> <test_file> [reference_model_file]")
         sys.exit(1)
     
     model_file = sys.argv[1]
     scaler_file = sys.argv[2]
     test_file = sys.argv[3]
+    reference_model_file = sys.argv[4] if len(sys.argv) == 5 else None
     
-    evaluate_model(model_file, scaler_file, test_file)
+    evaluate_model(model_file, scaler_file, test_file, reference_model_file)
 
 
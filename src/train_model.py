@@ -1,16 +1,23 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import sys
-import pandas as pd
+import copy
+import hashlib
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import yaml
 import json
 import mlflow
 import mlflow.sklearn
 import joblib
+import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
+from src.drift_baseline import compute_drift_baseline, save_drift_baseline
+from src.data_io import iter_table_chunks, read_table
 
 
 def load_params():
@@ -18,49 +25,397 @@ def load_params():
         return yaml.safe_load(f)
 
 
-def train_model(train_file, model_path, scaler_path):
+def load_hyperparameters(train_params):
+    """Base hyperparameters with the tune_model winner merged over them, when it exists"""
+    hyperparameters = dict(train_params["hyperparameters"])
+    tuned_path = train_params.get("tuned_params_path")
+    if tuned_path and os.path.exists(tuned_path):
+        with open(tuned_path, "r") as f:
+            hyperparameters.update(json.load(f)["hyperparameters"])
+        print(f"Using tuned hyperparameters from {tuned_path}")
+    return hyperparameters
+
+
+def rescale_tree(tree, old_scaler, new_scaler):
+    """Move split thresholds from the old scaler's feature space into the new one.
+
+    Standard scaling is a per-feature increasing affine map, so every split
+    keeps sending the same raw rows left or right (up to float rounding for
+    rows exactly on a threshold).
+    """
+    cls, args, state = tree.__reduce__()
+    nodes = state["nodes"].copy()
+    split = nodes["left_child"] != -1
+    feature = nodes["feature"][split]
+    raw = nodes["threshold"][split] * old_scaler.scale_[feature] + old_scaler.mean_[feature]
+    nodes["threshold"][split] = (raw - new_scaler.mean_[feature]) / new_scaler.scale_[feature]
+
+    rescaled = cls(*args)
+    rescaled.__setstate__({**state, "nodes": nodes})
+    return rescaled
+
+
+def align_tree_classes(estimator, tree_classes, classes):
+    """Widen a tree fitted on a subset of the classes to the forest's full class list"""
+    if np.array_equal(tree_classes, classes):
+        return estimator
+    columns = np.searchsorted(classes, tree_classes)
+    cls, (n_features, _, n_outputs), state = estimator.tree_.__reduce__()
+    values = np.zeros(state["values"].shape[:2] + (len(classes),), dtype=state["values"].dtype)
+    values[:, :, columns] = state["values"]
+
+    tree = cls(n_features, np.array([len(classes)], dtype=np.intp), n_outputs)
+    tree.__setstate__({**state, "values": values})
+    estimator.tree_ = tree
+    estimator.n_classes_ = len(classes)
+    estimator.classes_ = np.arange(len(classes), dtype=np.float64)
+    return estimator
+
+
+def load_lineage(lineage_path):
+    if lineage_path and os.path.exists(lineage_path):
+        with open(lineage_path, "r") as f:
+            return json.load(f)
+    return {"generations": [], "tree_generations": []}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hashes(df):
+    """64-bit content hash of every row (index ignored), to recognise rows a model was already fitted on"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def load_consumed_rows(path):
+    """Sorted hashes of the rows the current model has been fitted on"""
+    if path and os.path.exists(path):
+        return np.sort(np.fromfile(path, dtype=np.uint64))
+    return np.empty(0, dtype=np.uint64)
+
+
+class ConsumedRows:
+    """Multiset of the row hashes a model has been fitted on, used up as matching rows are seen.
+
+    A hash consumed k times accounts for the first k rows with that hash, so
+    a file can be checked chunk by chunk with the same result as all at once.
+    """
+
+    def __init__(self, consumed):
+        self.hashes, self.remaining = np.unique(consumed, return_counts=True)
+
+    def new_rows(self, hashes):
+        """Mask of the rows not yet fitted on, using up the consumed hashes they match"""
+        if not len(self.hashes):
+            return np.ones(len(hashes), dtype=bool)
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        # Rank of each row among the rows sharing its hash
+        rank = np.arange(len(sorted_hashes)) - np.searchsorted(sorted_hashes, sorted_hashes, side="left")
+        position = np.minimum(np.searchsorted(self.hashes, sorted_hashes), len(self.hashes) - 1)
+        found = self.hashes[position] == sorted_hashes
+        mask = np.empty(len(hashes), dtype=bool)
+        mask[order] = rank >= np.where(found, self.remaining[position], 0)
+
+        matched, counts = np.unique(sorted_hashes[found], return_counts=True)
+        matched_position = np.searchsorted(self.hashes, matched)
+        self.remaining[matched_position] = np.maximum(self.remaining[matched_position] - counts, 0)
+        return mask
+
+
+def incremental_update(model, scaler, X_new, y_new, hyperparameters, incremental_params, lineage):
+    """Warm-start a fitted forest on a new data slice.
+
+    The scaler statistics are updated with ``partial_fit``, the existing
+    trees are re-expressed in the updated feature space, and
+    ``trees_per_update`` new trees are fitted on the new slice only. Trees
+    older than ``max_tree_age`` generations, then the oldest beyond
+    ``max_trees``, are retired. Returns the new model, scaler and the
+    number of trees retired.
+    """
+    unknown = set(np.unique(y_new)) - set(model.classes_)
+    if unknown:
+        raise ValueError(f"New data has classes the deployed model has never seen: {sorted(unknown)}; run a full retrain")
+
+    if not lineage["generations"]:
+        # Model trained before lineage was recorded: count its trees as generation 0
+        lineage["generations"].append({"generation": 0, "mode": "unknown", "run_id": None,
+                                       "n_trees": len(model.estimators_)})
+        lineage["tree_generations"] = [0] * len(model.estimators_)
+    generation = len(lineage["generations"])
+    tree_generations = lineage["tree_generations"]
+
+    new_scaler = copy.deepcopy(scaler).partial_fit(X_new)
+    X_new_scaled = new_scaler.transform(X_new)
+
+    # Only the new slice is fitted; a fresh seed per generation keeps the added trees distinct
+    added = RandomForestClassifier(**{**hyperparameters,
+                                      "n_estimators": incremental_params["trees_per_update"],
+                                      "random_state": (hyperparameters.get("random_state") or 0) + generation})
+    added.fit(X_new_scaled, y_new)
+
+    old_trees = []
+    for estimator in model.estimators_:
+        estimator = copy.copy(estimator)
+        estimator.tree_ = rescale_tree(estimator.tree_, scaler, new_scaler)
+        old_trees.append(estimator)
+    new_trees = [align_tree_classes(estimator, added.classes_, model.classes_) for estimator in added.estimators_]
+
+    # Retirement policy: drop trees past max_tree_age generations, then the oldest beyond max_trees
+    trees = list(zip(tree_generations, old_trees)) + [(generation, estimator) for estimator in new_trees]
+    if incremental_params["max_tree_age"] is not None:
+        trees = [(g, estimator) for g, estimator in trees if generation - g <= incremental_params["max_tree_age"]]
+    trees = trees[-incremental_params["max_trees"]:]
+    n_retired = len(old_trees) + len(new_trees) - len(trees)
+
+    updated = copy.copy(model)
+    updated.estimators_ = [estimator for _, estimator in trees]
+    updated.n_estimators = len(trees)
+    lineage["tree_generations"] = [g for g, _ in trees]
+    return updated, new_scaler, n_retired
+
+
+def update_sample(sample, sample_keys, chunk, rng, sample_rows):
+    """Keep the ``sample_rows`` rows with the smallest random keys, a uniform sample of every chunk seen so far"""
+    keys = rng.random(len(chunk))
+    if sample is not None:
+        chunk, keys = pd.concat([sample, chunk], ignore_index=True), np.concatenate([sample_keys, keys])
+    keep = np.argsort(keys)[:sample_rows]
+    return chunk.iloc[keep].reset_index(drop=True), keys[keep]
+
+
+def scan_training_file(train_file, chunk_size, sample_rows, seed=0, hashes_path=None):
+    """First streaming pass: scaler statistics, class list, row count and a uniform row sample.
+
+    The sample keeps the ``sample_rows`` rows with the smallest random keys
+    seen so far, so it stays bounded and uniform over the whole file. Row
+    hashes are streamed to ``hashes_path``, when given, chunk by chunk.
+    """
+    scaler = StandardScaler()
+    rng = np.random.default_rng(seed)
+    class_rows, sample, sample_keys = {}, None, None
+    n_rows = n_chunks = 0
+    hashes_file = open(hashes_path, "wb") if hashes_path else None
+    for chunk in iter_table_chunks(train_file, chunk_size):
+        if hashes_file is not None:
+            row_hashes(chunk).tofile(hashes_file)
+        X = chunk.drop("species", axis=1)
+        scaler.partial_fit(X)
+        for index, label in chunk.groupby("species").head(1)["species"].items():
+            class_rows.setdefault(label, chunk.loc[[index]])
+
+        sample, sample_keys = update_sample(sample, sample_keys, chunk, rng, sample_rows)
+        n_rows += len(X)
+        n_chunks += 1
+    if hashes_file is not None:
+        hashes_file.close()
+    if n_rows == 0:
+        raise ValueError(f"No rows in {train_file}")
+
+    seed_rows = pd.concat([class_rows[label] for label in sorted(class_rows)], ignore_index=True)
+    return scaler, np.array(sorted(class_rows)), seed_rows, sample, n_rows, n_chunks
+
+
+def scan_new_rows(train_file, chunk_size, consumed, sample_rows, seed=0):
+    """Stream the training file, keeping the rows not fitted on yet and a bounded uniform sample of the rest.
+
+    Rows are hashed chunk by chunk, so memory is bounded by the new rows, one
+    chunk and the sample rather than the file size. Returns the new rows,
+    their hashes, the sample and the total row count.
+    """
+    rng = np.random.default_rng(seed)
+    new_chunks, new_hashes, sample, sample_keys = [], [], None, None
+    n_rows = 0
+    for chunk in iter_table_chunks(train_file, chunk_size):
+        hashes = row_hashes(chunk)
+        new = consumed.new_rows(hashes)
+        new_chunks.append(chunk[new])
+        new_hashes.append(hashes[new])
+        if not new.all():
+            sample, sample_keys = update_sample(sample, sample_keys, chunk[~new], rng, sample_rows)
+        n_rows += len(chunk)
+    if n_rows == 0:
+        raise ValueError(f"No rows in {train_file}")
+
+    new_rows = pd.concat(new_chunks, ignore_index=True)
+    return new_rows, np.concatenate(new_hashes), sample, n_rows
+
+
+def fit_chunk_trees(X, y, classes, hyperparameters, n_trees, seed):
+    """Fit ``n_trees`` bootstrap trees on one chunk, widened to the full class list"""
+    forest = RandomForestClassifier(**{**hyperparameters, "n_estimators": n_trees, "random_state": seed, "n_jobs": 1})
+    forest.fit(X, y)
+    return [align_tree_classes(estimator, forest.classes_, classes) for estimator in forest.estimators_]
+
+
+def train_out_of_core(train_file, hyperparameters, out_of_core_params, hashes_path=None):
+    """Train a forest without loading the training file: one pass for the scaler, one to grow trees per chunk.
+
+    Each chunk contributes ``trees_per_chunk`` trees (by default enough for
+    ``n_estimators`` in total). Peak memory is bounded by the in-flight
+    chunks and the row sample, not the file size. Returns the model, the
+    scaler, the row sample (for metrics and the drift baseline) and the row count.
+    """
+    chunk_size = out_of_core_params["chunk_size"]
+    scaler, classes, seed_rows, sample, n_rows, n_chunks = scan_training_file(
+        train_file, chunk_size, out_of_core_params["sample_rows"], hyperparameters.get("random_state") or 0,
+        hashes_path)
+
+    trees_per_chunk = (out_of_core_params["trees_per_chunk"]
+                       or math.ceil(hyperparameters.get("n_estimators", 100) / n_chunks))
+    base_seed = hyperparameters.get("random_state") or 0
+    n_jobs = out_of_core_params["n_jobs"] or os.cpu_count()
+    print(f"Out-of-core training: {n_rows} rows in {n_chunks} chunks, {trees_per_chunk} trees per chunk, {n_jobs} workers")
+
+    def jobs():
+        for i, chunk in enumerate(iter_table_chunks(train_file, chunk_size)):
+            X = scaler.transform(chunk.drop("species", axis=1))
+            yield X, chunk["species"].to_numpy(), classes, hyperparameters, trees_per_chunk, base_seed + i
+
+    estimators = []
+    if n_jobs == 1:
+        for job in jobs():
+            estimators.extend(fit_chunk_trees(*job))
+    else:
+        # Bounded in-flight window so the reader never gets more than 2 chunks per worker ahead
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            in_flight = deque()
+            for job in jobs():
+                if len(in_flight) >= 2 * n_jobs:
+                    estimators.extend(in_flight.popleft().result())
+                in_flight.append(pool.submit(fit_chunk_trees, *job))
+            while in_flight:
+                estimators.extend(in_flight.popleft().result())
+
+    # Fit a one-tree shell on one row per class so every forest attribute is set, then swap in the trees
+    model = RandomForestClassifier(**{**hyperparameters, "n_estimators": 1})
+    model.fit(scaler.transform(seed_rows.drop("species", axis=1)), seed_rows["species"])
+    model.estimators_ = estimators
+    model.n_estimators = len(estimators)
+    return model, scaler, sample, n_rows
+
+
+def train_model(train_file, model_path, scaler_path, mode=None):
     
     # Load Params
     params = load_params()
     train_params = params["train"]
     mlflow_params = params["mlflow"]
+    hyperparameters = load_hyperparameters(train_params)
+    mode = mode or train_params["mode"]
+    if mode not in ("full", "incremental", "out_of_core"):
+        raise ValueError(f"Unknown training mode: {mode}")
+    if mode == "incremental" and not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+        print(f"No previous model at {model_path}, falling back to a full retrain")
+        mode = "full"
+
+    lineage_path = train_params["lineage_path"]
+    consumed_rows_path = train_params["consumed_rows_path"]
+    lineage = load_lineage(lineage_path) if mode == "incremental" else {"generations": [], "tree_generations": []}
 
-    print("Starting Model Training...")
+    print(f"Starting Model Training ({mode})...")
 
     mlflow.set_experiment(mlflow_params["experiment_name"])
-    with mlflow.start_run():
-        # Prepare Data
-        df = pd.read_csv(train_file)
+    with mlflow.start_run() as run:
+        if train_params["algorithm"] != "random_forest":
+            raise ValueError(f"Unknown Model Algorithm: {train_params['algorithm']}")
+
+        # Prepare Data; out-of-core training streams the file and keeps only a bounded row sample
+        if mode == "out_of_core":
+            model, scaler, df, n_samples = train_out_of_core(train_file, hyperparameters, train_params["out_of_core"],
+                                                             consumed_rows_path + ".tmp")
+        elif mode == "incremental":
+            # Only the rows the deployed model has not been fitted on are kept, plus a bounded sample of
+            # the others for the training metrics, so the scaler never counts a row twice
+            consumed = load_consumed_rows(consumed_rows_path)
+            if not len(consumed):
+                print(f"No record of consumed rows at {consumed_rows_path}; treating every row as new")
+            new_df, new_hashes, sample, n_samples = scan_new_rows(
+                train_file, train_params["out_of_core"]["chunk_size"], ConsumedRows(consumed),
+                train_params["out_of_core"]["sample_rows"], hyperparameters.get("random_state") or 0)
+            df = pd.concat([new_df, sample], ignore_index=True) if sample is not None else new_df
+        else:
+            df = read_table(train_file)
+            n_samples = len(df)
         X_train = df.drop("species", axis=1)
         y_train = df['species']
 
-        scaler = StandardScaler()
+        n_new_rows = n_samples
+        if mode == "out_of_core":
+            X_train_scaled = scaler.transform(X_train)
+            n_added, n_retired = len(model.estimators_), 0
+            lineage["tree_generations"] = [0] * len(model.estimators_)
+        elif mode == "incremental":
+            # Warm start from the deployed model; the trees are fitted on the new rows only. Finding them
+            # takes one streamed pass over the file, everything after that scales with the new rows
+            n_new_rows = len(new_df)
+            model = joblib.load(model_path)
+            scaler = joblib.load(scaler_path)
+            n_added = n_retired = 0
+            if n_new_rows:
+                model, scaler, n_retired = incremental_update(model, scaler, new_df.drop("species", axis=1),
+                                                              new_df["species"], hyperparameters,
+                                                              train_params["incremental"], lineage)
+                n_added = train_params["incremental"]["trees_per_update"]
+            else:
+                print(f"All {n_samples} rows of {train_file} were already fitted on; model unchanged")
+            X_train_scaled = scaler.transform(X_train)
+        else:
+            scaler = StandardScaler()
 
-        X_train_scaled = scaler.fit_transform(X_train)
+            X_train_scaled = scaler.fit_transform(X_train)
 
-        # Prepare Model
-        if train_params["algorithm"] == "random_forest":
-            model = RandomForestClassifier(**train_params["hyperparameters"])
-        else:
-            raise ValueError(f"Unknown Model Algorithm: {train_params['algorithm']}")
-        
-        # Train Model
-        model.fit(X_train_scaled, y_train)
+            # Prepare Model
+            model = RandomForestClassifier(**hyperparameters)
+            
+            # Train Model
+            model.fit(X_train_scaled, y_train)
+            n_added, n_retired = len(model.estimators_), 0
+            lineage["tree_generations"] = [0] * len(model.estimators_)
 
-        # Calculate Training metrics
+        # Calculate Training metrics (on the row sample when training out of core, on the new rows
+        # plus a sample of the others after an incremental update)
         y_pred_train = model.predict(X_train_scaled)
         train_accuracy = accuracy_score(y_train, y_pred_train)
 
+        # Record Lineage: which run each generation of trees came from
+        previous_run_id = lineage["generations"][-1]["run_id"] if lineage["generations"] else None
+        lineage["generations"].append({
+            "generation": len(lineage["generations"]),
+            "mode": mode,
+            "run_id": run.info.run_id,
+            "parent_run_id": previous_run_id,
+            "train_file": train_file,
+            "train_file_sha256": file_sha256(train_file),
+            "n_samples": n_samples,
+            "n_new_rows": n_new_rows,
+            "trees_added": n_added,
+            "trees_retired": n_retired,
+            "n_trees": len(model.estimators_),
+        })
+
         # Track Experiment Using MLflow
-        mlflow.log_params(train_params["hyperparameters"])
+        mlflow.log_params(hyperparameters)
+        mlflow.log_param("train_mode", mode)
+        mlflow.set_tags({"lineage.generation": len(lineage["generations"]) - 1,
+                         "lineage.parent_run_id": previous_run_id or ""})
         mlflow.log_metric("Train-Accuracy", train_accuracy)
+        mlflow.log_metrics({"trees_added": n_added, "trees_retired": n_retired, "n_trees": len(model.estimators_)})
+        mlflow.log_dict(lineage, "lineage.json")
         mlflow.sklearn.log_model(model, "model")
 
         # Save Metrics
         metrics = {
             "algorithm": train_params["algorithm"],
+            "mode": mode,
             "accuracy": train_accuracy,
-            "n_samples": len(X_train_scaled)
+            "n_samples": n_samples,
+            "n_trees": len(model.estimators_)
         }
 
         if not os.path.exists("metrics"):
@@ -77,18 +432,39 @@ def train_model(train_file, model_path, scaler_path):
 
         joblib.dump(model, model_path)
         joblib.dump(scaler, scaler_path)
+        with open(lineage_path, "w") as f:
+            json.dump(lineage, f, indent=2)
+
+        # Record the rows the saved model has been fitted on: all of them after a full or
+        # out-of-core fit, the previous record plus the new rows after an incremental update
+        if mode == "out_of_core":
+            os.replace(consumed_rows_path + ".tmp", consumed_rows_path)
+        elif mode == "incremental":
+            with open(consumed_rows_path, "ab") as f:
+                new_hashes.tofile(f)
+        else:
+            row_hashes(df).tofile(consumed_rows_path)
+
+        # Save Drift Baseline (raw feature distributions, shipped with the model); an incremental
+        # update keeps the existing one, which describes the data most of the trees were fitted on
+        if mode != "incremental" or not os.path.exists(train_params["drift_baseline_path"]):
+            drift_baseline = compute_drift_baseline(df, list(X_train.columns), train_params["drift_bins"])
+            save_drift_baseline(drift_baseline, train_params["drift_baseline_path"])
+            mlflow.log_dict(drift_baseline, "drift_baseline.json")
 
-        print(f"Model trained with {train_params['algorithm']}")
+        print(f"Model trained with {train_params['algorithm']} ({mode}): "
+              f"{n_added} trees added, {n_retired} retired, {len(model.estimators_)} in the forest")
         print(f"Training accuracy: {train_accuracy:.4f}")
         print(f"Model saved to: {model_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python src/train_model.py <train_file> <model_file> <scaler_file>")
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python src/train_model.py <train_file> <model_file> <scaler_file> [full|incremental|out_of_core]")
         sys.exit(1)
     
     train_file = sys.argv[1]
     model_file = sys.argv[2]
     scaler_file = sys.argv[3]
+    mode = sys.argv[4] if len(sys.argv) == 5 else None
     
-    train_model(train_file, model_file, scaler_file)
\ No newline at end of file
+    train_model(train_file, model_file, scaler_file, mode)
\ No newline at end of file
@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def float32_floor(values: np.ndarray) -> np.ndarray:
+    """Largest float32 values <= the inputs.
+
+    Features are compared as float32, so ``x <= float32_floor(t)`` holds
+    exactly when ``x <= t`` and thresholds can be stored at half the size.
+    """
+    rounded = np.asarray(values, dtype=np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
@@ -0,0 +1,202 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import hashlib
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mlflow
+import numpy as np
+import yaml
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from src.data_io import read_table
+
+# Fold arrays, loaded once per worker process by init_worker
+_folds = None
+
+
+def load_params():
+    with open("params.yaml", "r") as f:
+        return yaml.safe_load(f)
+
+
+def fold_cache_path(train_file, tune_params):
+    """Cache file keyed by the training data and the CV settings"""
+    digest = hashlib.sha256()
+    with open(train_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps([tune_params["cv_folds"], tune_params["random_state"]]).encode())
+    return os.path.join(tune_params["fold_cache_dir"], f"folds-{digest.hexdigest()[:16]}.npz")
+
+
+def build_folds(train_file, tune_params):
+    """Split and scale the CV folds once, reusing the cached arrays when the data has not changed"""
+    path = fold_cache_path(train_file, tune_params)
+    if os.path.exists(path):
+        print(f"Using cached folds: {path}")
+        return path
+
+    df = read_table(train_file)
+    X = df.drop("species", axis=1).to_numpy(dtype=np.float64)
+    y = df["species"].to_numpy()
+
+    arrays = {}
+    splitter = StratifiedKFold(tune_params["cv_folds"], shuffle=True, random_state=tune_params["random_state"])
+    for i, (train_index, val_index) in enumerate(splitter.split(X, y)):
+        # Scaler fitted on the training part of each fold, as train_model does on the full split
+        scaler = StandardScaler().fit(X[train_index])
+        arrays[f"X_train_{i}"] = scaler.transform(X[train_index])
+        arrays[f"y_train_{i}"] = y[train_index]
+        arrays[f"X_val_{i}"] = scaler.transform(X[val_index])
+        arrays[f"y_val_{i}"] = y[val_index]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, **arrays)
+    print(f"Cached {tune_params['cv_folds']} folds: {path}")
+    return path
+
+
+def init_worker(folds_path, n_folds):
+    """Load the cached folds once per worker process"""
+    global _folds
+    with np.load(folds_path, allow_pickle=True) as data:
+        _folds = [(data[f"X_train_{i}"], data[f"y_train_{i}"], data[f"X_val_{i}"], data[f"y_val_{i}"])
+                  for i in range(n_folds)]
+
+
+def predict_latency_ms(model, X, batch_size, repeats=20):
+    """Median predict latency for a batch of validation rows"""
+    batch = X[np.arange(batch_size) % len(X)]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def run_trial(trial_id, hyperparameters, latency_batch_size):
+    """Fit and score one candidate on every cached fold"""
+    accuracies, latencies = [], []
+    start = time.perf_counter()
+    for X_train, y_train, X_val, y_val in _folds:
+        # Single-threaded fits: the process pool provides the parallelism
+        model = RandomForestClassifier(**hyperparameters, n_jobs=1).fit(X_train, y_train)
+        accuracies.append(accuracy_score(y_val, model.predict(X_val)))
+        latencies.append(predict_latency_ms(model, X_val, latency_batch_size))
+    return {
+        "trial": trial_id,
+        "hyperparameters": hyperparameters,
+        "cv_accuracy": float(np.mean(accuracies)),
+        "cv_accuracy_std": float(np.std(accuracies)),
+        "predict_latency_ms": float(np.median(latencies)),
+        "fit_seconds": time.perf_counter() - start,
+    }
+
+
+def candidates(tune_params):
+    """Grid or random sample of the search space, each merged over the base hyperparameters"""
+    space = tune_params["search_space"]
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if tune_params["strategy"] == "random" and tune_params["n_trials"] < len(grid):
+        rng = np.random.default_rng(tune_params["random_state"])
+        grid = [grid[i] for i in sorted(rng.choice(len(grid), tune_params["n_trials"], replace=False))]
+    elif tune_params["strategy"] not in ("grid", "random"):
+        raise ValueError(f"Unknown search strategy: {tune_params['strategy']}")
+    return grid
+
+
+def objective(result, latency_weight):
+    """Higher is better: CV accuracy minus a penalty per millisecond of predict latency"""
+    return result["cv_accuracy"] - latency_weight * result["predict_latency_ms"]
+
+
+def flush_trials(client, run_id, pending):
+    """Log buffered trials to the parent run in one request per batch"""
+    metrics = []
+    timestamp = int(time.time() * 1000)
+    for result in pending:
+        for key in ("cv_accuracy", "cv_accuracy_std", "predict_latency_ms", "objective"):
+            metrics.append(Metric(f"trial_{key}", result[key], timestamp, result["trial"]))
+    # MLflow accepts at most 1000 metrics per batch
+    for start in range(0, len(metrics), 1000):
+        client.log_batch(run_id, metrics=metrics[start:start + 1000])
+    pending.clear()
+
+
+def tune_model(train_file, best_params_file):
+
+    # Load Params
+    params = load_params()
+    tune_params = params["tune"]
+    base_hyperparameters = params["train"]["hyperparameters"]
+    mlflow_params = params["mlflow"]
+
+    folds_path = build_folds(train_file, tune_params)
+    trials = [{**base_hyperparameters, **candidate} for candidate in candidates(tune_params)]
+    n_workers = tune_params["n_jobs"] or os.cpu_count()
+    print(f"Running {len(trials)} trials x {tune_params['cv_folds']} folds on {n_workers} workers...")
+
+    mlflow.set_experiment(mlflow_params["experiment_name"])
+    client = MlflowClient()
+    results, pending = [], []
+    with mlflow.start_run(run_name="tune_model") as run:
+        client.log_batch(run.info.run_id, params=[
+            Param(key, str(tune_params[key]))
+            for key in ("strategy", "n_trials", "cv_folds", "latency_weight", "latency_batch_size")
+        ])
+
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker,
+                                 initargs=(folds_path, tune_params["cv_folds"])) as pool:
+            futures = [pool.submit(run_trial, i, hyperparameters, tune_params["latency_batch_size"])
+                       for i, hyperparameters in enumerate(trials)]
+            for future in as_completed(futures):
+                result = future.result()
+                result["objective"] = objective(result, tune_params["latency_weight"])
+                results.append(result)
+                pending.append(result)
+                print(f"Trial {result['trial']:>3}: accuracy {result['cv_accuracy']:.4f} "
+                      f"latency {result['predict_latency_ms']:.2f} ms {result['hyperparameters']}")
+                if len(pending) >= tune_params["log_batch_size"]:
+                    flush_trials(client, run.info.run_id, pending)
+        flush_trials(client, run.info.run_id, pending)
+
+        results.sort(key=lambda r: r["trial"])
+        best = max(results, key=lambda r: (r["objective"], -r["predict_latency_ms"]))
+        mlflow.log_params({f"best_{key}": value for key, value in best["hyperparameters"].items()})
+        mlflow.log_metrics({"best_cv_accuracy": best["cv_accuracy"],
+                            "best_predict_latency_ms": best["predict_latency_ms"],
+                            "best_objective": best["objective"]})
+        mlflow.log_dict({"trials": results}, "tune_trials.json")
+
+    if os.path.dirname(best_params_file):
+        os.makedirs(os.path.dirname(best_params_file), exist_ok=True)
+    with open(best_params_file, "w") as f:
+        json.dump({
+            "hyperparameters": best["hyperparameters"],
+            "cv_accuracy": best["cv_accuracy"],
+            "predict_latency_ms": best["predict_latency_ms"],
+            "objective": best["objective"],
+            "n_trials": len(results),
+        }, f, indent=2)
+
+    print(f"Best trial {best['trial']}: accuracy {best['cv_accuracy']:.4f}, "
+          f"latency {best['predict_latency_ms']:.2f} ms, {best['hyperparameters']}")
+    print(f"Best hyperparameters saved to: {best_params_file}")
+    return best
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python src/tune_model.py <train_file> <best_params_file>")
+        sys.exit(1)
+
+    tune_model(sys.argv[1], sys.argv[2])
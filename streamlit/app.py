@@ -3,6 +3,8 @@ import requests
 import pandas as pd
 import plotly.express as px
 import json
+import tempfile
+from batch_client import score_csv
 
 # Page config
 st.set_page_config(page_title="Iris Classifier", page_icon="🌸", layout="wide")
@@ -25,6 +27,10 @@ with st.sidebar:
 # API endpoint
 API_BASE = "http://your-alb-url"  # Replace with actual ALB URL
 
+# Batch uploads: rows per request and requests in flight
+BATCH_CHUNK_ROWS = 5000
+BATCH_WORKERS = 4
+
 if page == "Prediction":
     st.header("Single Prediction")
     
@@ -72,43 +78,42 @@ elif page == "Batch Upload":
     uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
     
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
         st.write("Preview of uploaded data:")
-        st.dataframe(df.head())
+        st.dataframe(pd.read_csv(uploaded_file, nrows=5))
         
         if st.button("Process Batch"):
-            # Convert DataFrame to API format
-            batch_data = []
-            for _, row in df.iterrows():
-                batch_data.append({
-                    "sepal_length": float(row['sepal_length']),
-                    "sepal_width": float(row['sepal_width']),
-                    "petal_length": float(row['petal_length']),
-                    "petal_width": float(row['petal_width'])
-                })
+            # Count rows for the progress bar without parsing the file
+            total_rows = max(uploaded_file.getvalue().count(b"\n") - 1, 1)
+            uploaded_file.seek(0)
+            progress = st.progress(0.0, text="Scoring...")
             
-            payload = {"features": batch_data}
+            def show_progress(rows_done):
+                progress.progress(min(rows_done / total_rows, 1.0), text=f"Scored {rows_done:,} rows")
             
+            # Chunks are scored concurrently over a pooled session and written out in order,
+            # so only the results file grows with the upload
+            output = tempfile.NamedTemporaryFile("w+", suffix=".csv", newline="")
             try:
-                response = requests.post(f"{API_BASE}/predict_batch", json=payload)
-                if response.status_code == 200:
-                    results = response.json()
-                    df['predictions'] = results['predictions']
-                    
-                    st.success(f"Processed {results['count']} predictions!")
-                    st.dataframe(df)
-                    
-                    # Download results
-                    csv = df.to_csv(index=False)
-                    st.download_button("Download Results", csv, "predictions.csv")
-                    
-                    # Show distribution chart
-                    fig = px.histogram(df, x='predictions', title="Prediction Distribution")
-                    st.plotly_chart(fig)
-                else:
-                    st.error("Batch processing failed")
+                counts = score_csv(uploaded_file, output, API_BASE, chunk_size=BATCH_CHUNK_ROWS,
+                                   workers=BATCH_WORKERS, on_progress=show_progress)
+                output.flush()
+                output.seek(0)
+                
+                st.success(f"Processed {sum(counts.values()):,} predictions!")
+                st.dataframe(pd.read_csv(output.name, nrows=1000))
+                
+                # Download results
+                with open(output.name, "rb") as results:
+                    st.download_button("Download Results", results, "predictions.csv")
+                
+                # Show distribution chart
+                fig = px.bar(x=list(counts.keys()), y=list(counts.values()),
+                             labels={"x": "predictions", "y": "count"}, title="Prediction Distribution")
+                st.plotly_chart(fig)
             except Exception as e:
-                st.error(f"Error: {str(e)}")
+                st.error(f"Batch processing failed: {str(e)}")
+            finally:
+                output.close()
 
 elif page == "Monitoring":
     st.header("System Monitoring")
@@ -0,0 +1,185 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import asyncio
+import threading
+import time
+import pytest
+from admission import CircuitBreaker, ConcurrencyLimiter, Overloaded
+
+
+def test_limiter_sheds_when_queue_is_full():
+    """Requests beyond in-flight + queue capacity are rejected immediately"""
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0, deadline_seconds=1.0)
+    release = threading.Event()
+
+    def hold():
+        with limiter.admit():
+            release.wait(1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while limiter.in_flight == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(Overloaded) as exc_info:
+        with limiter.admit():
+            pass
+    assert exc_info.value.reason == "queue_full"
+    assert exc_info.value.retry_after >= 1
+
+    release.set()
+    holder.join()
+    with limiter.admit():
+        assert limiter.in_flight == 1
+
+
+def test_limiter_times_out_queued_requests():
+    """A queued request gives up once the deadline passes"""
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=4, deadline_seconds=0.05)
+    release = threading.Event()
+
+    def hold():
+        with limiter.admit():
+            release.wait(1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while limiter.in_flight == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(Overloaded) as exc_info:
+        with limiter.admit():
+            pass
+    assert exc_info.value.reason == "timeout"
+    assert limiter.queued == 0
+    release.set()
+    holder.join()
+
+
+def test_breaker_opens_on_error_rate_and_recovers():
+    """The breaker opens past the error rate and a successful probe closes it"""
+    breaker = CircuitBreaker(window_seconds=10, min_requests=4, error_rate_threshold=0.5, recovery_timeout=0.05)
+
+    for success in [True, False, True]:
+        breaker.record(success)
+    assert breaker.allow()
+
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.error_rate() == 0.0
+
+
+def test_lost_probe_does_not_keep_the_breaker_half_open():
+    """An abandoned or silent probe lets the next probe through"""
+    breaker = CircuitBreaker(window_seconds=10, min_requests=1, error_rate_threshold=0.5, recovery_timeout=0.01,
+                             probe_timeout=0.05)
+    breaker.record(False)
+    time.sleep(0.02)
+
+    probe = breaker.allow()
+    assert probe
+    breaker.abandon(probe)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_only_the_probe_settles_a_half_open_breaker():
+    """A request admitted before the breaker opened cannot free or decide the probe"""
+    breaker = CircuitBreaker(window_seconds=10, min_requests=2, error_rate_threshold=0.5, recovery_timeout=0.01)
+    straggler = breaker.allow()
+    breaker.record(False, breaker.allow())
+    breaker.record(False, breaker.allow())
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.02)
+
+    probe = breaker.allow()
+    assert probe and probe != straggler
+    breaker.abandon(straggler)
+    assert not breaker.allow()
+    breaker.record(False, straggler)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.abandon(probe)
+    probe = breaker.allow()
+    assert probe
+    breaker.record(True, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_async_admission_waits_without_blocking_the_loop():
+    """Coroutines queue for a slot on the event loop and are shed once the queue is full"""
+    limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=2, deadline_seconds=1.0)
+    active = []
+    peak = []
+
+    async def request():
+        async with limiter.admit_async():
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.02)
+            active.pop()
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(*[request() for _ in range(5)], return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert results.count("ok") == 4
+    shed = [r for r in results if isinstance(r, Overloaded)]
+    assert len(shed) == 1 and shed[0].reason == "queue_full"
+    assert max(peak) == 2
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_async_waiter_gets_slot_released_by_a_thread():
+    """A slot freed by a thread wakes a coroutine waiting on another event loop"""
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, deadline_seconds=1.0)
+    release = threading.Event()
+
+    def hold():
+        with limiter.admit():
+            release.wait(1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while limiter.in_flight == 0:
+        time.sleep(0.001)
+
+    async def waiter():
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        start = time.monotonic()
+        async with limiter.admit_async():
+            return time.monotonic() - start
+
+    waited = asyncio.run(waiter())
+    holder.join()
+
+    assert 0.04 < waited < 0.5
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_async_waiter_times_out_at_the_deadline():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, deadline_seconds=0.05)
+
+    async def run():
+        async with limiter.admit_async():
+            with pytest.raises(Overloaded) as exc_info:
+                async with limiter.admit_async():
+                    pass
+            return exc_info.value.reason
+
+    assert asyncio.run(run()) == "timeout"
+    assert limiter.in_flight == 0 and limiter.queued == 0
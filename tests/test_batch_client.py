@@ -0,0 +1,103 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'streamlit')))
+
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+import requests
+from batch_client import iter_predictions, make_session, score_csv
+
+
+class StubScorer(BaseHTTPRequestHandler):
+    """Scores CSV bodies by petal length; sheds the first request of each chunk with a 503"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        chunk = pd.read_csv(io.BytesIO(body))
+        first = chunk["petal_length"].iloc[0]
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            shed = first not in self.server.shed
+            self.server.shed.add(first)
+        if shed:
+            self.reply(503, b"overloaded", {"Retry-After": "0"})
+            return
+        predictions = ["setosa" if p < 2.5 else "virginica" for p in chunk["petal_length"]]
+        self.reply(200, json.dumps({"predictions": predictions, "count": len(predictions)}).encode())
+
+    def reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubScorer)
+    httpd.lock, httpd.connections, httpd.shed = threading.Lock(), set(), set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_csv(n_rows):
+    # Unique petal lengths let the stub tell chunks apart
+    petal_length = [1.0 + i / 100 for i in range(n_rows)]
+    return pd.DataFrame({"id": range(n_rows), "sepal_length": 5.0, "sepal_width": 3.0,
+                         "petal_length": petal_length, "petal_width": 1.0}).to_csv(index=False)
+
+
+def test_score_csv_keeps_input_order_through_retries(server):
+    httpd, api_base = server
+    output = io.StringIO()
+    progress = []
+
+    counts = score_csv(io.StringIO(make_csv(1000)), output, api_base, chunk_size=64, workers=4,
+                       session=make_session(pool_size=4, backoff_seconds=0), on_progress=progress.append)
+
+    result = pd.read_csv(io.StringIO(output.getvalue()))
+    assert result["id"].tolist() == list(range(1000))
+    assert (result["predictions"] == result["petal_length"].lt(2.5).map({True: "setosa", False: "virginica"})).all()
+    assert counts == {"setosa": 150, "virginica": 850}
+    assert progress == sorted(progress) and progress[-1] == 1000
+    # 16 chunks, each shed once, over at most one keep-alive connection per worker
+    assert len(httpd.shed) == 16
+    assert len(httpd.connections) <= 4
+
+
+def test_reads_ahead_a_bounded_number_of_chunks(server):
+    _, api_base = server
+    read = []
+
+    def chunks():
+        for chunk in pd.read_csv(io.StringIO(make_csv(400)), chunksize=10):
+            read.append(len(chunk))
+            yield chunk
+
+    predictions = iter_predictions(chunks(), api_base, workers=2, session=make_session(2, backoff_seconds=0))
+    next(predictions)
+    assert len(read) <= 2 * 2 + 1
+    predictions.close()
+
+
+def test_gives_up_after_retries(server):
+    httpd, api_base = server
+    session = make_session(pool_size=1, retries=0)
+    chunk = pd.read_csv(io.StringIO(make_csv(5)))
+    with pytest.raises(requests.HTTPError):
+        list(iter_predictions([chunk], api_base, workers=1, session=session))
+
+    with pytest.raises(ValueError):
+        list(iter_predictions([chunk[["id"]]], api_base, workers=1, session=session))
@@ -0,0 +1,34 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+from benchmarks.bench_async_apis import StandinRunner, capacity, drift_monitor, make_batches, run_benchmark
+
+
+def test_async_handler_serves_more_concurrent_requests_than_the_threadpool():
+    batches = make_batches(20, n_batches=4)
+    results = asyncio.run(run_benchmark(StandinRunner(service_ms=20, row_us=0), drift_monitor(), batches,
+                                        levels=[32], duration=0.5, chunk_size=1000, max_concurrent_chunks=4,
+                                        threadpool_size=4))
+
+    sync, async_ = results["sync"][0], results["async"][0]
+    assert sync["error_rate"] == 0 and async_["error_rate"] == 0
+    # Four threads cap the blocking handler at ~4 / 20 ms; the async handler is not capped by threads
+    assert sync["throughput_rps"] < 250
+    assert async_["throughput_rps"] > 3 * sync["throughput_rps"]
+
+
+def test_chunks_of_one_request_are_scored_concurrently():
+    # 4 chunks of 25 rows, each a 20 ms runner call: concurrent chunks finish in ~one call
+    results = asyncio.run(run_benchmark(StandinRunner(service_ms=20, row_us=0), drift_monitor(),
+                                        make_batches(100, n_batches=1), levels=[1], duration=0.3,
+                                        chunk_size=25, max_concurrent_chunks=4, threadpool_size=4))
+
+    assert results["async"][0]["p50_ms"] < 40 < results["sync"][0]["p50_ms"]
+
+
+def test_capacity_is_the_highest_level_within_budget():
+    curve = [{"concurrency": 8, "p99_ms": 20.0}, {"concurrency": 64, "p99_ms": 45.0},
+             {"concurrency": 128, "p99_ms": 90.0}]
+    assert capacity(curve, 50) == 64
+    assert capacity(curve, 10) == 0
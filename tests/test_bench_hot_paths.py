@@ -0,0 +1,21 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_hot_paths import build_stages, compare
+
+
+def test_every_stage_runs():
+    stages = build_stages([1, 10], {"n_estimators": 5, "max_depth": 3, "random_state": 42})
+
+    assert "model_predict[10]" in stages and "drift_update[1]" in stages
+    for fn in stages.values():
+        fn()
+
+
+def test_compare_flags_only_stages_over_threshold():
+    baseline = {"scaler_transform[100]": 100.0, "model_predict[100]": 1000.0}
+    results = {"scaler_transform[100]": 130.0, "model_predict[100]": 1100.0, "drift_score": 50.0}
+
+    regressions = compare(results, baseline, threshold=25)
+
+    assert [r[0] for r in regressions] == ["scaler_transform[100]"]
@@ -0,0 +1,73 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from scripts.bulk_score import FEATURE_COLUMNS, bulk_score
+
+
+def make_artifacts(tmp_path, n_rows=1000):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0.1, 8.0, size=(n_rows, 4)).round(2), columns=FEATURE_COLUMNS)
+    y = np.where(X["petal_length"] > 4, "virginica", "setosa")
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(scaler.transform(X), y)
+
+    model_path, scaler_path = str(tmp_path / "model.pkl"), str(tmp_path / "scaler.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    input_path = str(tmp_path / "input.csv")
+    X.to_csv(input_path, index=False)
+    return input_path, model_path, scaler_path, model.predict(scaler.transform(X))
+
+
+def test_bulk_score_preserves_input_order(tmp_path):
+    input_path, model_path, scaler_path, expected = make_artifacts(tmp_path)
+    output_path = str(tmp_path / "scored.csv")
+
+    stats = bulk_score(input_path, output_path, model_path, scaler_path, chunk_size=64, workers=2)
+
+    scored = pd.read_csv(output_path)
+    assert stats["rows"] == 1000
+    assert list(scored.columns) == FEATURE_COLUMNS + ["prediction"]
+    assert (scored["prediction"].to_numpy() == expected).all()
+
+
+def test_bulk_score_resumes_from_checkpoint(tmp_path):
+    input_path, model_path, scaler_path, expected = make_artifacts(tmp_path)
+    output_path = str(tmp_path / "scored.csv")
+
+    bulk_score(input_path, output_path, model_path, scaler_path, chunk_size=100, workers=2,
+               predictions_only=True, max_chunks=3)
+    with open(output_path + ".progress.json") as f:
+        assert json.load(f)["rows_done"] == 300
+
+    # Bytes past the checkpoint (an interrupted write) are discarded on resume
+    with open(output_path, "a") as f:
+        f.write("partial")
+    stats = bulk_score(input_path, output_path, model_path, scaler_path, chunk_size=100, workers=2,
+                       predictions_only=True)
+
+    scored = pd.read_csv(output_path)
+    assert stats["rows"] == 700
+    assert (scored["prediction"].to_numpy() == expected).all()
+    assert not os.path.exists(output_path + ".progress.json")
+
+
+def test_rewritten_input_starts_over(tmp_path):
+    input_path, model_path, scaler_path, expected = make_artifacts(tmp_path)
+    output_path = str(tmp_path / "scored.csv")
+    bulk_score(input_path, output_path, model_path, scaler_path, chunk_size=100, workers=2,
+               predictions_only=True, max_chunks=3)
+
+    # Next night's export lands at the same path
+    input_path, _, _, expected = make_artifacts(tmp_path, n_rows=500)
+    stats = bulk_score(input_path, output_path, model_path, scaler_path, chunk_size=100, workers=2,
+                       predictions_only=True)
+
+    assert stats["rows"] == 500
+    assert (pd.read_csv(output_path)["prediction"].to_numpy() == expected).all()
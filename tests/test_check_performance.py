@@ -0,0 +1,66 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from scripts.check_performance import budget_checks
+from src.evaluate_model import profile_latency
+
+EVAL_PARAMS = {
+    "performance_threshold": 0.90,
+    "budgets": {
+        "p95_latency_ms": {"1": 5.0, "1000": 50.0},
+        "min_throughput_rows_per_second": 10000,
+        "max_peak_memory_mb": 400,
+        "max_artifact_mb": 10,
+    },
+}
+
+
+def eval_metrics(**overrides):
+    metrics = {
+        "accuracy": 0.95,
+        "latency": {"1": {"p95_ms": 2.0, "throughput_rows_per_second": 800.0},
+                    "1000": {"p95_ms": 20.0, "throughput_rows_per_second": 60000.0}},
+        "peak_memory_bytes": 300e6,
+        "artifact_bytes": 2e6,
+    }
+    metrics.update(overrides)
+    return metrics
+
+
+def failed(checks):
+    return {name for name, _, _, passed in checks if not passed}
+
+
+def test_budgets_from_params_gate_promotion():
+    assert failed(budget_checks(eval_metrics(), EVAL_PARAMS)) == set()
+
+    slow = eval_metrics(latency={"1": {"p95_ms": 20.0, "throughput_rows_per_second": 50.0},
+                                 "1000": {"p95_ms": 200.0, "throughput_rows_per_second": 5000.0}})
+    assert failed(budget_checks(slow, EVAL_PARAMS)) == {"p95_latency_ms@1", "p95_latency_ms@1000",
+                                                        "throughput_rows_per_second@1000"}
+    assert failed(budget_checks(eval_metrics(accuracy=0.85, peak_memory_bytes=900e6), EVAL_PARAMS)) == {
+        "accuracy", "peak_memory_mb"}
+    # The accuracy threshold comes from params, not a hardcoded value
+    assert failed(budget_checks(eval_metrics(), {**EVAL_PARAMS, "performance_threshold": 0.97})) == {"accuracy"}
+
+
+def test_unmeasured_budgeted_batch_size_fails():
+    metrics = eval_metrics(latency={"1": {"p95_ms": 2.0, "throughput_rows_per_second": 800.0}})
+    assert "p95_latency_ms@1000" in failed(budget_checks(metrics, EVAL_PARAMS))
+
+
+def test_profile_latency_reports_each_batch_size():
+    X = pd.DataFrame(np.random.default_rng(0).normal(size=(30, 4)))
+    y = np.arange(30) % 3
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(scaler.transform(X), y)
+
+    profile = profile_latency(model, scaler, X, [1, 100], repeats=5)
+
+    assert set(profile) == {"1", "100"}
+    assert all(p["p95_ms"] >= p["p50_ms"] > 0 for p in profile.values())
+    assert profile["100"]["throughput_rows_per_second"] > profile["1"]["throughput_rows_per_second"]
@@ -0,0 +1,61 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from src.compact_model import compact_forest, compact_tree, float32_floor
+
+
+@pytest.fixture(scope="module")
+def iris_scaled():
+    iris = load_iris()
+    return StandardScaler().fit_transform(iris.data), iris.target_names[iris.target]
+
+
+def test_float32_floor_keeps_float32_comparisons():
+    thresholds = np.array([0.1, 1.0 / 3.0, -2.7, 5.55])
+    below = np.nextafter(thresholds.astype(np.float32), np.float32(-np.inf))
+    above = np.nextafter(thresholds.astype(np.float32), np.float32(np.inf))
+
+    floored = float32_floor(thresholds)
+
+    for x in np.concatenate([below, thresholds.astype(np.float32), above]):
+        assert ((np.float32(x) <= thresholds) == (np.float32(x) <= floored)).all()
+
+
+def test_exact_node_pruning_keeps_predictions(iris_scaled):
+    X, y = iris_scaled
+    tree = DecisionTreeClassifier(random_state=0).fit(X, y)
+    compacted = DecisionTreeClassifier(random_state=0).fit(X, y)
+    compacted.tree_ = compact_tree(tree.tree_, "exact")
+
+    X_probe = np.random.default_rng(0).uniform(-3, 3, size=(5000, 4))
+    assert (compacted.predict(X_probe) == tree.predict(X_probe)).all()
+    assert compacted.tree_.node_count <= tree.tree_.node_count
+
+
+def test_same_class_pruning_collapses_redundant_splits(iris_scaled):
+    X, y = iris_scaled
+    tree = DecisionTreeClassifier(min_samples_leaf=5, random_state=0).fit(X, y)
+
+    compacted = compact_tree(tree.tree_, "same_class")
+
+    assert compacted.node_count < tree.tree_.node_count
+    assert compacted.max_depth <= tree.tree_.max_depth
+
+
+def test_compact_forest_drops_trees_within_fidelity(iris_scaled):
+    X, y = iris_scaled
+    model = RandomForestClassifier(n_estimators=50, max_depth=5, random_state=42).fit(X, y)
+    params = {"min_fidelity": 0.99, "min_trees": 5, "probe_copies": 5, "probe_noise": 0.3,
+              "prune_nodes": "exact"}
+
+    compact = compact_forest(model, X, params)
+
+    assert 5 <= len(compact.estimators_) < 50
+    assert np.mean(compact.predict(X) == model.predict(X)) >= 0.99
+    assert len(model.estimators_) == 50
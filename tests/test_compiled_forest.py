@@ -0,0 +1,71 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from compiled_forest import CompiledForest
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """Train scaler and forest the way src/train_model.py does"""
+    iris = load_iris()
+    X = pd.DataFrame(iris.data, columns=['sepal_length', 'sepal_width', 'petal_length', 'petal_width'])
+    y = iris.target_names[iris.target]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    return model, scaler, X_test.to_numpy()
+
+
+def sklearn_predict(model, scaler, X):
+    return model.predict(scaler.transform(pd.DataFrame(X, columns=scaler.feature_names_in_)))
+
+
+def sklearn_proba(model, scaler, X):
+    return model.predict_proba(scaler.transform(pd.DataFrame(X, columns=scaler.feature_names_in_)))
+
+
+def test_parity_on_test_split(trained):
+    """Predictions and probabilities are bit-identical on the test split"""
+    model, scaler, X_test = trained
+    engine = CompiledForest.from_sklearn(model, scaler)
+
+    assert np.array_equal(engine.predict(X_test), sklearn_predict(model, scaler, X_test))
+    assert np.array_equal(engine.predict_proba(X_test), sklearn_proba(model, scaler, X_test))
+
+
+def test_parity_on_random_inputs(trained):
+    """Predictions are bit-identical on random, out-of-range and threshold-sized inputs"""
+    model, scaler, _ = trained
+    engine = CompiledForest.from_sklearn(model, scaler)
+    rng = np.random.default_rng(0)
+
+    X = np.vstack([
+        rng.uniform(0, 8, size=(5000, 4)),
+        rng.normal(0, 100, size=(1000, 4)),
+        np.round(rng.uniform(0, 8, size=(2000, 4)), 1),
+    ])
+
+    assert np.array_equal(engine.predict(X), sklearn_predict(model, scaler, X))
+    assert np.array_equal(engine.predict_proba(X), sklearn_proba(model, scaler, X))
+
+
+def test_save_and_memory_mapped_load(trained):
+    """A saved engine reloads (memory-mapped) with identical predictions"""
+    model, scaler, X_test = trained
+    engine = CompiledForest.from_sklearn(model, scaler)
+
+    with tempfile.TemporaryDirectory() as path:
+        engine.save(path)
+        loaded = CompiledForest.load(path, mmap_mode="r")
+        assert np.array_equal(loaded.predict(X_test), engine.predict(X_test))
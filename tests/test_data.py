@@ -3,7 +3,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
 import pandas as pd
-from src.data_validation import validate_data_schema, validate_data_quality
+from sklearn.datasets import load_iris
+from src.data_io import write_table
+from src.data_validation import validate_data_schema, validate_data_quality, validate_file
 
 def test_data_schema_validation():
     """Test data schema validation"""
@@ -33,4 +35,69 @@ def test_data_quality_validation():
     })
     
     issues = validate_data_quality(df)
-    #  assert len(issues) == 0  # No issues expected
\ No newline at end of file
+    #  assert len(issues) == 0  # No issues expected
+
+SCHEMA = {
+    "label_column": "species",
+    "columns": {
+        "sepal_length": {"dtype": "float", "min": 0.0, "max": 10.0},
+        "sepal_width": {"dtype": "float", "min": 0.0, "max": 10.0},
+        "petal_length": {"dtype": "float", "min": 0.0, "max": 10.0},
+        "petal_width": {"dtype": "float", "min": 0.0, "max": 5.0},
+        "species": {"dtype": "string", "allowed": ["setosa", "versicolor", "virginica"]},
+    },
+    "class_balance": {"min_samples": 1, "min_fraction": 0.1, "max_fraction": 0.6},
+}
+VALIDATION_PARAMS = {"chunk_size": 4, "n_jobs": 1, "hash_partitions": 4, "max_missing": 0, "max_duplicates": 0}
+
+
+def iris_rows():
+    iris = load_iris()
+    df = pd.DataFrame(iris.data, columns=['sepal_length', 'sepal_width', 'petal_length', 'petal_width'])
+    df['species'] = iris.target_names[iris.target]
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet", "feather"])
+def test_streaming_validation_passes_clean_data(tmp_path, data_format):
+    path = str(tmp_path / f"train.{data_format}")
+    write_table(iris_rows(), path)
+
+    report = validate_file(path, SCHEMA, {**VALIDATION_PARAMS, "chunk_size": 16})
+
+    assert report["passed"], [c for c in report["checks"] if not c["passed"]]
+    assert report["rows"] == 149
+    assert report["labels"] == {"setosa": 50, "versicolor": 50, "virginica": 49}
+    assert report["columns"]["petal_width"]["max"] == 2.5
+
+
+def test_streaming_validation_reports_each_issue(tmp_path):
+    df = iris_rows()
+    # Duplicates land in different chunks, so they are only found through the row hashes
+    df = pd.concat([df, df.iloc[[0, 75]]], ignore_index=True)
+    df.loc[10, 'petal_width'] = 7.5
+    df.loc[20, 'sepal_length'] = None
+    df.loc[30, 'species'] = 'unknown'
+    path = str(tmp_path / "train.feather")
+    write_table(df, path)
+
+    report = validate_file(path, SCHEMA, VALIDATION_PARAMS)
+    failed = {c["name"] for c in report["checks"] if not c["passed"]}
+
+    assert failed == {"petal_width.range", "sepal_length.missing", "species.allowed", "duplicates"}
+    assert report["duplicates"] == 2
+    assert report["invalid_labels"] == {"unknown": 1}
+    assert validate_file(path, SCHEMA, {**VALIDATION_PARAMS, "n_jobs": 2})["duplicates"] == 2
+
+
+def test_single_chunk_is_validated_without_worker_processes(tmp_path, monkeypatch):
+    import src.data_validation as data_validation
+    path = str(tmp_path / "train.parquet")
+    write_table(iris_rows(), path)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("worker processes started for a single chunk")
+
+    monkeypatch.setattr(data_validation, "ProcessPoolExecutor", no_pool)
+    report = validate_file(path, SCHEMA, {**VALIDATION_PARAMS, "chunk_size": 1000, "n_jobs": 4})
+    assert report["passed"] and report["rows"] == 149
@@ -0,0 +1,36 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+from src.data_io import read_table, table_columns, table_format, with_format, write_table
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'sepal_length': [5.1, 4.9, 6.3],
+        'sepal_width': [3.5, 3.0, 3.3],
+        'petal_length': [1.4, 1.4, 6.0],
+        'petal_width': [0.2, 0.2, 2.5],
+        'species': ['setosa', 'setosa', 'virginica']
+    }, index=[7, 3, 5])
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet", "feather"])
+def test_round_trip_and_projection(tmp_path, df, data_format):
+    path = with_format(str(tmp_path / "train.csv"), data_format)
+    write_table(df, path, {"parquet_compression": "zstd", "feather_compression": "uncompressed"})
+
+    assert table_format(path) == data_format
+    assert table_columns(path) == list(df.columns)
+    pd.testing.assert_frame_equal(read_table(path), df.reset_index(drop=True))
+    pd.testing.assert_frame_equal(read_table(path, columns=["species", "petal_width"]),
+                                  df[["species", "petal_width"]].reset_index(drop=True))
+
+
+def test_unknown_format_is_rejected(tmp_path, df):
+    with pytest.raises(ValueError):
+        write_table(df, str(tmp_path / "train.xlsx"))
+    with pytest.raises(ValueError):
+        with_format("data/raw/iris.csv", "orc")
@@ -0,0 +1,58 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+from src.drift_baseline import compute_drift_baseline
+from drift import DriftMonitor
+
+FEATURES = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width']
+
+
+def make_baseline():
+    iris = load_iris()
+    df = pd.DataFrame(iris.data, columns=FEATURES)
+    return df, compute_drift_baseline(df, FEATURES, n_bins=10)
+
+
+def test_baseline_proportions():
+    """Baseline bins cover every training row"""
+    _, baseline = make_baseline()
+    for feature in FEATURES:
+        stats = baseline["features"][feature]
+        assert len(stats["proportions"]) == len(stats["bin_edges"]) + 1
+        assert abs(sum(stats["proportions"]) - 1.0) < 1e-9
+
+
+def test_training_data_does_not_drift_but_shifted_data_does():
+    """PSI stays low on training-like traffic and rises on shifted traffic"""
+    df, baseline = make_baseline()
+
+    monitor = DriftMonitor(baseline, FEATURES, min_samples=10)
+    monitor.update(df[FEATURES].to_numpy())
+    scores = monitor.score()
+    assert max(s["psi"] for s in scores.values()) < 0.01
+
+    shifted = DriftMonitor(baseline, FEATURES, min_samples=10)
+    shifted.update(df[FEATURES].to_numpy() + 2.0)
+    scores = shifted.score()
+    assert max(s["psi"] for s in scores.values()) > 0.25
+    assert max(s["ks"] for s in scores.values()) > 0.3
+
+
+def test_window_expires_and_needs_min_samples():
+    """Old slots leave the window and small windows are not scored"""
+    df, baseline = make_baseline()
+    monitor = DriftMonitor(baseline, FEATURES, n_slots=2, slot_seconds=0.05, min_samples=10)
+
+    monitor.update(df[FEATURES].to_numpy()[:5])
+    assert monitor.score() is None
+
+    monitor.update(df[FEATURES].to_numpy())
+    assert monitor.window_size() == len(df) + 5
+
+    import time
+    time.sleep(0.15)
+    assert monitor.window_size() == 0
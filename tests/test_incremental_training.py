@@ -0,0 +1,99 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from src.data_io import write_table
+from src.train_model import ConsumedRows, incremental_update, rescale_tree, row_hashes, scan_new_rows
+
+INCREMENTAL_PARAMS = {"trees_per_update": 5, "max_trees": 12, "max_tree_age": None}
+
+
+@pytest.fixture
+def iris_df():
+    iris = load_iris()
+    df = pd.DataFrame(iris.data, columns=["sepal_length", "sepal_width", "petal_length", "petal_width"])
+    df["species"] = iris.target_names[iris.target]
+    return df.sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture
+def deployed(iris_df):
+    X, y = iris_df.iloc[:100, :4], iris_df["species"][:100]
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(scaler.transform(X), y)
+    return model, scaler
+
+
+def test_rescaled_trees_keep_raw_space_predictions(iris_df, deployed):
+    model, scaler = deployed
+    shifted = StandardScaler().fit(iris_df.iloc[:, :4] * 1.5 + 2.0)
+    # Jittered rows: points exactly on a split can flip with float rounding
+    X_raw = iris_df.iloc[:, :4] + np.random.default_rng(0).normal(0, 0.01, (150, 4))
+
+    for estimator in model.estimators_:
+        before = estimator.tree_.predict(scaler.transform(X_raw).astype(np.float32))
+        after = rescale_tree(estimator.tree_, scaler, shifted).predict(shifted.transform(X_raw).astype(np.float32))
+        assert np.array_equal(before, after)
+
+
+def test_incremental_update_adds_and_retires_trees(iris_df, deployed):
+    model, scaler = deployed
+    lineage = {"generations": [], "tree_generations": []}
+    # The new slice only has two of the three classes
+    new = iris_df.iloc[100:][iris_df["species"][100:] != "setosa"]
+
+    updated, new_scaler, n_retired = incremental_update(
+        model, scaler, new.iloc[:, :4], new["species"], {"max_depth": 4, "random_state": 0},
+        INCREMENTAL_PARAMS, lineage)
+
+    assert len(updated.estimators_) == 12 and n_retired == 3
+    assert lineage["tree_generations"] == [0] * 7 + [1] * 5
+    assert len(model.estimators_) == 10
+    assert np.isclose(new_scaler.n_samples_seen_, 100 + len(new))
+    proba = updated.predict_proba(new_scaler.transform(iris_df.iloc[:, :4]))
+    assert proba.shape == (150, 3)
+    assert (updated.predict(new_scaler.transform(iris_df.iloc[:, :4])) == iris_df["species"]).mean() > 0.9
+
+    with pytest.raises(ValueError):
+        unseen = new.assign(species="unknown")
+        incremental_update(model, scaler, unseen.iloc[:, :4], unseen["species"], {}, INCREMENTAL_PARAMS,
+                           {"generations": [], "tree_generations": []})
+
+
+def test_only_unconsumed_rows_are_new(iris_df):
+    consumed = np.sort(row_hashes(iris_df.iloc[:100]))
+    # The regenerated file is reshuffled and has 50 more rows
+    regenerated = iris_df.sample(frac=1.0, random_state=1)
+
+    new = ConsumedRows(consumed).new_rows(row_hashes(regenerated))
+
+    assert new.sum() == 50
+    assert sorted(regenerated.index[new]) == list(range(100, 150))
+    assert not ConsumedRows(row_hashes(iris_df)).new_rows(row_hashes(iris_df)).any()
+
+
+def test_repeated_rows_are_consumed_one_for_one():
+    df = pd.DataFrame({"x": [1.0, 1.0, 1.0, 2.0], "species": ["a", "a", "a", "b"]})
+    consumed = np.sort(row_hashes(df.iloc[[0, 3]]))
+    assert ConsumedRows(consumed).new_rows(row_hashes(df)).tolist() == [False, True, True, False]
+
+    # Checked chunk by chunk, consumed hashes are used up by the first rows that match them
+    consumed_rows = ConsumedRows(consumed)
+    assert [consumed_rows.new_rows(row_hashes(df.iloc[[i]]))[0] for i in range(4)] == [False, True, True, False]
+
+
+def test_scan_keeps_new_rows_and_a_bounded_sample(iris_df, tmp_path):
+    path = str(tmp_path / "train.parquet")
+    write_table(iris_df.sample(frac=1.0, random_state=1), path)
+
+    new_rows, new_hashes, sample, n_rows = scan_new_rows(
+        path, 16, ConsumedRows(row_hashes(iris_df.iloc[:100])), sample_rows=20)
+
+    assert n_rows == 150 and len(new_rows) == 50 and len(sample) == 20
+    assert sorted(new_hashes) == sorted(row_hashes(iris_df.iloc[100:]))
+    assert not set(row_hashes(sample)) & set(new_hashes)
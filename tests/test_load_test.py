@@ -0,0 +1,32 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+from benchmarks.load_test import (InProcessTarget, build_standin_app, classify_response, run_closed_loop,
+                                  run_open_loop, summarize, synthetic_corpus)
+
+
+def test_open_loop_sends_at_the_configured_rate():
+    target = InProcessTarget(build_standin_app(service_ms=1.0))
+    samples, elapsed = asyncio.run(run_open_loop(target, synthetic_corpus(20), rate=100, duration=0.5))
+
+    summary = summarize(samples, elapsed)
+    assert summary["requests"] == 50
+    assert summary["error_rate"] == 0
+    assert {s[0] for s in samples} == {"/predict_single", "/predict_batch"}
+
+
+def test_closed_loop_reports_shed_requests_past_admission_limit():
+    target = InProcessTarget(build_standin_app(service_ms=5.0, max_in_flight=1, max_queue=0))
+    samples, elapsed = asyncio.run(run_closed_loop(target, synthetic_corpus(20), concurrency=8, duration=0.3))
+
+    summary = summarize(samples, elapsed)
+    assert summary["shed_rate"] > 0
+    assert summary["p50_ms"] is not None and summary["p50_ms"] <= summary["p999_ms"]
+
+
+def test_classify_response_treats_failure_bodies_as_errors():
+    assert classify_response("/predict_single", 200, "Predicted species: setosa") == "ok"
+    assert classify_response("/predict_single", 200, "Prediction failed") == "error"
+    assert classify_response("/predict_batch", 200, '{"error": "boom"}') == "error"
+    assert classify_response("/predict_batch", 503, "Circuit breaker open") == "shed"
@@ -0,0 +1,124 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import asyncio
+import numpy as np
+import pytest
+from micro_batching import MicroBatcher
+
+
+class StubRunnerMethod:
+    """Runner method stand-in: async calls take a few milliseconds, blocking calls fail as off an AnyIO thread"""
+
+    def __init__(self, delay=0.005):
+        self.delay = delay
+        self.calls = []
+
+    async def async_run(self, X):
+        self.calls.append(len(X))
+        await asyncio.sleep(self.delay)
+        return X[:, 0] * 10
+
+    def run(self, X):
+        raise RuntimeError("Not running inside an AnyIO worker thread")
+
+
+def row(value):
+    return np.array([float(value), 0, 0, 0])
+
+
+def test_concurrent_requests_are_merged_through_the_async_runner():
+    """Concurrent rows share batches, each caller gets its own result and the runner is only awaited"""
+    runner = StubRunnerMethod()
+    batch_sizes = []
+
+    async def main():
+        batcher = MicroBatcher(runner.async_run, max_batch_size=8, max_wait_ms=50,
+                               on_batch=lambda size, waits: batch_sizes.append(size))
+        return await asyncio.gather(*[batcher.submit(row(i)) for i in range(16)])
+
+    results = asyncio.run(main())
+    assert [prediction for prediction, _ in results] == [i * 10.0 for i in range(16)]
+    # Each caller gets its batch's runner time, which leaves out the time spent waiting for the batch
+    assert all(0.005 <= seconds < 1 for _, seconds in results)
+    assert sum(batch_sizes) == 16 and sum(runner.calls) == 16
+    assert max(batch_sizes) > 1
+
+
+def test_errors_reach_every_caller():
+    """A failed batch raises in the caller instead of hanging it"""
+    async def predict(X):
+        raise RuntimeError("runner down")
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+        with pytest.raises(RuntimeError):
+            await batcher.submit(np.zeros(4))
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_stop_the_batcher():
+    """A row whose caller gave up is skipped; its batch-mates and later rows are still scored"""
+    gate = None
+
+    async def predict(X):
+        await gate.wait()
+        return X[:, 0] * 10
+
+    async def main():
+        nonlocal gate
+        gate = asyncio.Event()
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+        blocker = asyncio.ensure_future(batcher.submit(row(1)))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.ensure_future(batcher.submit(row(2)))
+        kept = asyncio.ensure_future(batcher.submit(row(3)))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        gate.set()
+
+        assert (await blocker)[0] == 10.0
+        assert (await kept)[0] == 30.0
+        assert cancelled.cancelled()
+        assert (await batcher.submit(row(4)))[0] == 40.0
+        assert not batcher._task.done()
+
+    asyncio.run(main())
+
+
+def test_rows_queued_during_a_slow_batch_are_merged():
+    """Rows that piled up behind a batch are dispatched together even though their wait has expired"""
+    batch_sizes = []
+    started = gate = None
+
+    async def predict(X):
+        started.set()
+        await gate.wait()
+        return X[:, 0]
+
+    async def main():
+        nonlocal started, gate
+        started, gate = asyncio.Event(), asyncio.Event()
+        batcher = MicroBatcher(predict, max_batch_size=32, max_wait_ms=1,
+                               on_batch=lambda size, waits: batch_sizes.append(size))
+        first = asyncio.ensure_future(batcher.submit(np.zeros(4)))
+        await started.wait()
+        queued = [asyncio.ensure_future(batcher.submit(row(i))) for i in range(10)]
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        assert (await first)[0] == 0.0
+        assert [prediction for prediction, _ in await asyncio.gather(*queued)] == [float(i) for i in range(10)]
+
+    asyncio.run(main())
+    assert batch_sizes == [1, 10]
+
+
+def test_batcher_restarts_on_a_new_event_loop():
+    """Each event loop gets its own batcher task, as each API worker process does"""
+    runner = StubRunnerMethod(delay=0)
+    batcher = MicroBatcher(runner.async_run, max_batch_size=4, max_wait_ms=1)
+
+    assert asyncio.run(batcher.submit(row(1)))[0] == 10.0
+    assert asyncio.run(batcher.submit(row(2)))[0] == 20.0
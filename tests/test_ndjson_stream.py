@@ -0,0 +1,79 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import asyncio
+import json
+from ndjson_stream import MAX_LINE_BYTES, iter_lines, stream_predictions
+
+RECORD = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+async def byte_chunks(lines, chunk_size=7):
+    data = "\n".join(lines).encode()
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def score_chunk(input_data):
+    return ["setosa" if row[2] < 2.5 else "virginica" for row in input_data]
+
+
+def collect(lines, chunk_rows=2):
+    async def run():
+        return [part async for part in stream_predictions(byte_chunks(lines), score_chunk, chunk_rows)]
+    return asyncio.run(run())
+
+
+def test_predictions_and_per_line_errors_in_order():
+    """Bad records get their own error line and do not fail the stream"""
+    lines = [json.dumps(RECORD), "{broken", "", json.dumps({**RECORD, "petal_length": 5.0}),
+             json.dumps({"sepal_length": 1})]
+    results = [json.loads(line) for part in collect(lines) for line in part.splitlines()]
+
+    assert [r["line"] for r in results] == [1, 2, 4, 5]
+    assert results[0]["prediction"] == "setosa"
+    assert "error" in results[1]
+    assert results[2]["prediction"] == "virginica"
+    assert results[3]["error"] == "Missing feature: sepal_width"
+
+
+def test_output_is_streamed_in_chunks():
+    """Results are emitted chunk by chunk instead of once at the end"""
+    parts = collect([json.dumps(RECORD)] * 10, chunk_rows=3)
+    assert [len(part.splitlines()) for part in parts] == [3, 3, 3, 1]
+
+
+def test_failed_chunk_reports_errors_for_its_lines():
+    """A scoring failure turns only that chunk's records into error lines"""
+    calls = []
+
+    async def flaky(input_data):
+        calls.append(len(input_data))
+        if len(calls) == 1:
+            raise RuntimeError("Service overloaded, retry later")
+        return ["setosa"] * len(input_data)
+
+    async def run():
+        lines = [json.dumps(RECORD)] * 4
+        return [part async for part in stream_predictions(byte_chunks(lines), flaky, 2)]
+
+    results = [json.loads(line) for part in asyncio.run(run()) for line in part.splitlines()]
+    assert [r.get("error") for r in results[:2]] == ["Service overloaded, retry later"] * 2
+    assert [r.get("prediction") for r in results[2:]] == ["setosa"] * 2
+
+
+def test_lines_are_numbered_across_chunks_and_overlong_lines_dropped():
+    """Many lines per chunk, lines split over chunks and an overlong line spanning several chunks"""
+    lines = [b"a" * 5] * 1000 + [b"x" * (2 * MAX_LINE_BYTES), b"last"]
+    data = b"\n".join(lines)
+
+    async def chunks():
+        for start in range(0, len(data), 4096):
+            yield data[start:start + 4096]
+
+    async def run():
+        return [item async for item in iter_lines(chunks())]
+
+    result = asyncio.run(run())
+    assert result[:1000] == [(n, b"aaaaa") for n in range(1, 1001)]
+    assert result[1000:] == [(1001, None), (1002, b"last")]
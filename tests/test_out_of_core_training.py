@@ -0,0 +1,50 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+from src.data_io import write_table
+from src.train_model import train_out_of_core
+
+MEMORY_CAP_BYTES = 8 * 1024 * 1024
+OUT_OF_CORE_PARAMS = {"chunk_size": 20000, "trees_per_chunk": 1, "n_jobs": 1, "sample_rows": 5000}
+
+
+def generated_dataset(n_rows, seed=0):
+    iris = load_iris()
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(iris.data), n_rows)
+    df = pd.DataFrame(iris.data[index] + rng.normal(0, 0.05, (n_rows, 4)),
+                      columns=["sepal_length", "sepal_width", "petal_length", "petal_width"])
+    df["species"] = iris.target_names[iris.target[index]]
+    return df
+
+
+def test_out_of_core_training_stays_under_memory_cap(tmp_path):
+    df = generated_dataset(1000000)
+    path = str(tmp_path / "train.parquet")
+    write_table(df, path)
+    dataset_bytes = int(df.memory_usage(deep=True).sum())
+    del df
+    assert dataset_bytes > 5 * MEMORY_CAP_BYTES
+
+    # Python and numpy allocations only; Arrow's own buffers are outside tracemalloc
+    tracemalloc.start()
+    try:
+        model, scaler, sample, n_rows = train_out_of_core(
+            path, {"max_depth": 5, "random_state": 42}, OUT_OF_CORE_PARAMS)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < MEMORY_CAP_BYTES, f"peak {peak / 1e6:.1f} MB for a {dataset_bytes / 1e6:.1f} MB dataset"
+    assert n_rows == 1000000
+    assert len(model.estimators_) == 50
+    assert len(sample) == 5000
+    assert np.isclose(scaler.n_samples_seen_, 1000000)
+
+    holdout = generated_dataset(2000, seed=1)
+    predictions = model.predict(scaler.transform(holdout.drop("species", axis=1)))
+    assert (predictions == holdout["species"]).mean() > 0.9
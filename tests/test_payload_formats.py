@@ -0,0 +1,79 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import io
+import json
+import numpy as np
+import pyarrow as pa
+import pytest
+from payload_formats import (ARROW_STREAM, CSV, JSON_TYPE, NPY, UnsupportedFormat, decode_features,
+                             encode_predictions, media_type)
+from schemas import FEATURE_NAMES
+
+X = np.array([[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]])
+
+
+def test_decode_every_format():
+    """Arrow, npy, CSV and both JSON layouts decode to the same matrix"""
+    table = pa.table({name: X[:, i] for i, name in enumerate(FEATURE_NAMES)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    npy = io.BytesIO()
+    np.save(npy, X)
+    csv = "petal_width,sepal_length,sepal_width,petal_length\n0.2,5.1,3.5,1.4\n2.3,6.7,3.0,5.2\n"
+    records = {"features": [dict(zip(FEATURE_NAMES, row)) for row in X.tolist()]}
+    columns = {name: X[:, i].tolist() for i, name in enumerate(FEATURE_NAMES)}
+
+    bodies = [
+        (sink.getvalue().to_pybytes(), ARROW_STREAM),
+        (npy.getvalue(), "application/octet-stream"),
+        (csv.encode(), "text/csv; charset=utf-8"),
+        (json.dumps(records).encode(), "application/json"),
+        (json.dumps(columns).encode(), ""),
+    ]
+    for body, content_type in bodies:
+        assert np.array_equal(decode_features(body, content_type), X)
+
+
+def test_encode_round_trip():
+    """Encoded predictions decode back to the same labels"""
+    predictions = ["setosa", "virginica"]
+
+    body, _ = encode_predictions(predictions, ARROW_STREAM)
+    assert pa.ipc.open_stream(body).read_all().column("prediction").to_pylist() == predictions
+    body, _ = encode_predictions(predictions, NPY)
+    assert np.load(io.BytesIO(body)).tolist() == predictions
+    body, _ = encode_predictions(predictions, CSV)
+    assert body.decode().split() == ["prediction"] + predictions
+    body, content_type = encode_predictions(predictions, "*/*")
+    assert json.loads(body) == {"predictions": predictions, "count": 2}
+
+
+def test_rejects_bad_payloads():
+    """Unknown media types and wrongly shaped matrices are refused"""
+    with pytest.raises(UnsupportedFormat):
+        media_type("image/png")
+
+    npy = io.BytesIO()
+    np.save(npy, np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        decode_features(npy.getvalue(), NPY)
+
+    # Malformed JSON shapes are client errors (ValueError -> 400), not TypeErrors that surface as a 500
+    for body in [b'[[5.1, 3.5, 1.4, 0.2]]', b'5', b'{"features": 3}',
+                 b'[{"sepal_length": {}, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}]',
+                 b'{"sepal_length": [[]], "sepal_width": [3.5], "petal_length": [1.4], "petal_width": [{}]}']:
+        with pytest.raises(ValueError):
+            decode_features(body, JSON_TYPE)
+
+    # Non-finite values are refused in every format, before they reach the model
+    for body, content_type in [(b"sepal_length,sepal_width,petal_length,petal_width\n5.1,,1.4,0.2\n", CSV),
+                               (b'[{"sepal_length": NaN, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}]',
+                                JSON_TYPE)]:
+        with pytest.raises(ValueError, match="finite"):
+            decode_features(body, content_type)
+    npy = io.BytesIO()
+    np.save(npy, np.array([[5.1, np.inf, 1.4, 0.2]]))
+    with pytest.raises(ValueError, match="finite"):
+        decode_features(npy.getvalue(), NPY)
@@ -0,0 +1,39 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import numpy as np
+from prediction_cache import PredictionCache
+
+
+def test_lookup_hits_and_misses():
+    """Stored rows are hits, new rows are reported as misses"""
+    cache = PredictionCache(max_size=10)
+    X = np.array([[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]])
+    keys, predictions, misses = cache.lookup(X)
+    assert misses == [0, 1]
+
+    cache.store(keys, ["setosa", "virginica"])
+    _, predictions, misses = cache.lookup(X[::-1])
+    assert misses == []
+    assert predictions == ["virginica", "setosa"]
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted once the cap is reached"""
+    cache = PredictionCache(max_size=2)
+    keys = cache.keys_for(np.array([[1.0, 0, 0, 0], [2.0, 0, 0, 0], [3.0, 0, 0, 0]]))
+    cache.store(keys[:2], ["a", "b"])
+    cache.lookup(np.array([[1.0, 0, 0, 0]]))
+
+    assert cache.store(keys[2:], ["c"]) == 1
+    _, predictions, misses = cache.lookup(np.array([[1.0, 0, 0, 0], [2.0, 0, 0, 0]]))
+    assert predictions == ["a", None]
+    assert misses == [1]
+
+
+def test_quantized_keys_share_entries():
+    """Rounded keys share entries"""
+    cache = PredictionCache(max_size=10, precision=1)
+    cache.store(cache.keys_for(np.array([[5.12, 3.5, 1.4, 0.2]])), ["setosa"])
+    _, predictions, _ = cache.lookup(np.array([[5.08, 3.5, 1.4, 0.2]]))
+    assert predictions == ["setosa"]
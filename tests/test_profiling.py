@@ -0,0 +1,119 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import subprocess
+import threading
+import time
+import pytest
+from collections import Counter
+from profiling import ProcessProfiler, ProfilerBusy, format_collapsed, sample_stacks, trace_allocations
+
+BENTOML_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml'))
+
+# A sibling process: registers for profiling, then burns CPU in a recognisable function
+SIBLING = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from profiling import ProcessProfiler
+ProcessProfiler(sys.argv[2], "runner:test").install()
+print("ready", flush=True)
+
+def sibling_hot_loop():
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        sum(range(1000))
+
+sibling_hot_loop()
+"""
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_finds_the_busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    try:
+        counts = sample_stacks(0.2, interval_seconds=0.002)
+    finally:
+        stop.set()
+        thread.join()
+
+    busy = [stack for stack in counts if stack.startswith("busy;") and "busy_loop" in stack]
+    assert busy and sum(counts[stack] for stack in busy) >= 10
+    assert not any("sample_stacks" in stack for stack in counts)
+
+
+def test_trace_allocations_reports_live_growth():
+    retained = []
+
+    def grow():
+        for _ in range(50):
+            retained.append(bytearray(10000))
+            time.sleep(0.002)
+
+    thread = threading.Thread(target=grow)
+    thread.start()
+    growth = trace_allocations(0.3)
+    thread.join()
+
+    assert max(growth.values()) >= 100000
+    top = growth.most_common(1)[0][0]
+    assert top.split(";")[-1].startswith("test_profiling.py:")
+
+
+def test_format_collapsed_roots_every_stack():
+    text = format_collapsed(Counter({"main;parse": 1, "main;predict": 3}), root="api_server#0")
+    assert text == "api_server#0;main;predict 3\napi_server#0;main;parse 1\n"
+
+
+def test_profile_all_merges_registered_siblings(tmp_path):
+    profile_dir = str(tmp_path)
+    sibling = subprocess.Popen([sys.executable, "-c", SIBLING, BENTOML_DIR, profile_dir],
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        assert sibling.stdout.readline().strip() == "ready"
+        profiler = ProcessProfiler(profile_dir, "api_server#0")
+
+        stacks, answered, missing = profiler.profile_all("cpu", 0.3, interval_seconds=0.002)
+
+        assert answered == [f"api_server#0[{os.getpid()}]", f"runner:test[{sibling.pid}]"]
+        assert missing == []
+        assert any(line.startswith(f"runner:test[{sibling.pid}];") and "sibling_hot_loop" in line
+                   for line in stacks.splitlines())
+        assert sibling.poll() is None
+        assert os.listdir(os.path.join(profile_dir, "results")) == []
+    finally:
+        sibling.kill()
+        sibling.wait()
+
+
+def test_dead_registrations_are_never_signalled(tmp_path):
+    profile_dir = str(tmp_path)
+    sibling = subprocess.Popen([sys.executable, "-c", SIBLING, BENTOML_DIR, profile_dir],
+                               stdout=subprocess.PIPE, text=True)
+    sibling.stdout.readline()
+    sibling.kill()
+    sibling.wait()
+
+    profiler = ProcessProfiler(profile_dir, "api_server#0")
+    assert profiler.siblings() == []
+    assert os.listdir(os.path.join(profile_dir, "processes")) == []
+
+
+def test_one_profile_at_a_time(tmp_path):
+    profiler = ProcessProfiler(str(tmp_path), "api_server#0")
+    thread = threading.Thread(target=profiler.profile_all, args=("cpu", 0.5))
+    thread.start()
+    time.sleep(0.1)
+    try:
+        with pytest.raises(ProfilerBusy):
+            ProcessProfiler(str(tmp_path), "api_server#1").profile_all("cpu", 0.1)
+    finally:
+        thread.join()
+
+    with pytest.raises(ValueError):
+        profiler.profile_all("wall", 0.1)
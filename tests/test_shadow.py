@@ -0,0 +1,92 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import asyncio
+import time
+import numpy as np
+from shadow import ShadowScorer
+
+
+def classify(X):
+    return np.where(X[:, 2] < 2.5, "setosa", "virginica").tolist()
+
+
+def test_challenger_agreement_is_reported():
+    results = []
+
+    async def challenger(X):
+        await asyncio.sleep(0.001)
+        return ["setosa"] * len(X)
+
+    async def main():
+        scorer = ShadowScorer(challenger, sample_rate=1.0, on_result=lambda *result: results.append(result))
+        X = np.array([[5.1, 3.5, 1.4, 0.2], [6.3, 3.3, 6.0, 2.5], [5.0, 3.6, 1.4, 0.2]])
+        assert scorer.offer(X, classify(X), 0.002)
+        await scorer.join()
+
+    asyncio.run(main())
+    agreed, rows, champion_seconds, challenger_seconds = results[0]
+    assert (agreed, rows, champion_seconds) == (2, 3, 0.002)
+    assert challenger_seconds >= 0.001
+
+
+def test_offer_never_waits_and_drops_when_full():
+    dropped = []
+    scored = []
+
+    async def slow_challenger(X):
+        await asyncio.sleep(0.05)
+        scored.append(len(X))
+        return classify(X)
+
+    async def main():
+        scorer = ShadowScorer(slow_challenger, sample_rate=1.0, max_queue=4, workers=1,
+                              on_drop=lambda: dropped.append(1))
+        X = np.zeros((1, 4))
+        start = time.perf_counter()
+        queued = [scorer.offer(X, classify(X), 0.001) for _ in range(10)]
+        assert time.perf_counter() - start < 0.01
+        await scorer.join()
+        return queued
+
+    queued = asyncio.run(main())
+    assert queued == [True] * 4 + [False] * 6
+    assert len(dropped) == 6 and len(scored) == 4
+
+
+def test_sampling_and_errors():
+    errors = []
+
+    async def broken_challenger(X):
+        raise RuntimeError("challenger down")
+
+    async def main():
+        X = np.zeros((1, 4))
+        never = ShadowScorer(broken_challenger, sample_rate=0.0)
+        assert not any(never.offer(X, ["setosa"], 0.001) for _ in range(100))
+
+        sampled = ShadowScorer(broken_challenger, sample_rate=0.25, max_queue=1000,
+                               on_error=lambda: errors.append(1))
+        n_queued = sum(sampled.offer(X, ["setosa"], 0.001) for _ in range(2000))
+        await sampled.join()
+        return n_queued
+
+    n_queued = asyncio.run(main())
+    assert 400 < n_queued < 600
+    assert len(errors) == n_queued
+
+
+def test_requests_without_a_champion_time_still_count_agreement():
+    results = []
+
+    async def challenger(X):
+        return classify(X)
+
+    async def main():
+        scorer = ShadowScorer(challenger, sample_rate=1.0, on_result=lambda *result: results.append(result))
+        X = np.array([[5.1, 3.5, 1.4, 0.2]])
+        assert scorer.offer(X, classify(X), None)
+        await scorer.join()
+
+    asyncio.run(main())
+    assert results[0][:3] == (1, 1, None)
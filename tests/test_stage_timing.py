@@ -0,0 +1,95 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import time
+from contextvars import copy_context
+from prometheus_client import CollectorRegistry, Histogram
+from stage_timing import STAGE_BUCKETS, StageMetrics, add_stage_seconds, stage_seconds, timed
+from benchmarks.bench_hot_paths import time_per_call, time_request_stages
+
+
+def stage_metrics(flush_interval_seconds=3600):
+    registry = CollectorRegistry()
+    metrics = StageMetrics(
+        Histogram("stage_seconds", "Stage latency", ["endpoint", "stage", "batch_size"],
+                  buckets=STAGE_BUCKETS, registry=registry),
+        Histogram("request_batch_size", "Batch size", ["endpoint"], registry=registry),
+        lambda size: "<=1" if size <= 1 else ">1",
+        flush_interval_seconds=flush_interval_seconds,
+    )
+    return metrics, registry
+
+
+def test_stages_are_summed_per_request_and_exported_on_flush():
+    metrics, registry = stage_metrics()
+
+    def request():
+        timer = metrics.start()
+        assert timed("parse", lambda rows: rows * 2, 21) == 42
+        timed("predict", time.sleep, 0.002)
+        timed("predict", time.sleep, 0.002)
+        assert stage_seconds("scale", "predict") == timer.durations["predict"]
+        before = timer.durations["predict"]
+        add_stage_seconds("predict", 0.001)
+        assert timer.durations["predict"] == before + 0.001
+        metrics.finish(timer, "predict_batch", 50)
+        return timer
+
+    timer = copy_context().run(request)
+    assert set(timer.durations) == {"parse", "predict"}
+    assert timer.durations["predict"] >= 0.004
+
+    labels = {"endpoint": "predict_batch", "stage": "predict", "batch_size": ">1"}
+    assert registry.get_sample_value("stage_seconds_count", labels) is None
+    metrics.flush()
+    assert registry.get_sample_value("stage_seconds_count", labels) == 1
+    assert registry.get_sample_value("stage_seconds_sum", labels) >= 0.004
+    assert registry.get_sample_value("request_batch_size_sum", {"endpoint": "predict_batch"}) == 50
+
+
+def test_timed_is_a_plain_call_outside_a_request():
+    metrics, registry = stage_metrics()
+    assert timed("predict", sum, [1, 2, 3]) == 6
+    add_stage_seconds("predict", 1.0)
+    assert stage_seconds("predict") is None
+
+    metrics.flush()
+    assert registry.get_sample_value("stage_seconds_count",
+                                     {"endpoint": "predict_batch", "stage": "predict", "batch_size": "<=1"}) is None
+
+
+def test_failed_stage_is_still_timed():
+    metrics, _ = stage_metrics()
+
+    def request():
+        timer = metrics.start()
+        try:
+            timed("parse", int, "not a number")
+        except ValueError:
+            pass
+        return timer
+
+    assert "parse" in copy_context().run(request).durations
+
+
+def test_background_flusher_exports_queued_requests():
+    metrics, registry = stage_metrics(flush_interval_seconds=0.01)
+
+    def request():
+        timer = metrics.start()
+        timed("drift", time.sleep, 0)
+        metrics.finish(timer, "predict_single", 1)
+
+    copy_context().run(request)
+    labels = {"endpoint": "predict_single", "stage": "drift", "batch_size": "<=1"}
+    deadline = time.time() + 2
+    while registry.get_sample_value("stage_seconds_count", labels) is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert registry.get_sample_value("stage_seconds_count", labels) == 1
+
+
+def test_request_path_overhead_is_a_few_microseconds():
+    metrics, _ = stage_metrics()
+    # Every stage of one request, plus queueing the export; generous bound for shared CI machines
+    assert time_per_call(lambda: time_request_stages(metrics), repeats=5) < 25
@@ -0,0 +1,56 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bentoml')))
+
+import numpy as np
+import pytest
+from startup import Readiness, memory_usage
+
+
+def test_readiness_retries_until_warmup_succeeds():
+    readiness = Readiness()
+    calls = []
+
+    def warmup():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("runner not reachable")
+
+    assert not readiness.ready
+    readiness.run(warmup, retry_delay=0.001)
+
+    assert readiness.ready
+    assert readiness.attempts == 3
+    assert readiness.last_error is None
+    assert readiness.warmup_seconds is not None
+
+
+def test_readiness_runs_warmup_once():
+    readiness = Readiness()
+    calls = []
+    readiness.run(lambda: calls.append(1))
+    readiness.run(lambda: calls.append(1))
+
+    assert calls == [1]
+
+
+def test_memory_usage_reports_rss():
+    before = memory_usage()
+    block = np.ones(32 * 1024 * 1024, dtype=np.uint8)
+
+    assert memory_usage()["rss"] >= before["rss"] + block.nbytes // 2
+
+
+def test_readiness_gives_up_after_max_attempts():
+    readiness = Readiness()
+    calls = []
+
+    def warmup():
+        calls.append(1)
+        raise RuntimeError("Not running inside an AnyIO worker thread")
+
+    with pytest.raises(RuntimeError):
+        readiness.run(warmup, retry_delay=0.001, max_attempts=3)
+
+    assert len(calls) == 3
+    assert readiness.state == Readiness.FAILED and not readiness.ready
+    assert readiness.last_error == "Not running inside an AnyIO worker thread"
@@ -0,0 +1,60 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_iris
+import src.tune_model as tune_model
+
+
+@pytest.fixture
+def tune_params(tmp_path):
+    return {
+        "strategy": "random",
+        "n_trials": 3,
+        "cv_folds": 3,
+        "random_state": 42,
+        "fold_cache_dir": str(tmp_path / "folds"),
+        "search_space": {"n_estimators": [5, 10], "max_depth": [2, 4, None]},
+    }
+
+
+@pytest.fixture
+def train_file(tmp_path):
+    iris = load_iris()
+    df = pd.DataFrame(iris.data, columns=["sepal_length", "sepal_width", "petal_length", "petal_width"])
+    df["species"] = iris.target_names[iris.target]
+    path = tmp_path / "train.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_candidates_grid_and_random(tune_params):
+    random_trials = tune_model.candidates(tune_params)
+    assert len(random_trials) == 3
+    assert random_trials == tune_model.candidates(tune_params)
+
+    grid = tune_model.candidates({**tune_params, "strategy": "grid"})
+    assert len(grid) == 6
+    assert all(trial in grid for trial in random_trials)
+
+    with pytest.raises(ValueError):
+        tune_model.candidates({**tune_params, "strategy": "bayes"})
+
+
+def test_folds_are_cached_and_scored(tune_params, train_file):
+    path = tune_model.build_folds(train_file, tune_params)
+    mtime = os.path.getmtime(path)
+    assert tune_model.build_folds(train_file, tune_params) == path
+    assert os.path.getmtime(path) == mtime
+
+    tune_model.init_worker(path, tune_params["cv_folds"])
+    assert sum(len(fold[3]) for fold in tune_model._folds) == 150
+    # Each fold is scaled with statistics from its own training part
+    assert np.allclose(tune_model._folds[0][0].mean(axis=0), 0.0)
+
+    result = tune_model.run_trial(0, {"n_estimators": 5, "max_depth": 3, "random_state": 0}, 100)
+    assert result["cv_accuracy"] > 0.85
+    assert result["predict_latency_ms"] > 0
+    assert tune_model.objective(result, 0.01) < result["cv_accuracy"]